@@ -0,0 +1,110 @@
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent import futures
+from datetime import datetime
+
+import numpy as np
+
+
+def get_peak_rss_mb() -> float:
+    """
+    peak resident set size of current process in MB.
+    It is the peak over the whole process lifetime, run the benchmark by `run_isolated` to get the peak of it alone.
+    """
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        # bytes on macOS, kilobytes on linux
+        return peak_rss / 1024 / 1024
+    return peak_rss / 1024
+
+
+def summarize_latency(latency_list_sec: list, n_events: int, total_time_sec: float) -> dict:
+    """
+    summarizing latency list into events/s, p50 / p99 latency in milliseconds
+    """
+    latency_ms = np.array(latency_list_sec, dtype=float) * 1000
+    return {
+        'n_events': n_events,
+        'total_time_sec': total_time_sec,
+        'events_per_sec': n_events / total_time_sec if total_time_sec > 0 else None,
+        'latency_p50_ms': float(np.percentile(latency_ms, 50)) if len(latency_ms) > 0 else None,
+        'latency_p99_ms': float(np.percentile(latency_ms, 99)) if len(latency_ms) > 0 else None,
+        'n_calls': len(latency_list_sec),
+        'peak_rss_mb': get_peak_rss_mb(),
+    }
+
+
+def time_calls(function, call_args_list: list, n_events_per_call) -> dict:
+    """
+    timing function call for each args in call_args_list
+    :param function: function to benchmark
+    :param call_args_list: list of args tuple
+    :param n_events_per_call: list of #events for each call
+    :return: summary dict
+    """
+    latency_list = []
+    total_start = time.perf_counter()
+    for args in call_args_list:
+        start = time.perf_counter()
+        function(*args)
+        latency_list.append(time.perf_counter() - start)
+    total_time = time.perf_counter() - total_start
+    return summarize_latency(latency_list, int(sum(n_events_per_call)), total_time)
+
+
+def run_isolated(function, *args):
+    """
+    running one benchmark in a fresh (spawned) process, so the peak RSS reported by it
+    is not inflated by benchmarks run before it. function and args should be picklable.
+    :param function: module level benchmark function
+    :param args: arguments of function
+    :return: return value of function
+    """
+    context = multiprocessing.get_context('spawn')
+    with futures.ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(function, *args).result()
+
+
+@contextlib.contextmanager
+def suppress_stdout():
+    """
+    the code under benchmark prints progress per event, keep it out of the measurement output
+    """
+    with open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(devnull):
+            yield
+
+
+def get_git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL
+        ).decode('utf-8').strip()
+    except (subprocess.CalledProcessError, OSError):
+        return 'unknown'
+
+
+def save_results(results: dict, output_dir: str) -> str:
+    """
+    saving benchmark results as json, file name contains time and git commit for comparing across commits
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    commit = get_git_commit()
+    payload = {
+        'git_commit': commit,
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    output_path = os.path.join(output_dir, 'bench_{}_{}.json'.format(datetime.now().strftime('%Y%m%d-%H%M%S'), commit))
+    with open(output_path, 'w') as f:
+        json.dump(payload, f, indent=2, default=str)
+    return output_path
@@ -0,0 +1,98 @@
+from collections import namedtuple, defaultdict
+
+
+TopicPartition = namedtuple('TopicPartition', ['topic', 'partition'])
+ConsumerRecord = namedtuple('ConsumerRecord', ['topic', 'partition', 'offset', 'key', 'value', 'headers'])
+
+
+class InMemoryKafkaBroker:
+    """
+    In-memory stand-in of kafka broker for benchmark, topics are list of records per partition.
+    """
+
+    def __init__(self, n_partitions=1):
+        self._n_partitions = n_partitions
+        self._topics = defaultdict(lambda: [[] for _ in range(self._n_partitions)])
+
+    def append(self, topic, value, key=None, headers=None, partition=None):
+        partitions = self._topics[topic]
+        if partition is None:
+            partition = hash(key) % self._n_partitions if key is not None else 0
+        offset = len(partitions[partition])
+        partitions[partition].append(
+            ConsumerRecord(topic, partition, offset, key, value, list(headers or []))
+        )
+
+    def get_partitions(self, topic) -> list:
+        return self._topics[topic]
+
+
+class _InMemoryFuture:
+
+    def add_callback(self, fn, *args, **kwargs):
+        fn(*args, None, **kwargs)
+        return self
+
+    def add_errback(self, fn, *args, **kwargs):
+        return self
+
+
+class InMemoryKafkaProducer:
+    """
+    Stand-in of KafkaProducer / BatchedKafkaProducer, message is appended to in-memory broker directly.
+    """
+
+    def __init__(self, broker: InMemoryKafkaBroker):
+        self._broker = broker
+
+    def send(self, topic, value, key=None, headers=None):
+        self._broker.append(topic, value, key=key, headers=headers)
+        return _InMemoryFuture()
+
+    def flush(self, timeout=None):
+        pass
+
+
+class InMemoryKafkaConsumer:
+    """
+    Stand-in of KafkaConsumer, supports `poll` and iteration as used by OnlineMachineLearningServer.
+    `poll` returns empty result once all records are consumed.
+    """
+
+    def __init__(self, broker: InMemoryKafkaBroker, topic='testTopic', partitions=None):
+        """
+        :param broker: InMemoryKafkaBroker
+        :param topic: topic to consume
+        :param partitions: partition ids assigned to this consumer, all partitions if None
+        """
+        self._broker = broker
+        self._topic = topic
+        self._partitions = None if partitions is None else set(partitions)
+        self._positions = defaultdict(int)
+
+    def poll(self, timeout_ms=0, max_records=None, update_offsets=True):
+        result = {}
+        n_remaining = max_records
+        for partition, records in enumerate(self._broker.get_partitions(self._topic)):
+            if self._partitions is not None and partition not in self._partitions:
+                continue
+            position = self._positions[partition]
+            end = len(records) if n_remaining is None else min(len(records), position + n_remaining)
+            if end > position:
+                result[TopicPartition(self._topic, partition)] = records[position:end]
+                if update_offsets:
+                    self._positions[partition] = end
+                if n_remaining is not None:
+                    n_remaining -= end - position
+                    if n_remaining <= 0:
+                        break
+        return result
+
+    def __iter__(self):
+        while True:
+            polling_result = self.poll()
+            if len(polling_result) == 0:
+                return
+            for records in polling_result.values():
+                for record in records:
+                    yield record
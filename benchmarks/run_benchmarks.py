@@ -0,0 +1,199 @@
+"""
+Benchmark suite of end-to-end train / serve loop.
+
+Drives OnlineMachineLearningServer (through an in-memory kafka stand-in),
+OnlineMachineLearningModelServing.inference, RiverModelEvaluator._run_prediction and the data loaders
+with synthetic data from Generator.generate_data. Reports events/s, p50/p99 latency and peak RSS,
+results are saved as json for comparing across commits.
+Each benchmark runs in its own spawned process, peak RSS is of that benchmark only.
+
+>> python benchmarks/run_benchmarks.py --n-events 5000 --batch-size 500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, '..', 'src'))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, '..'))
+
+import pandas as pd
+
+from benchmarks.in_memory_kafka import InMemoryKafkaBroker, InMemoryKafkaProducer, InMemoryKafkaConsumer
+from benchmarks.bench_utils import time_calls, summarize_latency, suppress_stdout, save_results, run_isolated
+
+from data_generator.random_data_generator import Generator
+from tools.message_codec import get_codec, encode_message
+from tools.data_loader import GeneralDataLoader, TimeSeriesDataLoader
+from tools.model_evaluator import RiverModelEvaluator
+from serving.onlineml_core import OnlineMachineLearningServer
+from serving.onlineml_model_serving import OnlineMachineLearningModelServing
+from serving.model_snapshot import InProcessModelSnapshotChannel
+
+
+LABEL_NAME = 'Y'
+
+
+def generate_synthetic_events(n_events: int, seed=42) -> pd.DataFrame:
+    import random
+    random.seed(seed)
+    generator = Generator()
+    return pd.DataFrame([generator.generate_data(condition=0) for i in range(n_events)])
+
+
+def bench_producer_encoding(events_df: pd.DataFrame, codec_name: str) -> dict:
+    codec = get_codec(codec_name)
+    rows = [row for index, row in events_df.iterrows()]
+    latency_list = []
+    n_bytes = 0
+    total_start = time.perf_counter()
+    for row in rows:
+        start = time.perf_counter()
+        payload, headers = encode_message(row, codec)
+        latency_list.append(time.perf_counter() - start)
+        n_bytes += len(payload)
+    result = summarize_latency(latency_list, len(rows), time.perf_counter() - total_start)
+    result['bytes_per_event'] = n_bytes / len(rows)
+    return result
+
+
+def prepare_topic(events_df: pd.DataFrame, codec_name: str) -> InMemoryKafkaBroker:
+    broker = InMemoryKafkaBroker()
+    producer = InMemoryKafkaProducer(broker)
+    codec = get_codec(codec_name)
+    for index, row in events_df.iterrows():
+        payload, headers = encode_message(row, codec)
+        producer.send('testTopic', payload, headers=headers)
+    producer.flush()
+    return broker
+
+
+def bench_trainer(events_df: pd.DataFrame, batch_size: int, codec_name: str, training_mode: str):
+    """
+    training through polling batch from in-memory topic
+    :param training_mode: `row` for train_model_by_one_polling_batch, `columnar` for columnar batch training
+    :return: summary dict, trained model
+    """
+    broker = prepare_topic(events_df, codec_name)
+    consumer = InMemoryKafkaConsumer(broker)
+    with suppress_stdout():
+        server = OnlineMachineLearningServer(kafka_consumer=consumer)
+
+    if training_mode == 'row':
+        train_function = server.train_model_by_one_polling_batch
+    else:
+        train_function = server.train_model_by_columnar_polling_batch
+
+    call_args_list = []
+    n_events_per_call = []
+    while True:
+        polling_result = consumer.poll(max_records=batch_size)
+        if len(polling_result) == 0:
+            break
+        records = [record for records in polling_result.values() for record in records]
+        call_args_list.append((records, LABEL_NAME))
+        n_events_per_call.append(len(records))
+
+    with suppress_stdout():
+        result = time_calls(train_function, call_args_list, n_events_per_call)
+    return result, server.get_model()
+
+
+def bench_serving_inference(model, events_df: pd.DataFrame, batch_size: int) -> dict:
+    with suppress_stdout():
+        serving = OnlineMachineLearningModelServing.get_instance()
+        channel = InProcessModelSnapshotChannel()
+        channel.publish(model)
+        serving.set_model_snapshot_channel(channel)
+
+    features_df = events_df.drop(columns=[LABEL_NAME])
+    call_args_list = []
+    n_events_per_call = []
+    for start in range(0, len(features_df.index), batch_size):
+        batch_df = features_df.iloc[start:start + batch_size]
+        call_args_list.append((batch_df,))
+        n_events_per_call.append(len(batch_df.index))
+
+    with suppress_stdout():
+        return time_calls(serving.inference, call_args_list, n_events_per_call)
+
+
+def bench_river_evaluator(model, events_df: pd.DataFrame, batch_size: int) -> dict:
+    evaluator = RiverModelEvaluator(model, None, LABEL_NAME)
+    X = events_df.drop(columns=[LABEL_NAME])
+    y = events_df[LABEL_NAME]
+
+    call_args_list = []
+    n_events_per_call = []
+    for start in range(0, len(X.index), batch_size):
+        call_args_list.append((X.iloc[start:start + batch_size], y.iloc[start:start + batch_size], True))
+        n_events_per_call.append(len(X.iloc[start:start + batch_size].index))
+
+    with suppress_stdout():
+        return time_calls(evaluator._run_prediction, call_args_list, n_events_per_call)
+
+
+def bench_data_loaders(events_df: pd.DataFrame, n_repeat: int) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, 'synthetic_events.csv')
+        time_series_df = events_df.copy()
+        time_series_df['DateTime'] = pd.date_range('2021-01-01', periods=len(events_df.index), freq='5min')
+        time_series_df.to_csv(csv_path, index=False)
+
+        n_rows = len(events_df.index)
+        with suppress_stdout():
+            results['general_data_loader'] = time_calls(
+                GeneralDataLoader, [(csv_path,)] * n_repeat, [n_rows] * n_repeat
+            )
+            results['time_series_data_loader'] = time_calls(
+                lambda path: TimeSeriesDataLoader(path, time_series_column_name='DateTime', time_format="%yyyy-%mm-%dd %HH:%MM:%SS"),
+                [(csv_path,)] * n_repeat, [n_rows] * n_repeat
+            )
+    return results
+
+
+def run_main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--n-events', type=int, default=5000, help='number of synthetic events')
+    parser.add_argument('-b', '--batch-size', type=int, default=500, help='events per polling / inference batch')
+    parser.add_argument('-c', '--codec', type=str, nargs='+', default=['json', 'msgpack'], help='wire format to benchmark')
+    parser.add_argument('-r', '--loader-repeat', type=int, default=3, help='repeat times of data loader benchmark')
+    parser.add_argument('-o', '--output-dir', type=str, default=os.path.join(BENCHMARK_DIR, 'results'))
+    args = parser.parse_args()
+
+    print("generating {} synthetic events".format(args.n_events))
+    events_df = generate_synthetic_events(args.n_events)
+
+    results = {'config': vars(args)}
+
+    for codec_name in args.codec:
+        results['producer_encoding_{}'.format(codec_name)] = run_isolated(
+            bench_producer_encoding, events_df, codec_name)
+
+    trained_model = None
+    for codec_name in args.codec:
+        for training_mode in ['row', 'columnar']:
+            result, trained_model = run_isolated(bench_trainer, events_df, args.batch_size, codec_name, training_mode)
+            results['trainer_{}_{}'.format(training_mode, codec_name)] = result
+
+    results['serving_inference'] = run_isolated(bench_serving_inference, trained_model, events_df, args.batch_size)
+    results['river_model_evaluator'] = run_isolated(bench_river_evaluator, trained_model, events_df, args.batch_size)
+    results.update(run_isolated(bench_data_loaders, events_df, args.loader_repeat))
+
+    for name, result in results.items():
+        if name == 'config':
+            continue
+        print("{:<40} {:>12.1f} events/s  p50 {:>9.3f} ms  p99 {:>9.3f} ms  peak RSS {:>8.1f} MB".format(
+            name, result['events_per_sec'] or 0, result['latency_p50_ms'] or 0, result['latency_p99_ms'] or 0,
+            result['peak_rss_mb']
+        ))
+
+    output_path = save_results(results, args.output_dir)
+    print("benchmark results saved to {}".format(output_path))
+
+
+if __name__ == '__main__':
+    run_main()
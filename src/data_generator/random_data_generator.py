@@ -8,7 +8,9 @@ import random
 import requests
 import json
 
-from kafka import KafkaProducer
+from tools.message_codec import get_codec, encode_message
+from tools.kafka_batch_producer import BatchedKafkaProducer
+from tools.http_payload import encode_data_payload
 
 
 class Engine:
@@ -196,10 +198,13 @@ class Generator(ABC):
         self._exp_random_generator.exp_lambda = -1
 
         self._kafka_producer = None
+        self._message_codec = get_codec('json')
 
-    def init_kafka_producer(self, bootstrap_servers: str):
-        self._kafka_producer = KafkaProducer(
-            bootstrap_servers=bootstrap_servers
+    def init_kafka_producer(self, bootstrap_servers: str, linger_ms=20, batch_size=256 * 1024):
+        self._kafka_producer = BatchedKafkaProducer(
+            bootstrap_servers=bootstrap_servers,
+            linger_ms=linger_ms,
+            batch_size=batch_size
         )
         print("Successfully initialized kafka producer")
 
@@ -254,23 +259,33 @@ class Generator(ABC):
 
         return row
 
+    def set_message_codec(self, message_codec: str):
+        """
+        set the wire format of pd.Series / pd.DataFrame sending to kafka, `json`, `msgpack` or `arrow`
+        :param message_codec: codec name
+        :return:
+        """
+        self._message_codec = get_codec(message_codec)
+
     def send_to_kafka(self, topic: str, data):
 
-        data_to_send = None
-        if isinstance(data, str):
-            data_to_send = bytes(data, 'utf-8')
-        elif isinstance(data, pd.Series):
-            data_to_send = bytes(str(data.to_json()), 'utf-8')
-        elif isinstance(data, bytearray):
-            data_to_send = data
+        data_to_send, headers = encode_message(data, self._message_codec)
 
         if data_to_send is not None:
             try:
-                self._kafka_producer.send(topic, data_to_send)
-                self._kafka_producer.flush()
+                self._kafka_producer.send(topic, data_to_send, headers=headers)
             except Exception as e:
                 e.with_traceback()
 
+    def flush(self):
+        """
+        block until all in-flight messages sending to kafka are delivered,
+        should be called at the end of a pump run.
+        :return:
+        """
+        if self._kafka_producer is not None:
+            self._kafka_producer.flush()
+
     def run_dataset_pump_to_kafka(self, iteration=1000, time_interval=0):
 
         for i in range(iteration):
@@ -279,33 +294,22 @@ class Generator(ABC):
             if time_interval != 0:
                 time.sleep(time_interval)
 
+        self.flush()
 
-    def run_dataset_pump_to_inference_api(self, api_url: str):
 
-        headers = {'content-type': 'application/json'}
-        now = datetime.now()
+    def run_dataset_pump_to_inference_api(self, api_url: str, payload_format='json'):
 
-        row = self.generate_data(condition=0)
-        df_to_send = pd.DataFrame()
-        df_to_send = df_to_send.append(row, ignore_index=True)
-        # breakpoint()
+        now = datetime.now()
 
-        for i in range(999):
-            row = self.generate_data(condition=0)
-            # df_temp = pd.DataFrame(row)
-            df_to_send = df_to_send.append(row, ignore_index=True)
+        # build the data frame once instead of appending row by row
+        df_to_send = pd.DataFrame([self.generate_data(condition=0) for i in range(1000)])
 
 
         print(df_to_send.head(5))
 
-        df_to_json = df_to_send.to_json()
-        wrap_to_send = {
-            'x_axis_name': now.strftime("%H:%M:%S"),
-            'label_name': 'Y',
-            'Data': str(df_to_json)
-        }
+        body, headers = encode_data_payload(df_to_send, now.strftime("%H:%M:%S"), 'Y', payload_format)
 
-        response = requests.post(api_url, data=json.dumps(wrap_to_send), headers=headers)
+        response = requests.post(api_url, data=body, headers=headers)
         print(response)
 
     # def generate_one(self):
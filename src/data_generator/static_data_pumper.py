@@ -6,7 +6,10 @@ import requests
 import json
 
 import pandas as pd
-from kafka import KafkaProducer
+from tools.message_codec import get_codec, encode_message
+from tools.kafka_batch_producer import BatchedKafkaProducer
+from tools.http_payload import encode_data_payload
+from tools.label_encoder_registry import LabelEncoderRegistry, DEFAULT_LABEL_ENCODER_REGISTRY_PATH
 
 
 class DataPumper:
@@ -14,10 +17,13 @@ class DataPumper:
     def __init__(self):
         self._df = None
         self._kafka_producer = None
+        self._message_codec = get_codec('json')
 
-    def init_kafka_producer(self, bootstrap_servers: str):
-        self._kafka_producer = KafkaProducer(
-            bootstrap_servers=bootstrap_servers
+    def init_kafka_producer(self, bootstrap_servers: str, linger_ms=20, batch_size=256 * 1024):
+        self._kafka_producer = BatchedKafkaProducer(
+            bootstrap_servers=bootstrap_servers,
+            linger_ms=linger_ms,
+            batch_size=batch_size
         )
         print("Successfully initialized kafka producer")
 
@@ -37,38 +43,67 @@ class DataPumper:
         else:
             print("Error, the dataframe is not created yet! please load data first!")
 
+    def label_encoding(self, label_encoder_registry: LabelEncoderRegistry, columns=None, extend=True,
+                       exclude=None):
+        """
+        encoding categorical columns once before pumping, with the same category codes as data loader and serving
+        :param label_encoder_registry: shared label encoder registry, e.g. LabelEncoderRegistry.load(path)
+        :param columns: columns to encode, default all object columns
+        :param extend: appending unseen categories to registry, otherwise mapping them to unknown value
+        :param exclude: columns not to encode, e.g. date-time column
+        :return:
+        """
+        if self._df is None:
+            print("Error, the dataframe is not created yet! please load data first!")
+            return
+        label_encoder_registry.encode_frame(self._df, columns=columns, extend=extend, exclude=exclude)
+
+    def set_message_codec(self, message_codec: str):
+        """
+        set the wire format of pd.Series / pd.DataFrame sending to kafka, `json`, `msgpack` or `arrow`
+        :param message_codec: codec name
+        :return:
+        """
+        self._message_codec = get_codec(message_codec)
+
     def send_to_kafka(self, topic: str, data):
 
-        data_to_send = None
-        if isinstance(data, str):
-            data_to_send = bytes(data, 'utf-8')
-        elif isinstance(data, pd.Series):
-            data_to_send = bytes(str(data.to_json()), 'utf-8')
-        elif isinstance(data, bytearray):
-            data_to_send = data
+        data_to_send, headers = encode_message(data, self._message_codec)
 
         if data_to_send is not None:
             try:
-                self._kafka_producer.send(topic, data_to_send)
-                self._kafka_producer.flush()
+                self._kafka_producer.send(topic, data_to_send, headers=headers)
             except Exception as e:
                 e.with_traceback()
 
+    def flush(self):
+        """
+        block until all in-flight messages sending to kafka are delivered,
+        should be called at the end of a pump run.
+        :return:
+        """
+        if self._kafka_producer is not None:
+            self._kafka_producer.flush()
+
 
     def run_dataset_pump_to_kafka(self, start_row=0, end_row=None, time_interval=0):
 
         slicing_df = self._df.iloc[start_row: end_row]
 
-        for index, row in tqdm(slicing_df.iterrows(), total=slicing_df.shape[1]):
+        for index, row in tqdm(slicing_df.iterrows(), total=slicing_df.shape[0]):
             self.send_to_kafka('testTopic', row)
 
             if time_interval != 0:
                 time.sleep(time_interval)
 
-    def run_dataset_pump_to_inference_api(self, api_url: str, start_row=0, end_row=None, batch_size=10,
-                                          label_name='Y', time_series_column_name=''):
+        self.flush()
 
-        headers = {'content-type': 'application/json'}
+    def run_dataset_pump_to_inference_api(self, api_url: str, start_row=0, end_row=None, batch_size=10,
+                                          label_name='Y', time_series_column_name='', payload_format='json'):
+        """
+        sending data batch by batch to inference/validation api, and sending back to kafka for online training
+        :param payload_format: http body format, `json`, `msgpack`, `arrow` or `parquet`
+        """
 
         slicing_df = self._df.iloc[start_row: end_row]
         sending_offset = 0
@@ -109,13 +144,8 @@ class DataPumper:
                 if distinct_time is not None:
                     x_axis_name = distinct_time[sending_offset]
 
-                df_to_json = sub_df_to_send.to_json()
-                wrap_to_send = {
-                    'x_axis_name': x_axis_name,
-                    'label_name': label_name,
-                    'Data': str(df_to_json)
-                }
-                response = requests.post(api_url, data=json.dumps(wrap_to_send), headers=headers)
+                body, headers = encode_data_payload(sub_df_to_send, x_axis_name, label_name, payload_format)
+                response = requests.post(api_url, data=body, headers=headers)
                 print(response)
 
                 '''
@@ -125,6 +155,7 @@ class DataPumper:
                 '''
                 for index, row in tqdm(sub_df_to_send.iterrows(), total=sub_df_to_send.shape[0]):
                     self.send_to_kafka('testTopic', row)
+                self.flush()
 
                 '''
                 ==============================
@@ -148,6 +179,13 @@ if __name__ == "__main__":
     pumper.init_kafka_producer(bootstrap_servers='localhost:9092')
     # pumper.load_data_from_csv("../../playground/quick_study/dummy_toy/dummy_data.csv")
     pumper.load_data_from_csv("../../data/stock_index_predict/eda_TW50_top30_append.csv")
+    # same category codes as training data loaders and serving, date column is kept as string for slicing
+    label_encoder_registry_path = DEFAULT_LABEL_ENCODER_REGISTRY_PATH
+    if os.path.isfile(label_encoder_registry_path):
+        pumper.label_encoding(LabelEncoderRegistry.load(label_encoder_registry_path), extend=False, exclude=['Date'])
+    else:
+        print("Label encoder registry {} not found, categorical columns are not encoded".format(
+            label_encoder_registry_path))
     pumper.show_df()
 
 
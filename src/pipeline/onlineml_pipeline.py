@@ -3,11 +3,13 @@ import os
 from accepts import accepts
 
 from tools.data_loader import TimeSeriesDataLoader
+from tools.label_encoder_registry import LabelEncoderRegistry, DEFAULT_LABEL_ENCODER_REGISTRY_PATH
 
 class ExperimentPipeline:
 
     @staticmethod
-    def _preparing_time_series_dataloader(data_path: str, time_series_column_name: str, time_format: str, drop_feature_list=None) -> TimeSeriesDataLoader:
+    def _preparing_time_series_dataloader(data_path: str, time_series_column_name: str, time_format: str, drop_feature_list=None,
+                                          label_encoder_registry: LabelEncoderRegistry = None) -> TimeSeriesDataLoader:
         """
         preparing time series dataloader base on input data path, should provide one and only one date-time column,
         specifying the date-time format is needed.
@@ -15,11 +17,13 @@ class ExperimentPipeline:
         :param time_series_column_name: str
         :param time_format: str
         :param drop_feature_list:
+        :param label_encoder_registry: label encoders shared between dataloaders
         :return:
         """
         data_loader = TimeSeriesDataLoader(
             data_path,
-            time_series_column_name=time_series_column_name, time_format=time_format
+            time_series_column_name=time_series_column_name, time_format=time_format,
+            label_encoder_registry=label_encoder_registry
         )
         if drop_feature_list is not None:
             for i in drop_feature_list:
@@ -31,7 +35,11 @@ class ExperimentPipeline:
         return data_loader
 
 
-    def __init__(self):
+    def __init__(self, label_encoder_registry_path=DEFAULT_LABEL_ENCODER_REGISTRY_PATH):
+        """
+        :param label_encoder_registry_path: json path the label encoder registry is saved to after data preparation,
+                                            loaded by data pumper and serving. None to not save.
+        """
 
         self._input_training_data_path = None
         self._input_testing_data_path = None
@@ -39,6 +47,9 @@ class ExperimentPipeline:
         self._training_dataloader = None
         self._testing_dataloader = None
 
+        # training and testing data are encoded with the same category codes
+        self._label_encoder_registry = LabelEncoderRegistry()
+        self._label_encoder_registry_path = label_encoder_registry_path
 
 
     @accepts(str, str, str, str, (None, list, str))
@@ -57,9 +68,32 @@ class ExperimentPipeline:
 
         # Preparing dataloader for following experiment workflow
 
-        self._training_dataloader = self._preparing_time_series_dataloader(training_data_path, time_series_column_name, time_format, drop_feature_list)
-        self._testing_dataloader = self._preparing_time_series_dataloader(testing_data_path, time_series_column_name, time_format, drop_feature_list)
+        self._training_dataloader = self._preparing_time_series_dataloader(training_data_path, time_series_column_name, time_format, drop_feature_list, self._label_encoder_registry)
+        self._testing_dataloader = self._preparing_time_series_dataloader(testing_data_path, time_series_column_name, time_format, drop_feature_list, self._label_encoder_registry)
+        self.save_label_encoder_registry()
 
+    def save_label_encoder_registry(self):
+        """
+        saving label encoder registry shared by training and testing dataloader, so data pumper and serving
+        encode categories with the same codes
+        :return:
+        """
+        if self._label_encoder_registry_path is None:
+            return
+        try:
+            self._label_encoder_registry.save(self._label_encoder_registry_path)
+            print("Saving label encoder registry {} successfully".format(self._label_encoder_registry_path))
+        except OSError:
+            print("Can not save label encoder registry {}, please check the folder exists".format(
+                self._label_encoder_registry_path))
+
+
+    def get_label_encoder_registry(self) -> LabelEncoderRegistry:
+        """
+        get label encoder registry shared by training and testing dataloader, e.g. to save it for serving
+        :return: LabelEncoderRegistry
+        """
+        return self._label_encoder_registry
 
     def get_training_dataloader(self):
         """
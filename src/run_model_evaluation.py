@@ -4,13 +4,12 @@ import argparse
 import matplotlib.pyplot as plt
 import numpy as np
 
-from sklearn.metrics import accuracy_score, recall_score, precision_score
-
 from sklearn.ensemble import RandomForestClassifier
 from river import tree, ensemble
 
 from tools.DataPreparation import ArbitraryDataPreparation, CreditCardPreparation
 from tools.DataVisualization import TrendPlot, BasicHistogram
+from tools.threshold_analysis import ThresholdSweep
 
 from task1_model_evaluation.ModelExperimentWorkflow import ModelSklearnWorkflow, ModelRiverOnlineMLWorkflow
 
@@ -72,26 +71,19 @@ def init_workflow(args, loaded_data):
     return exp_flow
 
 def draw_sliding_proba_cut_threshold(exp_flow, output_plot):
-    proba_cut = []
-    acc_slide_proba_cut = []
-    recall_slide_proba_cut = []
-    precision_slide_proba_cut = []
-
-    for proba_threshold in np.arange(0.05, 0.65, 0.05):
-        proba_cut.append(proba_threshold)
-        print("prediction probability")
-        pred_proba, true_y = exp_flow.batch_pred_prob_test_dataset()  # used prediction probability
-        pred_proba_cast = list(map(lambda x: 0 if x < proba_threshold else 1,
-                                   pred_proba[:, 1]))  # casting probability to final true/false classify
-
-        acc = accuracy_score(true_y, pred_proba_cast)
-        recall = recall_score(true_y, pred_proba_cast)
-        precision = precision_score(true_y, pred_proba_cast)
-        acc_slide_proba_cut.append(acc)
-        recall_slide_proba_cut.append(recall)
-        precision_slide_proba_cut.append(precision)
-        # print("acc, recall, precision extracted by prediction probability casting threshold {}".format(proba_threshold))
-        # print(acc, recall, precision)
+    proba_cut = np.arange(0.05, 0.65, 0.05)
+
+    # scoring test set once, metrics of all thresholds are derived from sorted scores
+    print("prediction probability")
+    pred_proba, true_y = exp_flow.batch_pred_prob_test_dataset()  # used prediction probability
+    threshold_sweep = ThresholdSweep(pred_proba[:, 1], true_y)
+    metrics = threshold_sweep.get_metrics(proba_cut)
+
+    acc_slide_proba_cut = metrics['accuracy']
+    recall_slide_proba_cut = metrics['recall']
+    precision_slide_proba_cut = metrics['precision']
+    # print("acc, recall, precision extracted by prediction probability casting threshold")
+    # print(acc_slide_proba_cut, recall_slide_proba_cut, precision_slide_proba_cut)
 
     plot = TrendPlot()
     plot.plot_trend(proba_cut, acc_slide_proba_cut, label="acc")
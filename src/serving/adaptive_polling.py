@@ -0,0 +1,89 @@
+class AdaptivePollingController:
+    """
+    Adaptive polling controller for kafka consumer loop.
+
+    * Backlog: while polling returns records, poll again right away with a short timeout,
+      so the backlog is drained as fast as training keeps up.
+    * Idle: when polling returns nothing, the poll timeout (long polling, returns as soon as data arrives)
+      grows exponentially up to `max_poll_timeout_ms`. No unconditional sleep in the loop.
+    * `max_records` of each poll is bounded by measured training cost per event,
+      so one polling batch takes about `target_batch_time_sec` to train.
+    """
+
+    def __init__(self, target_batch_time_sec=0.5, min_records=10, max_records=10000,
+                 busy_poll_timeout_ms=10, min_idle_poll_timeout_ms=100, max_poll_timeout_ms=1000,
+                 smoothing_factor=0.2):
+        """
+        :param target_batch_time_sec: expected training time of one polling batch
+        :param min_records: lower bound of max_records
+        :param max_records: upper bound of max_records
+        :param busy_poll_timeout_ms: poll timeout while there is backlog
+        :param min_idle_poll_timeout_ms: first poll timeout after topic becomes idle
+        :param max_poll_timeout_ms: upper bound of poll timeout while topic is idle
+        :param smoothing_factor: weight of latest measurement in exponential moving average
+        """
+        self._target_batch_time_sec = target_batch_time_sec
+        self._min_records = min_records
+        self._max_records = max_records
+        self._busy_poll_timeout_ms = busy_poll_timeout_ms
+        self._min_idle_poll_timeout_ms = min_idle_poll_timeout_ms
+        self._max_poll_timeout_ms = max_poll_timeout_ms
+        self._smoothing_factor = smoothing_factor
+
+        self._cost_per_event_sec = None
+        self._poll_timeout_ms = busy_poll_timeout_ms
+
+    def get_max_records(self) -> int:
+        """
+        max records for next poll, based on measured training cost
+        :return: int
+        """
+        if self._cost_per_event_sec is None or self._cost_per_event_sec <= 0:
+            return self._min_records
+        n_records = int(self._target_batch_time_sec / self._cost_per_event_sec)
+        return max(self._min_records, min(self._max_records, n_records))
+
+    def get_poll_timeout_ms(self) -> int:
+        return self._poll_timeout_ms
+
+    def get_cost_per_event_sec(self):
+        return self._cost_per_event_sec
+
+    def record_polling(self, n_records: int, training_time_sec: float):
+        """
+        updating controller state after one polling batch is trained
+        :param n_records: #records returned by poll
+        :param training_time_sec: time spent on training this batch
+        :return:
+        """
+        if n_records == 0:
+            # topic is idle, back off
+            if self._poll_timeout_ms <= self._busy_poll_timeout_ms:
+                self._poll_timeout_ms = self._min_idle_poll_timeout_ms
+            else:
+                self._poll_timeout_ms = min(self._max_poll_timeout_ms, self._poll_timeout_ms * 2)
+            return
+
+        self._poll_timeout_ms = self._busy_poll_timeout_ms
+        cost_per_event_sec = training_time_sec / n_records
+        if self._cost_per_event_sec is None:
+            self._cost_per_event_sec = cost_per_event_sec
+        else:
+            self._cost_per_event_sec = self._smoothing_factor * cost_per_event_sec + \
+                                       (1 - self._smoothing_factor) * self._cost_per_event_sec
+
+
+def get_consumer_lag(kafka_consumer) -> dict:
+    """
+    consumer lag (end offset - current position) per assigned partition.
+    empty dict if consumer does not support offset lookup (e.g. stand-in consumer) or no partition assigned.
+    :param kafka_consumer: KafkaConsumer
+    :return: {TopicPartition: lag}
+    """
+    if not (hasattr(kafka_consumer, 'assignment') and hasattr(kafka_consumer, 'end_offsets')):
+        return {}
+    partitions = kafka_consumer.assignment()
+    if not partitions:
+        return {}
+    end_offsets = kafka_consumer.end_offsets(list(partitions))
+    return {tp: end_offsets[tp] - kafka_consumer.position(tp) for tp in partitions}
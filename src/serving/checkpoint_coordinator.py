@@ -0,0 +1,252 @@
+import os
+import pickle
+import time
+import traceback
+
+
+class ModelCheckpoint:
+    """
+    Model and the consumer offsets it has been trained up to.
+    `offsets` maps (topic, partition) to the next offset to consume.
+    `metrics` are the metrics of the model at the checkpoint, e.g. prequential accuracy.
+    """
+
+    # checkpoint saved before metrics were recorded
+    metrics = None
+
+    def __init__(self, model, offsets: dict, trained_event_counter: int, saved_time: float, metrics: dict = None):
+        self.model = model
+        self.offsets = offsets
+        self.trained_event_counter = trained_event_counter
+        self.saved_time = saved_time
+        self.metrics = metrics if metrics is not None else {}
+
+
+def _build_commit_offsets(offsets: dict) -> dict:
+    from kafka import TopicPartition
+    from kafka.structs import OffsetAndMetadata
+
+    commit_offsets = {}
+    for (topic, partition), offset in offsets.items():
+        try:
+            offset_and_metadata = OffsetAndMetadata(offset, '')
+        except TypeError:
+            # kafka-python >= 2.1 carries leader epoch in OffsetAndMetadata
+            offset_and_metadata = OffsetAndMetadata(offset, '', -1)
+        commit_offsets[TopicPartition(topic, partition)] = offset_and_metadata
+    return commit_offsets
+
+
+def _get_committed_offset(kafka_consumer, tp):
+    """
+    :return: offset committed by the consumer group for the partition, None if not available
+    """
+    if not hasattr(kafka_consumer, 'committed'):
+        return None
+    committed = kafka_consumer.committed(tp)
+    # kafka-python returns offset, or OffsetAndMetadata in some versions
+    return getattr(committed, 'offset', committed)
+
+
+class CheckpointCoordinator:
+    """
+    Coordinating model checkpoint and kafka offset commit.
+
+    Offsets of trained records are tracked by the training thread, a checkpoint writes the model together
+    with these offsets into one file (temp file + atomic rename), then commits the same offsets to kafka.
+    The checkpoint file is the source of truth on restart: consumer seeks to the checkpointed offsets,
+    so only the events after the checkpoint are replayed, no event is lost or trained twice in the model.
+
+    When partitions are revoked by a rebalance, the checkpoint is saved first and the revoked partitions are
+    released, only partitions assigned to the consumer are committed, so this consumer never moves back
+    the committed offset of a partition consumed by another member of the group.
+
+    Kafka consumer is not thread safe, all methods taking the consumer must be called from the consumer thread.
+    """
+
+    def __init__(self, checkpoint_dir: str, checkpoint_file_name='trainer_checkpoint.pickle',
+                 checkpoint_interval_events=5000, checkpoint_interval_sec=60):
+        """
+        :param checkpoint_dir: folder to keep checkpoint file
+        :param checkpoint_file_name: checkpoint file name
+        :param checkpoint_interval_events: checkpoint after this many events trained since last checkpoint
+        :param checkpoint_interval_sec: checkpoint after this many seconds since last checkpoint (if any event trained)
+        """
+        if checkpoint_dir[-1] != '/':
+            checkpoint_dir += '/'
+        self._checkpoint_path = checkpoint_dir + checkpoint_file_name
+        self._checkpoint_interval_events = checkpoint_interval_events
+        self._checkpoint_interval_sec = checkpoint_interval_sec
+
+        self._tracked_offsets = {}
+        self._checkpoint_offsets = {}
+        self._n_events_since_checkpoint = 0
+        self._last_checkpoint_time = time.time()
+        self._last_checkpoint_info = None
+
+    @property
+    def checkpoint_path(self):
+        return self._checkpoint_path
+
+    def get_tracked_offsets(self) -> dict:
+        return dict(self._tracked_offsets)
+
+    def get_checkpoint_offsets(self) -> dict:
+        return dict(self._checkpoint_offsets)
+
+    def get_last_checkpoint_info(self):
+        """
+        offsets, trained event counter, metrics and saved time of the last checkpoint saved or loaded by this
+        coordinator, kept in memory so other threads can check for a new checkpoint without reading the file
+        :return: ModelCheckpoint without model, None if no checkpoint saved or loaded yet
+        """
+        return self._last_checkpoint_info
+
+    def _keep_checkpoint_info(self, checkpoint: ModelCheckpoint):
+        self._last_checkpoint_info = ModelCheckpoint(
+            model=None,
+            offsets=dict(checkpoint.offsets),
+            trained_event_counter=checkpoint.trained_event_counter,
+            saved_time=checkpoint.saved_time,
+            metrics=checkpoint.metrics
+        )
+
+    def track_records(self, records, n_events=None):
+        """
+        recording offsets of trained records, should be called after the records are trained
+        :param records: consumer records (with topic, partition, offset)
+        :param n_events: number of trained events, default number of records
+        :return:
+        """
+        n_records = 0
+        for record in records:
+            key = (record.topic, record.partition)
+            next_offset = record.offset + 1
+            if next_offset > self._tracked_offsets.get(key, -1):
+                self._tracked_offsets[key] = next_offset
+            n_records += 1
+        self._n_events_since_checkpoint += n_records if n_events is None else n_events
+
+    def release_partitions(self, partitions):
+        """
+        forgetting offsets of partitions revoked from the consumer, should be called after saving checkpoint
+        in on_partitions_revoked
+        :param partitions: revoked TopicPartition list
+        :return:
+        """
+        for tp in partitions:
+            self._tracked_offsets.pop((tp.topic, tp.partition), None)
+            self._checkpoint_offsets.pop((tp.topic, tp.partition), None)
+
+    def is_checkpoint_due(self) -> bool:
+        if self._n_events_since_checkpoint == 0:
+            return False
+        if self._n_events_since_checkpoint >= self._checkpoint_interval_events:
+            return True
+        return time.time() - self._last_checkpoint_time >= self._checkpoint_interval_sec
+
+    def save_checkpoint(self, model, trained_event_counter: int, kafka_consumer=None,
+                        metrics: dict = None) -> ModelCheckpoint:
+        """
+        writing model and tracked offsets into checkpoint file atomically, then committing offsets to kafka.
+        if process crashes between them, restart still resumes from offsets in checkpoint file.
+        :param model: model to checkpoint, must not be mutated during the call
+        :param trained_event_counter: trained event counter of the model
+        :param kafka_consumer: consumer to commit offsets of its assigned partitions,
+                               skipped if None or consumer can not commit
+        :param metrics: metrics of the model at this checkpoint
+        :return: ModelCheckpoint
+        """
+        checkpoint = ModelCheckpoint(
+            model=model,
+            offsets=dict(self._tracked_offsets),
+            trained_event_counter=trained_event_counter,
+            saved_time=time.time(),
+            metrics=metrics
+        )
+
+        temp_path = self._checkpoint_path + '.tmp'
+        with open(temp_path, 'wb') as out_file:
+            pickle.dump(checkpoint, out_file)
+            out_file.flush()
+            os.fsync(out_file.fileno())
+        os.replace(temp_path, self._checkpoint_path)
+
+        self._checkpoint_offsets = checkpoint.offsets
+        self._n_events_since_checkpoint = 0
+        self._last_checkpoint_time = checkpoint.saved_time
+        self._keep_checkpoint_info(checkpoint)
+
+        if kafka_consumer is not None and hasattr(kafka_consumer, 'commit'):
+            self._commit_assigned_offsets(kafka_consumer, checkpoint.offsets)
+        return checkpoint
+
+    @staticmethod
+    def _commit_assigned_offsets(kafka_consumer, offsets: dict):
+        if hasattr(kafka_consumer, 'assignment'):
+            assigned = {(tp.topic, tp.partition) for tp in kafka_consumer.assignment()}
+            offsets = {key: offset for key, offset in offsets.items() if key in assigned}
+        if len(offsets) > 0:
+            try:
+                kafka_consumer.commit(_build_commit_offsets(offsets))
+            except Exception:
+                # checkpoint file is already durable, committed offset in kafka is only for lag monitoring
+                print("Failed to commit offsets of checkpoint to kafka")
+                print(traceback.format_exc())
+
+    def read_checkpoint(self):
+        """
+        reading checkpoint file without restoring tracked offsets,
+        the model in it is a copy as of the checkpoint, safe to use from any thread.
+        :return: ModelCheckpoint, None if checkpoint not found
+        """
+        if not os.path.isfile(self._checkpoint_path):
+            return None
+        try:
+            with open(self._checkpoint_path, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            print("Checkpoint {} is broken, ignore it".format(self._checkpoint_path))
+            print(traceback.format_exc())
+            return None
+
+    def load_checkpoint(self):
+        """
+        loading checkpoint file, tracked offsets are restored from it
+        :return: ModelCheckpoint, None if checkpoint not found
+        """
+        checkpoint = self.read_checkpoint()
+        if checkpoint is None:
+            return None
+
+        self._tracked_offsets = dict(checkpoint.offsets)
+        self._checkpoint_offsets = dict(checkpoint.offsets)
+        self._n_events_since_checkpoint = 0
+        self._last_checkpoint_time = time.time()
+        self._keep_checkpoint_info(checkpoint)
+        return checkpoint
+
+    def seek_assigned_partitions(self, kafka_consumer, partitions):
+        """
+        seeking assigned partitions to the offsets the model has been trained up to
+        (checkpointed offsets right after restart), partitions never tracked are left as is
+        (committed offset or auto_offset_reset of the consumer).
+        A partition committed beyond the tracked offset has been consumed by another member of the group
+        after this checkpoint, it is left at the committed offset so those rows are not trained twice.
+        :param kafka_consumer: consumer
+        :param partitions: assigned TopicPartition list
+        :return:
+        """
+        for tp in partitions:
+            key = (tp.topic, tp.partition)
+            offset = self._tracked_offsets.get(key)
+            if offset is None:
+                continue
+            committed_offset = _get_committed_offset(kafka_consumer, tp)
+            if committed_offset is not None and committed_offset > offset:
+                print("{}-{} is committed at {} by other consumer, checkpointed offset {} is stale".format(
+                    tp.topic, tp.partition, committed_offset, offset))
+                self._tracked_offsets.pop(key)
+                continue
+            print("resume {}-{} from offset {}".format(tp.topic, tp.partition, offset))
+            kafka_consumer.seek(tp, offset)
@@ -0,0 +1,78 @@
+import threading
+import traceback
+
+
+class LatestFigureRenderWorker:
+    """
+    Background figure render worker.
+    Request path submits the data to draw and returns immediately, the worker thread renders it later.
+    Bursts of submissions are coalesced, only the latest pending data is rendered,
+    older pending data is dropped without drawing.
+    """
+
+    def __init__(self, draw_function, name='figure_render_worker'):
+        """
+        :param draw_function: function(*args) -> matplotlib figure, should be created by matplotlib.figure.Figure
+                              instead of pyplot, pyplot is not thread safe.
+        :param name: worker thread name
+        """
+        self.__draw_function = draw_function
+        self.__condition = threading.Condition()
+        self.__pending_job = None
+        self.__is_running = True
+        self.__rendered_cnt = 0
+        self.__dropped_cnt = 0
+
+        self.__thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.__thread.start()
+
+    @property
+    def rendered_cnt(self):
+        return self.__rendered_cnt
+
+    @property
+    def dropped_cnt(self):
+        return self.__dropped_cnt
+
+    def submit(self, save_path_list: list, *draw_args):
+        """
+        submit a render job, replacing the pending job if it is not rendered yet.
+        :param save_path_list: list of path to save the rendered figure
+        :param draw_args: arguments passing to draw function
+        :return:
+        """
+        with self.__condition:
+            if self.__pending_job is not None:
+                self.__dropped_cnt += 1
+            self.__pending_job = (list(save_path_list), draw_args)
+            self.__condition.notify()
+
+    def _run(self):
+        while True:
+            with self.__condition:
+                while self.__pending_job is None and self.__is_running:
+                    self.__condition.wait()
+                if self.__pending_job is None and not self.__is_running:
+                    return
+                save_path_list, draw_args = self.__pending_job
+                self.__pending_job = None
+
+            try:
+                fig = self.__draw_function(*draw_args)
+                for save_path in save_path_list:
+                    fig.savefig(save_path)
+                self.__rendered_cnt += 1
+            except Exception:
+                print("Figure render error")
+                print(traceback.format_exc())
+
+    def stop(self, timeout=None):
+        """
+        stop worker after the pending job is rendered
+        :param timeout: seconds to wait for worker thread
+        :return:
+        """
+        with self.__condition:
+            self.__is_running = False
+            self.__condition.notify()
+        self.__thread.join(timeout)
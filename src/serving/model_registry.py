@@ -0,0 +1,287 @@
+import io
+import json
+import os
+import pickle
+import threading
+import time
+
+
+COMPRESSION_FILE_EXTENSION = {
+    'zstd': '.pickle.zst',
+    'lz4': '.pickle.lz4',
+    'none': '.pickle',
+}
+
+INDEX_FILE_NAME = 'index.json'
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstandard is required for zstd compression, please install zstandard")
+    return zstandard
+
+
+def _import_lz4_frame():
+    try:
+        import lz4.frame
+    except ImportError:
+        raise ImportError("lz4 is required for lz4 compression, please install lz4")
+    return lz4.frame
+
+
+_COMPRESSION_IMPORTERS = {
+    'zstd': _import_zstandard,
+    'lz4': _import_lz4_frame,
+}
+
+
+def is_compression_available(compression: str) -> bool:
+    """
+    :param compression: `zstd`, `lz4` or `none`
+    :return: False if the optional package of the compression is not installed
+    """
+    if compression not in _COMPRESSION_IMPORTERS:
+        return True
+    try:
+        _COMPRESSION_IMPORTERS[compression]()
+    except ImportError:
+        return False
+    return True
+
+
+def get_compression_by_path(path: str) -> str:
+    for compression, file_extension in COMPRESSION_FILE_EXTENSION.items():
+        if compression != 'none' and path.endswith(file_extension):
+            return compression
+    return 'none'
+
+
+def dump_model_file(model, path: str, compression='none', compression_level=3):
+    """
+    pickling model into file, streaming through compressor, the whole pickle is never held in memory
+    :param model: model to save
+    :param path: file path
+    :param compression: `zstd`, `lz4` or `none`
+    :param compression_level: compression level of zstd / lz4
+    :return:
+    """
+    if compression not in COMPRESSION_FILE_EXTENSION:
+        raise ValueError("compression {} is not supported, acceptance: {}".format(
+            compression, list(COMPRESSION_FILE_EXTENSION.keys())))
+
+    if compression == 'zstd':
+        zstandard = _import_zstandard()
+        with open(path, 'wb') as out_file:
+            compressor = zstandard.ZstdCompressor(level=compression_level, threads=-1)
+            with compressor.stream_writer(out_file, closefd=False) as writer:
+                pickle.dump(model, writer, protocol=pickle.HIGHEST_PROTOCOL)
+            out_file.flush()
+            os.fsync(out_file.fileno())
+    elif compression == 'lz4':
+        lz4_frame = _import_lz4_frame()
+        with open(path, 'wb') as out_file:
+            with lz4_frame.open(out_file, mode='wb', compression_level=compression_level) as writer:
+                pickle.dump(model, writer, protocol=pickle.HIGHEST_PROTOCOL)
+            out_file.flush()
+            os.fsync(out_file.fileno())
+    else:
+        with open(path, 'wb') as out_file:
+            pickle.dump(model, out_file, protocol=pickle.HIGHEST_PROTOCOL)
+            out_file.flush()
+            os.fsync(out_file.fileno())
+
+
+def load_model_file(path: str):
+    """
+    loading model file, compression is detected by file extension (`.pickle.zst`, `.pickle.lz4` or plain pickle)
+    :param path: file path
+    :return: model
+    """
+    compression = get_compression_by_path(path)
+    if compression == 'zstd':
+        zstandard = _import_zstandard()
+        with open(path, 'rb') as f:
+            with zstandard.ZstdDecompressor().stream_reader(f) as reader:
+                return pickle.load(io.BufferedReader(reader))
+    if compression == 'lz4':
+        lz4_frame = _import_lz4_frame()
+        with lz4_frame.open(path, mode='rb') as reader:
+            return pickle.load(reader)
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+class ModelVersionInfo:
+    """
+    index entry of one registered model version
+    """
+
+    def __init__(self, version: int, file_name: str, compression: str, file_size: int, registered_time: float,
+                 trained_event_counter=None, metrics=None, offsets=None):
+        self.version = version
+        self.file_name = file_name
+        self.compression = compression
+        self.file_size = file_size
+        self.registered_time = registered_time
+        self.trained_event_counter = trained_event_counter
+        self.metrics = metrics if metrics is not None else {}
+        self.offsets = offsets if offsets is not None else {}
+
+    def to_dict(self) -> dict:
+        return {
+            'version': self.version,
+            'file_name': self.file_name,
+            'compression': self.compression,
+            'file_size': self.file_size,
+            'registered_time': self.registered_time,
+            'trained_event_counter': self.trained_event_counter,
+            'metrics': self.metrics,
+            # json object key must be string, offsets are kept as list of [topic, partition, offset]
+            'offsets': [[topic, partition, offset] for (topic, partition), offset in self.offsets.items()],
+        }
+
+    @staticmethod
+    def from_dict(info: dict):
+        return ModelVersionInfo(
+            version=info['version'],
+            file_name=info['file_name'],
+            compression=info['compression'],
+            file_size=info['file_size'],
+            registered_time=info['registered_time'],
+            trained_event_counter=info.get('trained_event_counter'),
+            metrics=info.get('metrics'),
+            offsets={(topic, partition): offset for topic, partition, offset in info.get('offsets', [])}
+        )
+
+
+class ModelRegistry:
+    """
+    Versioned model store on local file system.
+
+    Each registered model gets a monotonically increasing version and is written as one compressed pickle file
+    `model_v{version}.pickle.zst` (temp file + atomic rename). `index.json` keeps the versions with
+    trained event counter, metrics and kafka offsets, so the latest version is looked up without listing
+    or unpickling any model file. Versions beyond `max_versions` are removed, oldest first.
+    """
+
+    def __init__(self, registry_dir: str, compression='zstd', compression_level=3, max_versions=10):
+        """
+        :param registry_dir: folder of registry, created if not exist
+        :param compression: `zstd`, `lz4` or `none`, falls back to `none` if the compression package is not installed
+        :param compression_level: compression level, low level (fast) is preferred for frequent snapshots
+        :param max_versions: number of versions to keep, None for no limit
+        """
+        if compression not in COMPRESSION_FILE_EXTENSION:
+            raise ValueError("compression {} is not supported, acceptance: {}".format(
+                compression, list(COMPRESSION_FILE_EXTENSION.keys())))
+        if not is_compression_available(compression):
+            print("Warning: package of {} compression is not installed, model registry saves plain pickle".format(
+                compression))
+            compression = 'none'
+        if registry_dir[-1] != '/':
+            registry_dir += '/'
+        os.makedirs(registry_dir, exist_ok=True)
+
+        self._registry_dir = registry_dir
+        self._compression = compression
+        self._compression_level = compression_level
+        self._max_versions = max_versions
+        self._lock = threading.Lock()
+        self._versions = self._read_index()
+
+    @property
+    def registry_dir(self):
+        return self._registry_dir
+
+    def _read_index(self) -> list:
+        index_path = self._registry_dir + INDEX_FILE_NAME
+        if not os.path.isfile(index_path):
+            return []
+        with open(index_path, 'r') as f:
+            return [ModelVersionInfo.from_dict(info) for info in json.load(f)['versions']]
+
+    def _write_index(self):
+        index_path = self._registry_dir + INDEX_FILE_NAME
+        temp_path = index_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'versions': [info.to_dict() for info in self._versions]}, f, indent=2)
+        os.replace(temp_path, index_path)
+
+    def register(self, model, trained_event_counter=None, metrics: dict = None, offsets: dict = None) -> int:
+        """
+        saving model as a new version
+        :param model: model to save
+        :param trained_event_counter: number of events the model has trained
+        :param metrics: metrics of the model, e.g. {'accuracy': 0.8}
+        :param offsets: kafka offsets the model has trained up to, {(topic, partition): offset}
+        :return: version
+        """
+        with self._lock:
+            version = self._versions[-1].version + 1 if len(self._versions) > 0 else 1
+            file_name = 'model_v{}{}'.format(version, COMPRESSION_FILE_EXTENSION[self._compression])
+            model_path = self._registry_dir + file_name
+            temp_path = model_path + '.tmp'
+
+            dump_model_file(model, temp_path, self._compression, self._compression_level)
+            os.replace(temp_path, model_path)
+
+            self._versions.append(ModelVersionInfo(
+                version=version,
+                file_name=file_name,
+                compression=self._compression,
+                file_size=os.path.getsize(model_path),
+                registered_time=time.time(),
+                trained_event_counter=trained_event_counter,
+                metrics=metrics,
+                offsets=offsets
+            ))
+            self._apply_retention()
+            self._write_index()
+            return version
+
+    def _apply_retention(self):
+        if self._max_versions is None:
+            return
+        while len(self._versions) > self._max_versions:
+            outdated = self._versions.pop(0)
+            try:
+                os.remove(self._registry_dir + outdated.file_name)
+            except FileNotFoundError:
+                pass
+
+    def list_versions(self) -> list:
+        with self._lock:
+            return list(self._versions)
+
+    def get_latest_version_info(self):
+        """
+        :return: ModelVersionInfo of latest version, None if registry is empty
+        """
+        with self._lock:
+            return self._versions[-1] if len(self._versions) > 0 else None
+
+    def get_version_info(self, version: int):
+        with self._lock:
+            for info in self._versions:
+                if info.version == version:
+                    return info
+        raise KeyError("model version {} not found in registry {}".format(version, self._registry_dir))
+
+    def get_model_path(self, version: int = None) -> str:
+        """
+        :param version: model version, latest version if None
+        :return: file path of the model version
+        """
+        info = self.get_latest_version_info() if version is None else self.get_version_info(version)
+        if info is None:
+            raise FileNotFoundError("no model registered in {}".format(self._registry_dir))
+        return self._registry_dir + info.file_name
+
+    def load(self, version: int = None):
+        """
+        :param version: model version, latest version if None
+        :return: model
+        """
+        return load_model_file(self.get_model_path(version))
@@ -0,0 +1,239 @@
+import abc
+import copy
+import os
+import pickle
+import struct
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+
+# blocks created by publisher of this process, registration of them is owned by the publisher
+_created_block_names = set()
+
+
+def _new_generation() -> int:
+    """
+    random non-zero id of a publisher instance, versions restart from 1 in each generation
+    """
+    return int.from_bytes(os.urandom(8), 'little') or 1
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    attaching an existing shared memory block without owning it.
+    Before python 3.13 attaching registers the block to resource_tracker as well,
+    which unlinks the block of publisher when the subscriber process exits.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    if shm.name not in _created_block_names:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+class ModelSnapshot:
+    """
+    Immutable, versioned snapshot of model published by trainer.
+    The model inside a snapshot is never updated by trainer after publishing (copy-on-write),
+    serving side can use it without any lock.
+    `generation` identifies the publisher instance, a restarted trainer publishes versions from 1 again
+    in a new generation, so a snapshot is identified by (generation, version).
+    """
+
+    __slots__ = ('_version', '_model', '_published_time', '_generation')
+
+    def __init__(self, version: int, model, published_time: float, generation: int = 0):
+        self._version = version
+        self._model = model
+        self._published_time = published_time
+        self._generation = generation
+
+    @property
+    def version(self):
+        return self._version
+
+    @property
+    def generation(self):
+        return self._generation
+
+    @property
+    def model(self):
+        return self._model
+
+    @property
+    def published_time(self):
+        return self._published_time
+
+
+class ModelSnapshotChannel(abc.ABC):
+    """
+    Abstraction of model handoff channel between trainer (single publisher) and serving (subscriber).
+    """
+
+    @abc.abstractmethod
+    def publish(self, model) -> int:
+        """
+        publish a new model snapshot, return the version of published snapshot
+        :param model: model to publish, channel takes a copy of it.
+        :return: version
+        """
+        pass
+
+    @abc.abstractmethod
+    def get_latest_snapshot(self) -> ModelSnapshot:
+        """
+        get latest published snapshot, None if nothing published yet
+        :return: ModelSnapshot
+        """
+        pass
+
+    def get_latest_version(self) -> int:
+        snapshot = self.get_latest_snapshot()
+        if snapshot is None:
+            return 0
+        return snapshot.version
+
+
+class InProcessModelSnapshotChannel(ModelSnapshotChannel):
+    """
+    Model handoff within the same process (trainer thread and serving thread).
+    Publishing deep copies the model, subscriber swaps in the new snapshot by reference assignment.
+    """
+
+    def __init__(self):
+        self.__publish_lock = threading.Lock()
+        self.__generation = _new_generation()
+        self.__version = 0
+        self.__latest_snapshot = None
+
+    def publish(self, model) -> int:
+        model_copy = copy.deepcopy(model)
+        with self.__publish_lock:
+            self.__version += 1
+            # reference assignment is atomic, reader sees either old or new snapshot
+            self.__latest_snapshot = ModelSnapshot(self.__version, model_copy, time.time(), self.__generation)
+            return self.__version
+
+    def get_latest_snapshot(self) -> ModelSnapshot:
+        return self.__latest_snapshot
+
+
+class SharedMemoryModelSnapshotChannel(ModelSnapshotChannel):
+    """
+    Model handoff across processes through a named shared memory block, no file system involved.
+    Single writer, multiple readers, consistency is guarded by a sequence lock in the header:
+    writer makes sequence odd while writing, reader retries if sequence changed during copying.
+
+    Each creator writes a new random generation into the header. Subscriber checks the block of the same name
+    every `reattach_interval_sec`, and re-attaches if it carries another generation, e.g. the trainer restarted
+    and the block it was attached to is unlinked.
+
+    memory layout: | sequence (Q) | generation (Q) | version (Q) | payload length (Q) | published time (d) |
+                   | payload ... |
+    """
+
+    _HEADER_FORMAT = 'QQQQd'
+    _HEADER_SIZE = struct.calcsize(_HEADER_FORMAT)
+
+    def __init__(self, name='onlineml_model_snapshot', size=256 * 1024 * 1024, create=False,
+                 reattach_interval_sec=5.0):
+        """
+        :param name: shared memory block name
+        :param size: capacity in bytes, only used by creator
+        :param create: True for trainer(publisher) side, False for serving(subscriber) side
+        :param reattach_interval_sec: interval of subscriber checking the generation of the block, None to disable
+        """
+        if create:
+            try:
+                self.__shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            except FileExistsError:
+                self.__shm = shared_memory.SharedMemory(name=name)
+            _created_block_names.add(self.__shm.name)
+            # block left by a previous trainer is reused, its subscribers see the new generation
+            struct.pack_into(self._HEADER_FORMAT, self.__shm.buf, 0, 0, _new_generation(), 0, 0, 0.0)
+        else:
+            self.__shm = _attach_shared_memory(name)
+
+        self.__name = name
+        self.__is_creator = create
+        self.__reattach_interval_sec = reattach_interval_sec
+        self.__last_reattach_check_time = time.time()
+        self.__publish_lock = threading.Lock()
+        self.__cached_snapshot = None
+
+    def _read_header(self):
+        return struct.unpack_from(self._HEADER_FORMAT, self.__shm.buf, 0)
+
+    def get_generation(self) -> int:
+        return self._read_header()[1]
+
+    def _reattach_if_regenerated(self):
+        """
+        subscriber side, attaching the block currently behind the name if it is of another generation
+        :return:
+        """
+        if self.__is_creator or self.__reattach_interval_sec is None \
+                or time.time() - self.__last_reattach_check_time < self.__reattach_interval_sec:
+            return
+        self.__last_reattach_check_time = time.time()
+        try:
+            shm = _attach_shared_memory(self.__name)
+        except FileNotFoundError:
+            # trainer is down, keep serving the last snapshot
+            return
+        if struct.unpack_from(self._HEADER_FORMAT, shm.buf, 0)[1] == self.get_generation():
+            shm.close()
+            return
+        print("Model snapshot channel {} is recreated by trainer, re-attach".format(self.__name))
+        self.__shm.close()
+        self.__shm = shm
+
+    def publish(self, model) -> int:
+        payload = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+        if self._HEADER_SIZE + len(payload) > self.__shm.size:
+            raise ValueError("model snapshot {} bytes exceeds shared memory capacity {} bytes".format(
+                len(payload), self.__shm.size - self._HEADER_SIZE))
+
+        with self.__publish_lock:
+            sequence, _, version, _, _ = self._read_header()
+            buf = self.__shm.buf
+            # mark writing
+            struct.pack_into('Q', buf, 0, sequence + 1)
+            buf[self._HEADER_SIZE:self._HEADER_SIZE + len(payload)] = payload
+            struct.pack_into('QQd', buf, 16, version + 1, len(payload), time.time())
+            # mark done
+            struct.pack_into('Q', buf, 0, sequence + 2)
+            return version + 1
+
+    def get_latest_snapshot(self, max_retry=100) -> ModelSnapshot:
+        self._reattach_if_regenerated()
+        for _ in range(max_retry):
+            sequence, generation, version, length, published_time = self._read_header()
+            if version == 0:
+                return None
+            if sequence % 2 == 1:
+                # writer is writing
+                time.sleep(0.001)
+                continue
+            if self.__cached_snapshot is not None and self.__cached_snapshot.generation == generation \
+                    and self.__cached_snapshot.version == version:
+                return self.__cached_snapshot
+
+            payload = bytes(self.__shm.buf[self._HEADER_SIZE:self._HEADER_SIZE + length])
+            if self._read_header()[0] != sequence:
+                continue
+
+            self.__cached_snapshot = ModelSnapshot(version, pickle.loads(payload), published_time, generation)
+            return self.__cached_snapshot
+
+        print("Can not get consistent model snapshot from shared memory, keep previous snapshot")
+        return self.__cached_snapshot
+
+    def close(self):
+        self.__shm.close()
+        if self.__is_creator:
+            _created_block_names.discard(self.__shm.name)
+            self.__shm.unlink()
@@ -10,28 +10,109 @@ from datetime import datetime
 import pandas as pd
 
 from kafka import KafkaConsumer
+from kafka import ConsumerRebalanceListener
 
 from river import ensemble
 from river import tree
 
 from concurrent import futures
 
-from tools.tree_structure_inspector import HoeffdingEnsembleTreeInspector
+from tools.tree_structure_inspector import IncrementalTreeStructureRenderer
+from tools.message_codec import decode_consumer_record, decode_consumer_records_to_frame
+from tools.sharded_ensemble import ShardedBaggingClassifier
+from tools.streaming_metrics import ConfusionMatrixCounter
+from serving.adaptive_polling import AdaptivePollingController, get_consumer_lag
+from serving.checkpoint_coordinator import CheckpointCoordinator
+from serving.model_registry import ModelRegistry, load_model_file
+from serving.model_snapshot import SharedMemoryModelSnapshotChannel
+
+
+class _CheckpointRebalanceListener(ConsumerRebalanceListener):
+    """
+    checkpointing and releasing partitions before they are revoked, seeking assigned partitions to checkpointed
+    offsets.
+    called inside poll, i.e. in the training thread.
+    """
+
+    def __init__(self, server):
+        self._server = server
+
+    def on_partitions_revoked(self, revoked):
+        self._server._save_checkpoint()
+        self._server._release_partitions(revoked)
+
+    def on_partitions_assigned(self, assigned):
+        self._server._seek_to_checkpoint(assigned)
 
 
 class OnlineMachineLearningServer:
 
-    def __init__(self):
+    def __init__(self, model_snapshot_channel=None, ensemble_n_workers=0, kafka_consumer=None,
+                 polling_controller=None, checkpoint_coordinator: CheckpointCoordinator = None,
+                 model_registry: ModelRegistry = None, snapshot_publish_interval_sec=5.0,
+                 prequential_metrics=False):
+        """
+        :param model_snapshot_channel: optional ModelSnapshotChannel, if provided, updated model is handed off
+                                       to serving through the channel instead of pickle file and load model api.
+        :param ensemble_n_workers: 0 to train the AdaBoost ensemble serially in the training thread (default),
+                                   > 0 to initialize an online bagging ensemble with members sharded
+                                   across `ensemble_n_workers` processes.
+        :param kafka_consumer: optional consumer instance (e.g. in-memory stand-in for benchmark),
+                               a KafkaConsumer subscribing `testTopic` is created if not provided.
+        :param polling_controller: optional AdaptivePollingController of polling modes, default one if not provided.
+        :param checkpoint_coordinator: optional CheckpointCoordinator, if provided, auto commit is disabled,
+                                       model is checkpointed together with consumed offsets
+                                       and training resumes from the checkpoint on startup.
+        :param model_registry: optional ModelRegistry, if provided, persist thread registers a new compressed
+                               model version instead of overwriting `testing_hoeffding_tree.pickle`.
+        :param snapshot_publish_interval_sec: min seconds between two model snapshots published by training thread,
+                                              copying the model after every polling batch would stall training.
+        :param prequential_metrics: test-then-train, each event is predicted before it is learned,
+                                    running accuracy / recall / precision / f1 are checkpointed and registered
+                                    with the model. Costs one prediction per event.
+        """
         self.__server_status = None
         self.__model_persisting_process_status = None
         self.__kafka_consumer = None
         self.__model = None
         self.__trained_event_counter = 0
-
-        self._init_kafka_consumer(
-            connection_try_times=3
+        self.__model_snapshot_channel = model_snapshot_channel
+        self.__snapshot_publish_interval_sec = snapshot_publish_interval_sec
+        self.__last_snapshot_publish_time = None
+        self.__has_pending_snapshot = False
+        self.__ensemble_n_workers = ensemble_n_workers
+        self.__polling_controller = polling_controller if polling_controller is not None \
+            else AdaptivePollingController()
+        self.__consumer_lag = None
+        self.__checkpoint_coordinator = checkpoint_coordinator
+        self.__model_registry = model_registry
+        self.__registered_checkpoint_time = None
+        self.__prequential_confusion_matrix = ConfusionMatrixCounter() if prequential_metrics else None
+
+        # tree structure figures are re-rendered only for trees changed since last persist cycle
+        tree_render_pool = futures.ThreadPoolExecutor(2)
+        self.__current_tree_renderer = IncrementalTreeStructureRenderer(
+            "../../output_plot/web_checker_online_display/online_tree_inspection/",
+            "current_tree_structure",
+            render_pool=tree_render_pool
         )
+        self.__historical_tree_renderer = IncrementalTreeStructureRenderer(
+            "../../output_plot/web_checker_historical_check/tree_inspection/",
+            "tree_structure",
+            tree_index=0,
+            timestamped=True,
+            max_kept_files=200,
+            render_pool=tree_render_pool
+        )
+
+        if kafka_consumer is not None:
+            self.__kafka_consumer = kafka_consumer
+        else:
+            self._init_kafka_consumer(
+                connection_try_times=3
+            )
         self._init_model('../../model_store/pretrain_model_persist/')
+        self._publish_model_snapshot(force=True)
 
     @property
     def server_status(self):
@@ -46,6 +127,20 @@ class OnlineMachineLearningServer:
             print("Status {} is not design in the server, set status as unknown".format(status))
 
 
+    def get_model(self):
+        return self.__model
+
+    def get_trained_event_counter(self):
+        return self.__trained_event_counter
+
+    def get_prequential_metrics(self) -> dict:
+        """
+        metrics of predicting each event before learning it, empty if prequential metrics is disabled
+        """
+        if self.__prequential_confusion_matrix is None:
+            return {}
+        return self.__prequential_confusion_matrix.get_metrics()
+
     @property
     def model_persisting_process_status(self):
         return self.__model_persisting_process_status
@@ -60,14 +155,24 @@ class OnlineMachineLearningServer:
 
     def _init_kafka_consumer(self, connection_try_times=3):
         """
-        initializing of kafka consumer
+        initializing of kafka consumer,
+        message value is kept as raw bytes and decoded by the codec negotiated from message header
         :return:
         """
-        self.__kafka_consumer = KafkaConsumer(
-            'testTopic',
-            bootstrap_servers=['localhost:9092'],
-            value_deserializer=lambda m: json.loads(m.decode('utf-8'))
-        )
+        if self.__checkpoint_coordinator is None:
+            self.__kafka_consumer = KafkaConsumer(
+                'testTopic',
+                bootstrap_servers=['localhost:9092']
+            )
+        else:
+            # offsets are committed together with model checkpoint only
+            self.__kafka_consumer = KafkaConsumer(
+                bootstrap_servers=['localhost:9092'],
+                group_id='onlineml_trainer',
+                enable_auto_commit=False,
+                auto_offset_reset='earliest'
+            )
+            self.__kafka_consumer.subscribe(['testTopic'], listener=_CheckpointRebalanceListener(self))
 
     def _init_model(self, load_model_dir: str):
         """
@@ -75,6 +180,17 @@ class OnlineMachineLearningServer:
         :return:
         """
 
+        ''' resume model from checkpoint if exist '''
+        if self.__checkpoint_coordinator is not None:
+            checkpoint = self.__checkpoint_coordinator.load_checkpoint()
+            if checkpoint is not None:
+                self.__model = checkpoint.model
+                self.__trained_event_counter = checkpoint.trained_event_counter
+                self.__model_persisting_process_status = 'flushing'
+                print('resume model from checkpoint {}, offsets: {}'.format(
+                    self.__checkpoint_coordinator.checkpoint_path, checkpoint.offsets))
+                return
+
         ''' load model from pickle if pre-train model exist '''
         if os.path.isdir(load_model_dir):
             print("checking {} for pre-train model".format(load_model_dir))
@@ -85,10 +201,7 @@ class OnlineMachineLearningServer:
                     print('load pre-train model for {} successfully.'.format(pretrain_model_path))
 
                     ''' model structure inspect, saving figure. '''
-                    tree_inspector = HoeffdingEnsembleTreeInspector(self.__model)
-                    tree_inspector.draw_tree(None,
-                                             "../../output_plot/web_checker_online_display/online_tree_inspection/",
-                                             "current_tree_structure")
+                    self.__current_tree_renderer.render_dirty_trees(self.__model)
 
                     ''' notify serving part to load model'''
                     try:
@@ -108,19 +221,27 @@ class OnlineMachineLearningServer:
             '''  In the case that pre-train model not found. initialized model. '''
 
             print('pretrain model file not found! initialize a new model')
-            self.__model = ensemble.AdaBoostClassifier(
-                model=(
-                    tree.HoeffdingAdaptiveTreeClassifier(
-                        max_depth=3,
-                        split_criterion='gini',
-                        split_confidence=1e-2,
-                        grace_period=10,
-                        seed=0
-                    )
-                ),
-                n_models=10,
-                seed=42
+            base_model = tree.HoeffdingAdaptiveTreeClassifier(
+                max_depth=3,
+                split_criterion='gini',
+                split_confidence=1e-2,
+                grace_period=10,
+                seed=0
             )
+            if self.__ensemble_n_workers > 0:
+                # boosting is sequential among members, use bagging to train members in parallel processes
+                self.__model = ShardedBaggingClassifier(
+                    model=base_model,
+                    n_models=10,
+                    n_workers=self.__ensemble_n_workers,
+                    seed=42
+                )
+            else:
+                self.__model = ensemble.AdaBoostClassifier(
+                    model=base_model,
+                    n_models=10,
+                    seed=42
+                )
 
     def _save_model(self, save_file_path='', save_file_name=''):
 
@@ -146,6 +267,106 @@ class OnlineMachineLearningServer:
                 print("Model Persisting Error, can not save model into file {}. Please check!".format(model_persist_file))
 
 
+    def _register_model(self) -> int:
+        """
+        saving a new version of model registry.
+        With checkpoint coordinator, the latest checkpoint is registered: the model copy in it comes with
+        the offsets, trained event counter and metrics recorded by training thread at the same point.
+        New checkpoint is detected by the checkpoint info kept in memory, the checkpoint file is read
+        only once per new checkpoint.
+        Otherwise current model with its trained event counter and prequential metrics.
+        :return: version, None if the latest checkpoint is registered already
+        """
+        if self.__checkpoint_coordinator is not None:
+            checkpoint_info = self.__checkpoint_coordinator.get_last_checkpoint_info()
+            if checkpoint_info is None or checkpoint_info.saved_time == self.__registered_checkpoint_time:
+                return None
+            checkpoint = self.__checkpoint_coordinator.read_checkpoint()
+            if checkpoint is None:
+                return None
+            version = self.__model_registry.register(
+                checkpoint.model,
+                trained_event_counter=checkpoint.trained_event_counter,
+                metrics=checkpoint.metrics,
+                offsets=checkpoint.offsets
+            )
+            self.__registered_checkpoint_time = checkpoint.saved_time
+        else:
+            version = self.__model_registry.register(
+                self.__model,
+                trained_event_counter=self.__trained_event_counter,
+                metrics=self.get_prequential_metrics()
+            )
+        print("Register model version {} at {}".format(
+            version, datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        ))
+        return version
+
+    def _get_tree_render_model(self, model_path):
+        """
+        copy of the model that training thread does not mutate, for tree structure rendering in persist thread:
+        latest published snapshot, otherwise the model file persisted in this cycle
+        :param model_path: model file persisted in this cycle, None if nothing persisted
+        :return: model, None if no copy is available
+        """
+        if self.__model_snapshot_channel is not None:
+            snapshot = self.__model_snapshot_channel.get_latest_snapshot()
+            return snapshot.model if snapshot is not None else None
+        if model_path is not None:
+            return load_model_file(model_path)
+        return None
+
+    def _publish_model_snapshot(self, force=False):
+        """
+        publishing current model to serving through snapshot channel.
+        called from training thread, so the model is not mutated while being copied.
+        Skipped if the last snapshot is published within `snapshot_publish_interval_sec`,
+        the skipped update is kept pending and published by `_publish_pending_model_snapshot`.
+        :param force: publishing regardless of the interval, e.g. initial model and model at stop
+        :return:
+        """
+        if self.__model_snapshot_channel is None or self.__model is None:
+            return
+        now = time.time()
+        if not force and self.__last_snapshot_publish_time is not None \
+                and now - self.__last_snapshot_publish_time < self.__snapshot_publish_interval_sec:
+            self.__has_pending_snapshot = True
+            return
+        self.__last_snapshot_publish_time = now
+        self.__has_pending_snapshot = False
+        try:
+            version = self.__model_snapshot_channel.publish(self.__model)
+            print("\rPublish model snapshot version {}".format(version))
+        except Exception:
+            print(traceback.format_exc())
+
+    def _publish_pending_model_snapshot(self, force=False):
+        """
+        publishing the update skipped by snapshot interval, so serving does not keep an old model
+        while the topic is idle
+        :param force: publishing regardless of the interval, e.g. on an empty poll
+        :return:
+        """
+        if self.__has_pending_snapshot:
+            self._publish_model_snapshot(force=force)
+
+    def _evaluate_before_learning(self, rows: list, y_list: list):
+        """
+        test-then-train, predicting events the model has not learned yet, updating prequential confusion matrix
+        :param rows: features of events
+        :param y_list: labels of events
+        :return:
+        """
+        if self.__prequential_confusion_matrix is None:
+            return
+        try:
+            predict_one = self.__model.predict_one
+            y_pred = [predict_one(x) for x in rows]
+        except Exception:
+            print(traceback.format_exc())
+            return
+        self.__prequential_confusion_matrix.update(y_list, y_pred)
+
     def train_model_by_one_row(self, receive_data: pd.Series, label_name: str):
         """
         Passing row level data from polling block to do model training by line
@@ -155,6 +376,7 @@ class OnlineMachineLearningServer:
         """
         row = pd.Series(receive_data)
         y = row.pop(label_name)
+        self._evaluate_before_learning([row], [y])
 
         '''model training => learn one
         '''
@@ -186,16 +408,183 @@ class OnlineMachineLearningServer:
         for record in polling_batch_data:
             '''Row level data extraction
             '''
-            receive_data = record.value
-            self.train_model_by_one_row(receive_data, label_name=label_name)
+            for receive_data in decode_consumer_record(record):
+                self.train_model_by_one_row(receive_data, label_name=label_name)
 
         # Model has been updated
         self.__model_persisting_process_status = 'flushing'
         print('labeling model persisting status on')
+        self._publish_model_snapshot()
+
+    @staticmethod
+    def _decode_polling_batch(polling_batch_data, label_name) -> (pd.DataFrame, pd.Series):
+        """
+        Decoding all records of one polling block into a single columnar block.
+        Constructing one DataFrame per polling instead of one pd.Series per record.
+        :param polling_batch_data: list of consumer records
+        :param label_name: label name to pop
+        :return: features dataframe, label series
+        """
+        batch_df = decode_consumer_records_to_frame(polling_batch_data)
+        if label_name not in batch_df.columns:
+            raise KeyError("label {} not found in polling batch".format(label_name))
+        batch_df.dropna(subset=[label_name], inplace=True)
+        batch_y = batch_df.pop(label_name)
+        return batch_df, batch_y
+
+    def train_model_by_columnar_polling_batch(self, polling_batch_data, label_name):
+        """
+        Columnar version of train_model_by_one_polling_batch.
+        Whole polling block is decoded at once, then the model is updated by `learn_many`
+        if the estimator supports it, otherwise by iterating plain dict rows with `learn_one`.
+        :param polling_batch_data: 1 block of polling
+        :param label_name: label name to pop
+        :return:
+        """
+        if len(polling_batch_data) == 0:
+            return
+
+        try:
+            batch_x, batch_y = self._decode_polling_batch(polling_batch_data, label_name)
+        except Exception:
+            print(traceback.format_exc())
+            return
 
+        rows = None
+        if self.__prequential_confusion_matrix is not None:
+            rows = batch_x.to_dict(orient='records')
+            self._evaluate_before_learning(rows, batch_y.tolist())
+
+        start_time = time.time()
+        try:
+            if hasattr(self.__model, 'learn_many'):
+                self.__model.learn_many(batch_x, batch_y)
+            else:
+                if rows is None:
+                    rows = batch_x.to_dict(orient='records')
+                learn_one = self.__model.learn_one
+                for x, y in zip(rows, batch_y.tolist()):
+                    learn_one(x, y)
+        except Exception:
+            print(traceback.format_exc())
+        end_time = time.time()
+
+        n_event = len(batch_y)
+        self.__trained_event_counter += n_event
+
+        print(
+            '\r #{} Events Trained, batch of {} events time spend:{} milliseconds'.format(
+                self.__trained_event_counter, n_event, (end_time - start_time) * 1000),
+            end='',
+            flush=True
+        )
+
+        # Model has been updated
+        self.__model_persisting_process_status = 'flushing'
+        self._publish_model_snapshot()
+
+
+    def _save_checkpoint(self):
+        """
+        checkpointing model with consumed offsets, must be called from training thread
+        :return:
+        """
+        if self.__checkpoint_coordinator is None or self.__model is None:
+            return
+        try:
+            checkpoint = self.__checkpoint_coordinator.save_checkpoint(
+                self.__model,
+                self.__trained_event_counter,
+                kafka_consumer=self.__kafka_consumer,
+                metrics=self.get_prequential_metrics()
+            )
+            print("\rCheckpoint model at offsets {}".format(checkpoint.offsets))
+        except Exception:
+            print("Model checkpoint Error, can not save checkpoint {}".format(
+                self.__checkpoint_coordinator.checkpoint_path))
+            print(traceback.format_exc())
+
+    def _release_partitions(self, partitions):
+        if self.__checkpoint_coordinator is not None:
+            self.__checkpoint_coordinator.release_partitions(partitions)
+
+    def _seek_to_checkpoint(self, partitions):
+        if self.__checkpoint_coordinator is not None:
+            self.__checkpoint_coordinator.seek_assigned_partitions(self.__kafka_consumer, partitions)
+
+    def _track_trained_records(self, records):
+        """
+        tracking offsets of trained records, checkpointing if it is due
+        :param records: trained consumer records
+        :return:
+        """
+        if self.__checkpoint_coordinator is None:
+            return
+        self.__checkpoint_coordinator.track_records(records)
+        if self.__checkpoint_coordinator.is_checkpoint_due():
+            self._save_checkpoint()
+
+    def get_consumer_lag(self) -> int:
+        """
+        total consumer lag of assigned partitions, None if lag is not available
+        :return:
+        """
+        try:
+            partition_lag = get_consumer_lag(self.__kafka_consumer)
+        except Exception:
+            print("Failed to fetch consumer lag")
+            print(traceback.format_exc())
+            return None
+        if len(partition_lag) == 0:
+            return None
+        return sum(partition_lag.values())
+
+    def _run_adaptive_polling_loop(self, train_polling_result, lag_report_interval_sec=10):
+        """
+        Polling loop without fixed sleep.
+        Polling again right away while there is backlog, backing off (longer poll timeout) only when topic is idle.
+        max_records of each poll is bounded by measured training cost, consumer lag is reported periodically.
+        :param train_polling_result: function(data_polling_result) training one polling result
+        :param lag_report_interval_sec: interval of consumer lag report
+        :return:
+        """
+        last_lag_report_time = time.time()
+        while self.__server_status == 'running':
+            data_polling_result = self.__kafka_consumer.poll(
+                timeout_ms=self.__polling_controller.get_poll_timeout_ms(),
+                max_records=self.__polling_controller.get_max_records(),
+                update_offsets=True
+            )
+            n_records = sum(len(records) for records in data_polling_result.values())
+
+            start_time = time.time()
+            if n_records > 0:
+                train_polling_result(data_polling_result)
+            self.__polling_controller.record_polling(n_records, time.time() - start_time)
+            if n_records > 0:
+                self._track_trained_records(
+                    [record for records in data_polling_result.values() for record in records]
+                )
+            # topic is idle on an empty poll, nothing to stall by copying the model
+            self._publish_pending_model_snapshot(force=n_records == 0)
+
+            if time.time() - last_lag_report_time >= lag_report_interval_sec:
+                last_lag_report_time = time.time()
+                self.__consumer_lag = self.get_consumer_lag()
+                print("\nconsumer lag: {}, next max records: {}, poll timeout: {} ms".format(
+                    self.__consumer_lag,
+                    self.__polling_controller.get_max_records(),
+                    self.__polling_controller.get_poll_timeout_ms()
+                ))
+
+        # stopped, checkpointing what has been trained
+        self._save_checkpoint()
+        self._publish_model_snapshot(force=True)
 
     def stop(self):
         self.__server_status = 'stopped'
+        if isinstance(self.__model, ShardedBaggingClassifier):
+            self.__model.close()
 
 
     def run(self, consumer_run_mode='', label_name=''):
@@ -213,65 +602,78 @@ class OnlineMachineLearningServer:
             '''following block using polling method to do data extraction
             '''
             print("going to consumer kafka consumer in polling mode")
-            while self.__server_status == 'running':
-                data_polling_result = self.__kafka_consumer.poll(
-                    timeout_ms=1000,
-                    max_records=None,
-                    update_offsets=True
-                )
+
+            def train_polling_result(data_polling_result):
                 for key, value in data_polling_result.items():
                     self.train_model_by_one_polling_batch(value, LABEL_NAME)
-                time.sleep(1)
+
+            self._run_adaptive_polling_loop(train_polling_result)
+
+        elif CONSUMER_RUN_MODE == 'batch_polling':
+            '''following block using polling method, records from all partitions of one polling
+            are decoded into one columnar block and trained together
+            '''
+            print("going to consumer kafka consumer in batch polling mode")
+
+            def train_polling_result(data_polling_result):
+                polling_batch_data = [record for records in data_polling_result.values() for record in records]
+                self.train_model_by_columnar_polling_batch(polling_batch_data, LABEL_NAME)
+
+            self._run_adaptive_polling_loop(train_polling_result)
 
         elif CONSUMER_RUN_MODE == 'iteration':
             ''' following block using iteration method to run new event from consumer
             '''
             print("going to consumer kafka consumer in interation mode")
             for msg in self.__kafka_consumer:
-                receive_data = msg.value
+                for receive_data in decode_consumer_record(msg):
 
-                row = pd.Series(receive_data)
-                row.drop('DailyReturn', inplace=True)
-                row.drop('Date', inplace=True)
-                y = row.pop(LABEL_NAME)
+                    row = pd.Series(receive_data)
+                    row.drop('DailyReturn', inplace=True)
+                    row.drop('Date', inplace=True)
+                    y = row.pop(LABEL_NAME)
 
-                if row is None or y is None:
-                    continue
+                    if row is None or y is None:
+                        continue
+                    self._evaluate_before_learning([row], [y])
 
-                start_time = time.time()
-                try:
-                    self.__model.learn_one(row, y)
-                except AttributeError:
-                    print("attributeError from model training")
-                    # print(traceback.format_exc())
-                    pass
-                end_time = time.time()
-
-                self.__trained_event_counter += 1
-                print(
-                    '\r #{} Events Trained, learn_one time spend:{} milliseconds. Offset{}'.format(
-                        self.__trained_event_counter, (end_time - start_time) * 1000, msg.offset),
-                    end='',
-                    flush=True
-                )
+                    start_time = time.time()
+                    try:
+                        self.__model.learn_one(row, y)
+                    except AttributeError:
+                        print("attributeError from model training")
+                        # print(traceback.format_exc())
+                        pass
+                    end_time = time.time()
+
+                    self.__trained_event_counter += 1
+                    print(
+                        '\r #{} Events Trained, learn_one time spend:{} milliseconds. Offset{}'.format(
+                            self.__trained_event_counter, (end_time - start_time) * 1000, msg.offset),
+                        end='',
+                        flush=True
+                    )
 
-                if self.__trained_event_counter % 500 == 0:
-                    self.__model_persisting_process_status = 'flushing'
-                    print('labeling model persisting status on')
+                    if self.__trained_event_counter % 500 == 0:
+                        self.__model_persisting_process_status = 'flushing'
+                        print('labeling model persisting status on')
+                        self._publish_model_snapshot()
+
+                self._track_trained_records([msg])
 
         else:
-            print("Cannot recognize running mode! please check!. Acceptance: 1. polling ; 2. iteration")
+            print("Cannot recognize running mode! please check!. Acceptance: 1. polling ; 2. batch_polling ; 3. iteration")
             raise RuntimeError
 
     def run_model_persist(self):
 
-        def send_signal_load_model(url=''):
+        def send_signal_load_model(url='', model_path='../../model_store/testing_hoeffding_tree.pickle'):
             url = url
 
             if len(url) > 1:
                 response = requests.post(
                     url,
-                    data='{"model_path":"../../model_store/testing_hoeffding_tree.pickle"}',
+                    data=json.dumps({'model_path': model_path}),
                     headers={'content-type': 'application/json'}
                 )
 
@@ -283,34 +685,36 @@ class OnlineMachineLearningServer:
 
             if self.__model is not None and self.__model_persisting_process_status == 'flushing':
                 try:
-                    self._save_model(
-                        save_file_path="../../model_store",
-                        save_file_name="testing_hoeffding_tree.pickle"
-                    )
-                    tree_inspector = HoeffdingEnsembleTreeInspector(self.__model)
-                    # tree_inspector.draw_tree(0, '../../output_plot/tree_inspect/')
-
-
-                    # updating current tree structure to /output_plot/web_checker_historical_check
-                    # for checker inspection
-                    # tree_inspector.draw_tree(0, '../../output_plot/web_checker_historical_check/', 'current_tree_structure')
-                    tree_inspector.draw_tree(None,
-                                             "../../output_plot/web_checker_online_display/online_tree_inspection/",
-                                             "current_tree_structure")
-                    timestamp = datetime.now().strftime('%y-%m-%d-%H-%M-%S')
-                    tree_inspector.draw_tree(0,
-                                             "../../output_plot/web_checker_historical_check/tree_inspection/",
-                                             "{}_tree_structure".format(timestamp))
-                    time.sleep(3)
-                    try:
-                        send_signal_load_model("http://127.0.0.1:5000/model/")
-                    except:
-                        print("Can not send signal to serving part for load model api")
+                    model_path = '../../model_store/testing_hoeffding_tree.pickle'
+                    if self.__model_registry is not None:
+                        version = self._register_model()
+                        # nothing to hand off until training thread checkpoints again
+                        model_path = self.__model_registry.get_model_path(version) if version is not None else None
+                    elif self.__model_snapshot_channel is None:
+                        self._save_model(
+                            save_file_path="../../model_store",
+                            save_file_name="testing_hoeffding_tree.pickle"
+                        )
+                    # updating current tree structure for online display,
+                    # and keeping a timestamped record of tree 0 in /output_plot/web_checker_historical_check
+                    # for checker inspection, only when the tree structure changed.
+                    render_model = self._get_tree_render_model(model_path)
+                    if render_model is not None:
+                        self.__current_tree_renderer.render_dirty_trees(render_model)
+                        self.__historical_tree_renderer.render_dirty_trees(render_model)
+                    if self.__model_snapshot_channel is None and model_path is not None:
+                        # model snapshot channel hands off the model already, no need to notify serving
+                        time.sleep(3)
+                        try:
+                            send_signal_load_model("http://127.0.0.1:5000/model/", model_path)
+                        except:
+                            print("Can not send signal to serving part for load model api")
                     self.__model_persisting_process_status = 'idle'
                 except FileNotFoundError:
                     print("Folder to persist model not found QQ! {}".format(os.getcwd()))
                 except Exception:
                     print("An Unexpected Error happen in model persist thread!")
+                    print(traceback.format_exc())
 
             elif self.__model_persisting_process_status == 'idle':
                 print('Model is not been updated, persist process in idle status')
@@ -320,10 +724,20 @@ class OnlineMachineLearningServer:
 
 class OnlineMachineTrainerRunner:
 
-    def __init__(self):
+    def __init__(self, model_snapshot_channel=None, ensemble_n_workers=0, kafka_consumer=None,
+                 checkpoint_coordinator=None, model_registry=None, snapshot_publish_interval_sec=5.0,
+                 prequential_metrics=False):
 
         print("Initialization of Online Machine Learning Service.")
-        self.__server = OnlineMachineLearningServer()
+        self.__server = OnlineMachineLearningServer(
+            model_snapshot_channel=model_snapshot_channel,
+            ensemble_n_workers=ensemble_n_workers,
+            kafka_consumer=kafka_consumer,
+            checkpoint_coordinator=checkpoint_coordinator,
+            model_registry=model_registry,
+            snapshot_publish_interval_sec=snapshot_publish_interval_sec,
+            prequential_metrics=prequential_metrics
+        )
         print("Online Machine Learning Service created.")
 
         self._pool = futures.ThreadPoolExecutor(2)
@@ -331,7 +745,7 @@ class OnlineMachineTrainerRunner:
 
     def start_online_ml_server(self):
         print("start online machine learning server")
-        self._future = self._pool.submit(self.__server.run, consumer_run_mode='polling', label_name='Y')
+        self._future = self._pool.submit(self.__server.run, consumer_run_mode='batch_polling', label_name='Y')
 
     def start_persist_model(self):
         self._future = self._pool.submit(self.__server.run_model_persist)
@@ -344,7 +758,13 @@ class OnlineMachineTrainerRunner:
 
 
 if __name__ == "__main__":
-    runner = OnlineMachineTrainerRunner()
+    runner = OnlineMachineTrainerRunner(
+        # serving process subscribes the same shared memory block by name
+        model_snapshot_channel=SharedMemoryModelSnapshotChannel(create=True),
+        checkpoint_coordinator=CheckpointCoordinator('../../model_store/'),
+        model_registry=ModelRegistry('../../model_store/registry/'),
+        prequential_metrics=True
+    )
     runner.start_online_ml_server()
     runner.start_persist_model()
     # time.sleep(1000)
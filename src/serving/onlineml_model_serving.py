@@ -1,4 +1,6 @@
 import datetime
+import os
+import time
 import traceback
 
 from flask import Flask, request, Response, abort
@@ -18,42 +20,53 @@ from dash.dependencies import Input, Output
 import plotly.graph_objects as go
 
 from tools.tree_structure_inspector import HoeffdingEnsembleTreeInspector
+from tools.batch_scoring import predict_proba_true_class, cast_proba_to_class
+from tools.http_payload import decode_data_payload
+from serving.figure_render_worker import LatestFigureRenderWorker
+from serving.model_registry import load_model_file
+from serving.model_snapshot import SharedMemoryModelSnapshotChannel
+from tools.label_encoder_registry import LabelEncoderRegistry, DEFAULT_LABEL_ENCODER_REGISTRY_PATH
+from tools.streaming_metrics import ConfusionMatrixCounter, SlidingWindowConfusionMatrix, TumblingWindowConfusionMatrix, MetricsHistory
 
-from matplotlib import pyplot as plt
+from matplotlib.figure import Figure
 
 
 def draw_analyze_proba_distribution(pred_proba: np.array, is_target_list: pd.Series, fig_save_path: str):
+    """
+    drawing prediction probability distribution of both classes.
+    The figure is created by matplotlib object api (not pyplot), so it is safe to draw in background thread
+    and is released by garbage collection without pyplot figure manager.
+    """
 
     pred_proba_result_true_class = pred_proba[is_target_list == 1]
     pred_proba_result_false_class = pred_proba[is_target_list == 0]
 
-    fig = plt.figure(figsize=(14, 4))
+    fig = Figure(figsize=(14, 4))
     fig.suptitle('{}pred_proba_distribution'.format(''))
-    plt.subplot(131)
-    plt.hist(pred_proba_result_true_class, bins=50, alpha=0.5, label='Y True')
-    plt.hist(pred_proba_result_false_class, bins=50, alpha=0.5, label='Y False')
-    plt.yscale('log')
-    plt.title('stacking prediction proba in both class')
-    plt.xlabel('pred proba')
-    plt.ylabel('statistics')
-    plt.grid()
-    plt.legend()
-    plt.subplot(132)
-    plt.hist(pred_proba_result_true_class, bins=50)
-    plt.yscale('log')
-    plt.title('Y True class prediction proba. dist.')
-    plt.xlabel('pred proba')
-    plt.ylabel('statistics')
-    plt.grid()
-    plt.subplot(133)
-    plt.hist(pred_proba_result_false_class, bins=50)
-    plt.yscale('log')
-    plt.title('Y False class prediction proba. dist.')
-    plt.xlabel('pred proba')
-    plt.ylabel('statistics')
-    plt.grid()
+    ax = fig.add_subplot(131)
+    ax.hist(pred_proba_result_true_class, bins=50, alpha=0.5, label='Y True')
+    ax.hist(pred_proba_result_false_class, bins=50, alpha=0.5, label='Y False')
+    ax.set_yscale('log')
+    ax.set_title('stacking prediction proba in both class')
+    ax.set_xlabel('pred proba')
+    ax.set_ylabel('statistics')
+    ax.grid()
+    ax.legend()
+    ax = fig.add_subplot(132)
+    ax.hist(pred_proba_result_true_class, bins=50)
+    ax.set_yscale('log')
+    ax.set_title('Y True class prediction proba. dist.')
+    ax.set_xlabel('pred proba')
+    ax.set_ylabel('statistics')
+    ax.grid()
+    ax = fig.add_subplot(133)
+    ax.hist(pred_proba_result_false_class, bins=50)
+    ax.set_yscale('log')
+    ax.set_title('Y False class prediction proba. dist.')
+    ax.set_xlabel('pred proba')
+    ax.set_ylabel('statistics')
+    ax.grid()
     # fig.savefig(fig_save_path)
-    # plt.savefig(fig_save_path)
     return fig
 
 
@@ -79,6 +92,11 @@ class OnlineMachineLearningModelServing:
         self.app = Flask(__name__)
 
         self.__model = None
+        self.__model_snapshot_channel = None
+        self.__model_version = 0
+        self.__model_generation = None
+        # category codes shared with training data loader, unseen category is mapped to unknown value
+        self.__label_encoder_registry = None
         self.__batch_model = RandomForestClassifier(
             n_estimators=10,
             criterion='gini',
@@ -86,24 +104,36 @@ class OnlineMachineLearningModelServing:
         )
         # df_batch_train = pd.read_csv("../../data/stock_index_predict/eda_TW50_top30_append_2010_2017.csv")
         # df_batch_train.drop(['Date', 'DailyReturn'], axis=1, inplace=True)
-        df_batch_train = pd.read_csv("../../playground/quick_study/dummy_toy/dummy_data_training.csv")
-        y = df_batch_train.pop('Y')
-        self.__batch_model.fit(df_batch_train, y)
+        self.__is_batch_model_ready = False
+        try:
+            df_batch_train = pd.read_csv("../../playground/quick_study/dummy_toy/dummy_data_training.csv")
+            y = df_batch_train.pop('Y')
+            self.__batch_model.fit(df_batch_train, y)
+            self.__is_batch_model_ready = True
+        except FileNotFoundError:
+            print("Batch model training data not found, batch model comparison is disabled")
+
+        # variable for metrics display, fixed-size history with down-sampling for older points
+        self.__metrics_history = MetricsHistory(['accuracy', 'recall', 'f1'])
+
+        # running and windowed confusion matrix, updated in O(batch) per validation request
+        self.__running_confusion_matrix = ConfusionMatrixCounter()
+        self.__sliding_confusion_matrix = SlidingWindowConfusionMatrix(window_size=10)
+        self.__tumbling_confusion_matrix = TumblingWindowConfusionMatrix(window_size=10)
 
         # variable for metrics display
-        self.__x_axis = []
-        self.__appending_acc = []
-        self.__appending_recall = []
-        self.__appending_f1 = []
-
-        # variable for metrics display
-        self.__batch_appending_acc = []
-        self.__batch_appending_f1 = []
+        self.__batch_metrics_history = MetricsHistory(['accuracy', 'f1'])
 
         # last prediction probability result and target answer
         self.__last_pred_proba = None
         self.__last_y_true = None
 
+        # figure rendering and batch model comparison are running out of the request path
+        self.__proba_dist_render_worker = LatestFigureRenderWorker(
+            draw_analyze_proba_distribution, name='proba_dist_render_worker'
+        )
+        self.__batch_model_pool = futures.ThreadPoolExecutor(1)
+
         self.dash_display = Dash(__name__+'dash')
 
         @self.app.route('/model/', methods=['POST'])
@@ -144,7 +174,9 @@ class OnlineMachineLearningModelServing:
             :return: http response with prediction result in payload in json format
             """
             try:
-                x_axis_item, df = extract_http_data_payload(request)
+                x_axis_item, label_name, df = extract_http_data_payload(request)
+                if label_name is not None and label_name in df.columns:
+                    df.pop(label_name)
                 proba_list, is_target_list = self.inference(df)
                 return Response(json.dumps(proba_list), status=200, headers={'content-type': 'application/json'})
 
@@ -168,42 +200,45 @@ class OnlineMachineLearningModelServing:
                 self.__last_pred_proba = proba_list
                 self.__last_y_true = y
 
-                pred_proba_nparray = np.array(proba_list)
+                pred_proba_nparray = np.array(proba_list, dtype=float)
                 time_stamp = datetime.datetime.now().strftime('%HH-%MM-%SS')
-                draw_fig = draw_analyze_proba_distribution(pred_proba_nparray, y, '../../output_plot/web_checker_historical_check/model_pred_proba_distribution/pred_proba_check_{}.png'.format(time_stamp))
-                #saving figure
-                draw_fig.savefig('../../output_plot/web_checker_historical_check/model_pred_proba_distribution/pred_proba_check_{}.png'.format(time_stamp))
-                draw_fig.savefig('../../output_plot/web_checker_online_display/online_pred_proba_distribution/pred_proba_check.png')
+                historical_fig_path = '../../output_plot/web_checker_historical_check/model_pred_proba_distribution/pred_proba_check_{}.png'.format(time_stamp)
+                # rendering figure in background, only the latest one is drawn under burst
+                self.__proba_dist_render_worker.submit(
+                    [
+                        historical_fig_path,
+                        '../../output_plot/web_checker_online_display/online_pred_proba_distribution/pred_proba_check.png'
+                    ],
+                    pred_proba_nparray, y.to_numpy(), historical_fig_path
+                )
 
-                acc = accuracy_score(y, is_target_list)
-                recall = recall_score(y, is_target_list)
-                f1 = f1_score(y, is_target_list)
+                y_true = y.to_numpy()
+                batch_confusion_matrix = ConfusionMatrixCounter().update(y_true, is_target_list)
+                acc = batch_confusion_matrix.get_accuracy()
+                recall = batch_confusion_matrix.get_recall()
+                f1 = batch_confusion_matrix.get_f1_score()
 
-                self.__x_axis.append(x_axis_item)
+                self.__running_confusion_matrix.add(batch_confusion_matrix)
+                self.__sliding_confusion_matrix.update(y_true, is_target_list)
+                self.__tumbling_confusion_matrix.update(y_true, is_target_list)
 
-                self.__appending_acc.append(acc)
-                self.__appending_recall.append(recall)
-                self.__appending_f1.append(f1)
+                self.__metrics_history.append(x_axis_item, accuracy=acc, recall=recall, f1=f1)
 
                 print("Accuracy: {}\n recall-rate: {}\n f1 score: {}\n".format(acc, recall, f1))
 
-                try:
-                    df.drop(["Date", "DailyReturn"], axis=1, inplace=True)
-                except:
-                    pass
-                batch_model_predict = self.__batch_model.predict(df)
-                batch_acc = accuracy_score(y, batch_model_predict)
-                batch_f1 = f1_score(y, batch_model_predict)
-                self.__batch_appending_acc.append(batch_acc)
-                self.__batch_appending_f1.append(batch_f1)
-
-                print("batch model prediction Accuracy: {}\n f1 score: {}\n".format(batch_acc, batch_f1))
+                if self.__is_batch_model_ready:
+                    self.__batch_model_pool.submit(self._run_batch_model_validation, df, y, x_axis_item)
 
 
 
                 return Response(
                     json.dumps(
-                        {"accuracy": acc, "recall-rate": recall, "f1 score": f1}
+                        {
+                            "accuracy": acc, "recall-rate": recall, "f1 score": f1,
+                            "running": self.__running_confusion_matrix.get_metrics(),
+                            "sliding window": self.__sliding_confusion_matrix.get_metrics(),
+                            "tumbling window": self.__tumbling_confusion_matrix.get_metrics()
+                        }
                     ),
                     status=200,
                     headers={'content-type': 'application/json'}
@@ -235,18 +270,36 @@ class OnlineMachineLearningModelServing:
 
         def extract_http_data_payload(request_from_http: request) -> pd.DataFrame:
             """
-            extract dataframe from http request
+            extract dataframe from http request, payload format is chosen by Content-Type,
+            json envelope (legacy), msgpack envelope, arrow IPC or parquet body are accepted.
             :param request_from_http: http requests
-            :return: dataframe
+            :return: x_axis_item, label_name, dataframe
             """
+            return decode_data_payload(
+                request_from_http.content_type,
+                request_from_http.get_data(),
+                request_from_http.headers
+            )
 
-            receive_data_payload = request_from_http.get_json()
-
-            x_axis_item = receive_data_payload['x_axis_name']
-            label_name = receive_data_payload['label_name']
-            df = pd.read_json(receive_data_payload['Data'])
-
-            return x_axis_item, label_name, df
+    def _run_batch_model_validation(self, df: pd.DataFrame, y: pd.Series, x_axis_item=None):
+        """
+        batch model (sklearn) prediction for comparison, running in background single thread pool
+        :param df: features data frame
+        :param y: target
+        :param x_axis_item: x axis item of this batch
+        :return:
+        """
+        try:
+            df = df.drop(["Date", "DailyReturn"], axis=1, errors='ignore')
+            batch_model_predict = self.__batch_model.predict(df)
+            batch_acc = accuracy_score(y, batch_model_predict)
+            batch_f1 = f1_score(y, batch_model_predict)
+            self.__batch_metrics_history.append(x_axis_item, accuracy=batch_acc, f1=batch_f1)
+
+            print("batch model prediction Accuracy: {}\n f1 score: {}\n".format(batch_acc, batch_f1))
+        except Exception:
+            print("batch model validation error")
+            print(traceback.format_exc())
 
     def get_model_tree(self):
 
@@ -255,22 +308,31 @@ class OnlineMachineLearningModelServing:
         model_tree.render()
 
     def get_x_axis(self):
-        return self.__x_axis
+        return self.__metrics_history.get_x_list()
 
     def get_accuracy(self):
-        return self.__appending_acc
+        return self.__metrics_history.get_metric_list('accuracy')
 
     def get_f1_score(self):
-        return self.__appending_f1
+        return self.__metrics_history.get_metric_list('f1')
 
     def get_batch_acc(self):
-        return self.__batch_appending_acc
+        return self.__batch_metrics_history.get_metric_list('accuracy')
 
     def get_batch_f1(self):
-        return self.__batch_appending_f1
+        return self.__batch_metrics_history.get_metric_list('f1')
 
     def get_recall_rate(self):
-        return self.__appending_recall
+        return self.__metrics_history.get_metric_list('recall')
+
+    def get_running_metrics(self):
+        return self.__running_confusion_matrix.get_metrics()
+
+    def get_sliding_window_metrics(self):
+        return self.__sliding_confusion_matrix.get_metrics()
+
+    def get_tumbling_window_metrics(self):
+        return self.__tumbling_confusion_matrix.get_metrics()
 
     def get_last_pred_proba(self):
         return self.__last_pred_proba
@@ -324,11 +386,49 @@ class OnlineMachineLearningModelServing:
     def load_model(self, path: str):
         """
         The implementation of the trigger acceptance api to load model from specify file path.
+        Plain pickle or compressed model registry file (`.pickle.zst`, `.pickle.lz4`).
         :param path: path of model to load
         :return:
         """
-        with open(path, 'rb') as f:
-            self.__model = pickle.load(f)
+        self.__model = load_model_file(path)
+
+    def set_model_snapshot_channel(self, model_snapshot_channel):
+        """
+        subscribing model snapshot channel published by trainer,
+        latest model snapshot is swapped in before each inference.
+        :param model_snapshot_channel: ModelSnapshotChannel
+        :return:
+        """
+        self.__model_snapshot_channel = model_snapshot_channel
+        self._refresh_model_from_snapshot()
+
+    def _refresh_model_from_snapshot(self):
+        """
+        swap in the latest model snapshot if a newer version is published,
+        or any version of a new generation (restarted trainer publishes from version 1 again).
+        the snapshot is immutable, swapping reference is enough.
+        :return:
+        """
+        if self.__model_snapshot_channel is None:
+            return
+        snapshot = self.__model_snapshot_channel.get_latest_snapshot()
+        if snapshot is None:
+            return
+        if snapshot.generation != self.__model_generation or snapshot.version > self.__model_version:
+            self.__model = snapshot.model
+            self.__model_version = snapshot.version
+            self.__model_generation = snapshot.generation
+
+    def get_model_version(self):
+        return self.__model_version
+
+    def set_label_encoder_registry(self, label_encoder_registry):
+        """
+        encoding categorical columns of inference data with the category codes used in training
+        :param label_encoder_registry: LabelEncoderRegistry, e.g. LabelEncoderRegistry.load(path)
+        :return:
+        """
+        self.__label_encoder_registry = label_encoder_registry
 
     def inference(self, data: pd.DataFrame, proba_cut_point=0.5) -> (list, list):
         """
@@ -341,27 +441,31 @@ class OnlineMachineLearningModelServing:
         :return: (prediction_probability in list, prediction_is_target)
         """
 
-        pred_target_proba = []
-        pred_is_target = []
-
-        for index, raw in data.iterrows():
+        self._refresh_model_from_snapshot()
+        model = self.__model
 
-            result = self.__model.predict_proba_one(raw)
-
-            try:
+        if self.__label_encoder_registry is not None:
+            # only raw (not yet encoded) categorical columns, registry is not extended in serving,
+            # model never learned the code of unseen category anyway
+            encoding_columns = [col for col in self.__label_encoder_registry.get_columns()
+                                if col in data.columns and data[col].dtype == 'object']
+            self.__label_encoder_registry.encode_frame(data, columns=encoding_columns, extend=False)
 
-                pred_target_proba.append(result.get(1))
+        pred_proba = predict_proba_true_class(model, data)
+        is_valid_proba = ~np.isnan(pred_proba)
 
-                if proba_cut_point is not None:
-                    if result.get(1) >= proba_cut_point:
-                        pred_is_target.append(1)
-                    else:
-                        pred_is_target.append(0)
+        if proba_cut_point is not None:
+            pred_is_target = cast_proba_to_class(pred_proba, proba_cut_point)
+        else:
+            pred_is_target = np.empty(0, dtype=int)
 
-            except Exception as e:
-                pred_target_proba.append(None)
-                pred_is_target.append(None)
-                e.with_traceback()
+        if is_valid_proba.all():
+            pred_target_proba = pred_proba.tolist()
+            pred_is_target = pred_is_target.tolist()
+        else:
+            # keep None for rows that model can not provide probability
+            pred_target_proba = [p if v else None for p, v in zip(pred_proba.tolist(), is_valid_proba)]
+            pred_is_target = [c if v else None for c, v in zip(pred_is_target.tolist(), is_valid_proba)]
 
         return pred_target_proba, pred_is_target
 
@@ -443,9 +547,39 @@ class ModelPerformanceMonitor:
 
 
 
+def subscribe_model_snapshot_channel(model_serving, connection_try_times=3, retry_interval_sec=5):
+    """
+    subscribing the shared memory model snapshot channel created by trainer process,
+    serving falls back to load model api if trainer is not up.
+    :param model_serving: OnlineMachineLearningModelServing
+    :param connection_try_times: times of attaching
+    :param retry_interval_sec: seconds between two attaching
+    :return: SharedMemoryModelSnapshotChannel, None if not attached
+    """
+    for i in range(connection_try_times):
+        try:
+            channel = SharedMemoryModelSnapshotChannel(create=False)
+        except FileNotFoundError:
+            print("Model snapshot channel not found, retry {}/{}".format(i + 1, connection_try_times))
+            time.sleep(retry_interval_sec)
+            continue
+        model_serving.set_model_snapshot_channel(channel)
+        return channel
+    print("Model snapshot channel not available, model is loaded by load model api")
+    return None
+
+
 if __name__ == '__main__':
 
     online_model_serving = OnlineMachineLearningModelServing.get_instance()
+    subscribe_model_snapshot_channel(online_model_serving)
+    # category codes saved where training data loaders are built (ExperimentPipeline / ModelTrainerReader)
+    label_encoder_registry_path = DEFAULT_LABEL_ENCODER_REGISTRY_PATH
+    if os.path.isfile(label_encoder_registry_path):
+        online_model_serving.set_label_encoder_registry(LabelEncoderRegistry.load(label_encoder_registry_path))
+    else:
+        print("Label encoder registry {} not found, categorical columns are not encoded".format(
+            label_encoder_registry_path))
     online_model_serving.run()
     model_checker = ModelPerformanceMonitor.get_instance()
     model_checker.run_dash()
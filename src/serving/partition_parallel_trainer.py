@@ -0,0 +1,339 @@
+import functools
+import json
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+import time
+import traceback
+
+import requests
+
+from serving.adaptive_polling import AdaptivePollingController
+from serving.checkpoint_coordinator import CheckpointCoordinator
+from tools.message_codec import decode_consumer_records_to_frame
+from tools.partition_ensemble import PartitionEnsembleClassifier
+
+
+def create_kafka_consumer(bootstrap_servers, topic, group_id, enable_auto_commit=True,
+                          on_partitions_revoked=None, on_partitions_assigned=None):
+    """
+    consumer of a partition training worker, partitions of topic are split among workers of the same group
+    :param bootstrap_servers: kafka bootstrap servers
+    :param topic: kafka topic
+    :param group_id: consumer group shared by workers
+    :param enable_auto_commit: False if offsets are committed together with model checkpoint only
+    :param on_partitions_revoked: function(revoked), called inside poll before partitions are revoked
+    :param on_partitions_assigned: function(assigned), called inside poll after partitions are assigned
+    """
+    from kafka import KafkaConsumer
+    from kafka import ConsumerRebalanceListener
+
+    class _WorkerRebalanceListener(ConsumerRebalanceListener):
+
+        def on_partitions_revoked(self, revoked):
+            if on_partitions_revoked is not None:
+                on_partitions_revoked(revoked)
+
+        def on_partitions_assigned(self, assigned):
+            if on_partitions_assigned is not None:
+                on_partitions_assigned(assigned)
+
+    kafka_consumer = KafkaConsumer(
+        bootstrap_servers=bootstrap_servers,
+        group_id=group_id,
+        enable_auto_commit=enable_auto_commit,
+        auto_offset_reset='earliest'
+    )
+    kafka_consumer.subscribe([topic], listener=_WorkerRebalanceListener())
+    return kafka_consumer
+
+
+def _learn_polling_batch(model, records, label_name) -> int:
+    batch_df = decode_consumer_records_to_frame(records)
+    if label_name not in batch_df.columns:
+        raise KeyError("label {} not found in polling batch".format(label_name))
+    batch_df.dropna(subset=[label_name], inplace=True)
+    batch_y = batch_df.pop(label_name)
+
+    if hasattr(model, 'learn_many'):
+        model.learn_many(batch_df, batch_y)
+    else:
+        learn_one = model.learn_one
+        for x, y in zip(batch_df.to_dict(orient='records'), batch_y.tolist()):
+            learn_one(x, y)
+    return len(batch_y)
+
+
+def _partition_training_worker(worker_id, model, consumer_factory, label_name, replica_queue, stop_event,
+                               merge_interval_sec, checkpoint_dir=None):
+    """
+    worker process training its own replica on the partitions assigned to its consumer,
+    sending the replica to coordinator every `merge_interval_sec` and once more when stopping.
+    With `checkpoint_dir`, auto commit is disabled, the replica is checkpointed together with the offsets
+    it has been trained up to (one checkpoint file per worker) and resumed from the checkpoint on restart.
+    """
+    trained_event_counter = 0
+    checkpoint_coordinator = None
+    if checkpoint_dir is not None:
+        checkpoint_coordinator = CheckpointCoordinator(
+            checkpoint_dir,
+            checkpoint_file_name='partition_worker_{}_checkpoint.pickle'.format(worker_id)
+        )
+        checkpoint = checkpoint_coordinator.load_checkpoint()
+        if checkpoint is not None:
+            model = checkpoint.model
+            trained_event_counter = checkpoint.trained_event_counter
+            print("worker {} resume replica from checkpoint, offsets: {}".format(worker_id, checkpoint.offsets))
+
+    kafka_consumer = None
+
+    def save_checkpoint():
+        if checkpoint_coordinator is None:
+            return
+        try:
+            checkpoint_coordinator.save_checkpoint(model, trained_event_counter, kafka_consumer=kafka_consumer)
+        except Exception:
+            print("worker {} can not save checkpoint {}".format(worker_id, checkpoint_coordinator.checkpoint_path))
+            print(traceback.format_exc())
+
+    def release_revoked_partitions(revoked):
+        # checkpoint commits final offsets of revoked partitions, then they are no longer tracked or committed
+        save_checkpoint()
+        if checkpoint_coordinator is not None:
+            checkpoint_coordinator.release_partitions(revoked)
+
+    def seek_to_checkpoint(assigned):
+        if checkpoint_coordinator is not None:
+            checkpoint_coordinator.seek_assigned_partitions(kafka_consumer, assigned)
+
+    # rebalance callbacks run inside poll, i.e. in this worker's only thread
+    kafka_consumer = consumer_factory(
+        enable_auto_commit=checkpoint_coordinator is None,
+        on_partitions_revoked=release_revoked_partitions,
+        on_partitions_assigned=seek_to_checkpoint
+    )
+    polling_controller = AdaptivePollingController()
+    n_event_since_sent = 0
+    last_sent_time = time.time()
+
+    try:
+        while not stop_event.is_set():
+            data_polling_result = kafka_consumer.poll(
+                timeout_ms=polling_controller.get_poll_timeout_ms(),
+                max_records=polling_controller.get_max_records()
+            )
+            records = [record for records in data_polling_result.values() for record in records]
+
+            start_time = time.time()
+            if len(records) > 0:
+                try:
+                    n_event = _learn_polling_batch(model, records, label_name)
+                    trained_event_counter += n_event
+                    n_event_since_sent += n_event
+                except Exception:
+                    print("worker {} training error".format(worker_id))
+                    print(traceback.format_exc())
+            polling_controller.record_polling(len(records), time.time() - start_time)
+
+            if checkpoint_coordinator is not None and len(records) > 0:
+                checkpoint_coordinator.track_records(records)
+                if checkpoint_coordinator.is_checkpoint_due():
+                    save_checkpoint()
+
+            if n_event_since_sent > 0 and time.time() - last_sent_time >= merge_interval_sec:
+                replica_queue.put((worker_id, model, trained_event_counter))
+                n_event_since_sent = 0
+                last_sent_time = time.time()
+    finally:
+        save_checkpoint()
+        if n_event_since_sent > 0:
+            replica_queue.put((worker_id, model, trained_event_counter))
+        if hasattr(kafka_consumer, 'close'):
+            kafka_consumer.close()
+
+
+class PartitionParallelTrainer:
+    """
+    Multi-process training mode of online machine learning server.
+
+    Each worker process runs a consumer in the same consumer group, so kafka assigns each worker a subset
+    of the topic partitions, and trains its own replica of the model on them.
+    The coordinator thread collects replicas periodically and merges them into one PartitionEnsembleClassifier
+    (weighted by trained events), which is handed off to serving by model snapshot channel,
+    or by pickle file and load model api as the single thread server does.
+
+    Number of workers more than number of partitions leaves extra workers idle.
+    """
+
+    def __init__(self, model, n_workers=2, label_name='Y', topic='testTopic', bootstrap_servers=None,
+                 group_id='onlineml_partition_trainer', merge_interval_sec=30, model_snapshot_channel=None,
+                 merged_model_path='../../model_store/testing_hoeffding_tree.pickle',
+                 load_model_api_url='http://127.0.0.1:5000/model/', consumer_factory=None,
+                 checkpoint_dir='../../model_store/'):
+        """
+        :param model: base river model, each worker trains its own copy
+        :param n_workers: number of worker processes
+        :param label_name: label column name
+        :param topic: kafka topic
+        :param bootstrap_servers: kafka bootstrap servers
+        :param group_id: consumer group shared by workers
+        :param merge_interval_sec: interval of workers sending replica to coordinator
+        :param model_snapshot_channel: optional ModelSnapshotChannel to publish merged model
+        :param merged_model_path: pickle path of merged model, used when snapshot channel is not provided
+        :param load_model_api_url: serving load model api notified after merged model is saved
+        :param consumer_factory: picklable function(enable_auto_commit, on_partitions_revoked, on_partitions_assigned)
+                                 -> consumer, default kafka consumer of `group_id`
+        :param checkpoint_dir: folder of worker checkpoints (replica with consumed offsets), kafka auto commit
+                               is disabled and offsets are committed with checkpoint. None to disable checkpoint.
+        """
+        if bootstrap_servers is None:
+            bootstrap_servers = ['localhost:9092']
+        if consumer_factory is None:
+            consumer_factory = functools.partial(create_kafka_consumer, bootstrap_servers, topic, group_id)
+
+        self._model = model
+        self._n_workers = n_workers
+        self._label_name = label_name
+        self._merge_interval_sec = merge_interval_sec
+        self._model_snapshot_channel = model_snapshot_channel
+        self._merged_model_path = merged_model_path
+        self._load_model_api_url = load_model_api_url
+        self._consumer_factory = consumer_factory
+        self._checkpoint_dir = checkpoint_dir
+
+        self._context = multiprocessing.get_context()
+        self._replica_queue = self._context.Queue()
+        self._stop_event = self._context.Event()
+        self._workers = []
+        self._merge_thread = None
+        self._is_running = False
+
+        self._replicas = {}
+        self._merged_model = None
+        self._merged_version = 0
+
+    def get_merged_model(self):
+        return self._merged_model
+
+    def get_merged_version(self):
+        return self._merged_version
+
+    def get_trained_event_counter(self) -> int:
+        return sum(trained_event_counter for _, trained_event_counter in self._replicas.values())
+
+    def start(self):
+        self._is_running = True
+        self._stop_event.clear()
+        for worker_id in range(self._n_workers):
+            process = self._context.Process(
+                target=_partition_training_worker,
+                args=(worker_id, self._model, self._consumer_factory, self._label_name,
+                      self._replica_queue, self._stop_event, self._merge_interval_sec, self._checkpoint_dir),
+                daemon=True
+            )
+            process.start()
+            self._workers.append(process)
+        self._merge_thread = threading.Thread(target=self._run_merge_loop, name='replica_merge', daemon=True)
+        self._merge_thread.start()
+
+    def _drain_replica_queue(self, timeout) -> bool:
+        """
+        receiving replicas in queue, blocking up to `timeout` for the first one
+        :return: True if any replica received
+        """
+        received = False
+        try:
+            worker_id, replica, trained_event_counter = self._replica_queue.get(timeout=timeout)
+            self._replicas[worker_id] = (replica, trained_event_counter)
+            received = True
+            while True:
+                worker_id, replica, trained_event_counter = self._replica_queue.get_nowait()
+                self._replicas[worker_id] = (replica, trained_event_counter)
+        except queue.Empty:
+            pass
+        return received
+
+    def _run_merge_loop(self):
+        while self._is_running:
+            if self._drain_replica_queue(timeout=1):
+                self._merge_and_publish()
+
+    def _merge_and_publish(self):
+        """
+        merging latest replica of each worker, handing off merged model to serving
+        :return:
+        """
+        if len(self._replicas) == 0:
+            return
+        worker_ids = sorted(self._replicas.keys())
+        merged_model = PartitionEnsembleClassifier(
+            replicas=[self._replicas[i][0] for i in worker_ids],
+            weights=[self._replicas[i][1] for i in worker_ids]
+        )
+        self._merged_model = merged_model
+        self._merged_version += 1
+        print("\rMerge {} replicas, {} events trained, version {}".format(
+            len(worker_ids), self.get_trained_event_counter(), self._merged_version))
+
+        try:
+            if self._model_snapshot_channel is not None:
+                self._model_snapshot_channel.publish(merged_model)
+            elif self._merged_model_path is not None:
+                temp_path = self._merged_model_path + '.tmp'
+                with open(temp_path, 'wb') as out_file:
+                    pickle.dump(merged_model, out_file)
+                os.replace(temp_path, self._merged_model_path)
+                if self._load_model_api_url is not None:
+                    requests.post(
+                        self._load_model_api_url,
+                        data=json.dumps({'model_path': self._merged_model_path}),
+                        headers={'content-type': 'application/json'}
+                    )
+        except Exception:
+            print("Can not hand off merged model to serving")
+            print(traceback.format_exc())
+
+    def stop(self, timeout=30):
+        """
+        stopping workers, final replicas are merged before return
+        :param timeout: seconds to wait for each worker
+        :return:
+        """
+        self._stop_event.set()
+        for process in self._workers:
+            # merge thread keeps draining queue, so worker is not blocked on putting its final replica
+            process.join(timeout)
+        self._is_running = False
+        if self._merge_thread is not None:
+            self._merge_thread.join()
+        if self._drain_replica_queue(timeout=0.1):
+            self._merge_and_publish()
+        self._workers = []
+
+
+if __name__ == "__main__":
+    from river import ensemble
+    from river import tree
+
+    trainer = PartitionParallelTrainer(
+        model=ensemble.AdaBoostClassifier(
+            model=tree.HoeffdingAdaptiveTreeClassifier(
+                max_depth=3,
+                split_criterion='gini',
+                split_confidence=1e-2,
+                grace_period=10,
+                seed=0
+            ),
+            n_models=10,
+            seed=42
+        ),
+        n_workers=multiprocessing.cpu_count()
+    )
+    trainer.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        trainer.stop()
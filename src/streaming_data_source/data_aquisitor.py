@@ -8,6 +8,8 @@ from kafka import KafkaConsumer
 from river import tree
 from river import ensemble
 
+from tools.message_codec import decode_consumer_record
+
 
 class DataAcquisitor(ABC):
     """
@@ -41,8 +43,7 @@ class KafkaDataAcquisitor(DataAcquisitor):
 
         self.__kafka_consumer = KafkaConsumer(
             self.__topic,
-            bootstrap_servers=[self.__bootstrap_server],
-            value_deserializer=lambda m: json.loads(m.decode('utf-8'))
+            bootstrap_servers=[self.__bootstrap_server]
         )
 
         self.__model = ensemble.AdaBoostClassifier(
@@ -73,15 +74,15 @@ class KafkaDataAcquisitor(DataAcquisitor):
         trained_event_count = 0
         for msg in self.__kafka_consumer:
 
-            receive_data = msg.value
-            row = pd.read_json(json.dumps(receive_data), typ='series', orient='records')
-            y = row.pop('Y')
+            for receive_data in decode_consumer_record(msg):
+                row = pd.Series(receive_data)
+                y = row.pop('Y')
 
-            start_time = time.time()
-            self.__model.learn_one(row, y)
-            end_time = time.time()
+                start_time = time.time()
+                self.__model.learn_one(row, y)
+                end_time = time.time()
 
-            trained_event_count += 1
+                trained_event_count += 1
 
             print('\r#{} Events Trained, learn_one time spend: {} millisecond'.format(trained_event_count, end_time-start_time), end='', flush=True)
 
@@ -76,8 +76,9 @@ class InferenceDataSender:
                 if kafka_sender is not None:
                     sub_df.pop('index')
 
-                    for index, row in tqdm(sub_df.iterrows(), total=sub_df.shape[1]):
+                    for index, row in tqdm(sub_df.iterrows(), total=sub_df.shape[0]):
                         kafka_sender.send_to_kafka(row, 'testTopic')
+                    kafka_sender.flush()
 
 
                 print(df_to_json)
@@ -5,18 +5,19 @@ from tqdm import tqdm
 
 import pandas as pd
 
-from kafka import KafkaProducer
 from kafka.errors import KafkaError
-import msgpack
 
 from tools.data_loader import GeneralDataLoader
+from tools.message_codec import get_codec, encode_message
+from tools.kafka_batch_producer import BatchedKafkaProducer
 
 
 class DataSourcingKafka:
 
-    def __init__(self):
+    def __init__(self, message_codec='json'):
 
         self.__kafka_producer = None
+        self.__message_codec = get_codec(message_codec)
         self._init_kafka_producer()
 
     def _init_kafka_producer(self, *args):
@@ -24,33 +25,47 @@ class DataSourcingKafka:
         #TODO kafka producer configuration should let user setting in the future
         broker_host_name = 'localhost:9092'
 
-        self.__kafka_producer = KafkaProducer(
+        self.__kafka_producer = BatchedKafkaProducer(
             bootstrap_servers=broker_host_name
         )
 
+    def set_message_codec(self, message_codec: str):
+        """
+        set the wire format of pd.Series / pd.DataFrame sending to kafka, `json`, `msgpack` or `arrow`
+        :param message_codec: codec name
+        :return:
+        """
+        self.__message_codec = get_codec(message_codec)
+
     def send_to_kafka(self, data, target_topic):
 
-        data_to_send = None
-        if isinstance(data, str):
-            # print("input data is string")
-            data_to_send = bytes(data, 'utf-8')
-        elif isinstance(data, pd.Series):
-            # print("input data is pandas series (row)")
-            data_to_send = bytes(str(data.to_json()), 'utf-8')
-        elif isinstance(data, bytearray):
-            # print("input data is byte array")
-            data_to_send = data
+        data_to_send, headers = encode_message(data, self.__message_codec)
 
         if data_to_send is not None:
             try:
                 #TODO target topic should be configurable in the future
                 target_topic = 'testTopic'
-                self.__kafka_producer.send(target_topic, data_to_send)
-                self.__kafka_producer.flush()
+                self.__kafka_producer.send(target_topic, data_to_send, headers=headers)
 
             except Exception as e:
                 e.with_traceback()
 
+    def flush(self):
+        """
+        block until all in-flight messages sending to kafka are delivered,
+        should be called at the end of a pump run.
+        :return:
+        """
+        if self.__kafka_producer is not None:
+            self.__kafka_producer.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+        return False
+
 
 class BaseGenerator(abc.ABC):
 
@@ -95,8 +110,9 @@ class LocalDataGenerator(BaseGenerator):
     def send_data_into_kafka(self):
 
         #TODO send data to Kafka
-        for index, row in tqdm(self.__full_op_df.iterrows(), total=self.__full_op_df.shape[1]):
-            self.__data_sourcer_to_kafka.send_to_kafka(row, 'testTopic')
+        with self.__data_sourcer_to_kafka as data_sourcer:
+            for index, row in tqdm(self.__full_op_df.iterrows(), total=self.__full_op_df.shape[0]):
+                data_sourcer.send_to_kafka(row, 'testTopic')
             # time.sleep(3)
             # producer.send(send_topic, value=data, key='training')
 
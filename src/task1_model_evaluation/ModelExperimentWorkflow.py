@@ -10,6 +10,7 @@ import pandas
 
 from tools.DataPreparation import DataPreparation, CreditCardPreparation, AirlineDataPreparation, ArbitraryDataPreparation
 from tools.DataVisualization import TrendPlot
+from tools.streaming_metrics import ConfusionMatrixCounter, SlidingWindowConfusionMatrix, get_scored_mask
 
 from graphviz import Graph
 import statistics
@@ -23,6 +24,42 @@ from sklearn.ensemble import RandomForestClassifier
 
 from tqdm import tqdm
 
+
+class RowSlicedDataset:
+    """
+    Features and target converted once into contiguous numpy arrays,
+    row subsets are handed out as array views (basic slicing, no copy) instead of new DataFrame slices.
+    Per-row dict for River model is converted once on first use and cached, subsets are list slices of it.
+    """
+
+    def __init__(self, features: pandas.DataFrame, target: pandas.Series):
+        self._features = features
+        self._target = target
+        self._feature_array = np.ascontiguousarray(features.to_numpy())
+        self._target_array = np.ascontiguousarray(target.to_numpy())
+        self._dict_rows = None
+
+    def __len__(self):
+        return len(self._target_array)
+
+    def get_frames(self, start_row=None, end_row=None) -> (pandas.DataFrame, pandas.Series):
+        return self._features[start_row:end_row], self._target[start_row:end_row]
+
+    def get_arrays(self, start_row=None, end_row=None) -> (np.ndarray, np.ndarray):
+        """
+        :return: views of feature array and target array, restricted between start_row and end_row
+        """
+        return self._feature_array[start_row:end_row], self._target_array[start_row:end_row]
+
+    def get_dict_rows(self, start_row=None, end_row=None) -> (list, np.ndarray):
+        """
+        :return: list of per-row feature dict and view of target array, restricted between start_row and end_row
+        """
+        if self._dict_rows is None:
+            self._dict_rows = self._features.to_dict(orient='records')
+        return self._dict_rows[start_row:end_row], self._target_array[start_row:end_row]
+
+
 class ModelExperimentWorkflow(ABC):
     """
     An Abstraction Factory interface declares a set of methods that represent complete
@@ -32,9 +69,12 @@ class ModelExperimentWorkflow(ABC):
     Concrete class will be implement for specific purpose.
     """
 
-    def __init__(self, input_data_preparation_class, random_seed=42):
+    def __init__(self, input_data_preparation_class, random_seed=42, keep_prediction_history=False,
+                 sliding_window_size=None):
         """
         Initializing Model Performacne testing workflow.
+        :param keep_prediction_history: keeping accumulated incremental prediction result and target lists
+        :param sliding_window_size: number of incremental prediction steps of sliding window metrics, disabled if None
         """
         if isinstance(input_data_preparation_class, DataPreparation):
             pass
@@ -56,19 +96,28 @@ class ModelExperimentWorkflow(ABC):
         #===========================#
         self._train_features, self._test_features, self._train_target, self._test_target = \
             input_data_preparation_class.get_splitted_train_test_pd_df_data(training_dataset_ratio=0.7, random_seed=random_seed)
+        #==================================================================#
+        # Converted once, row subsets of each step are views of the arrays #
+        #==================================================================#
+        self._full_dataset = RowSlicedDataset(self._full_data_features, self._full_data_target)
+        self._train_dataset = RowSlicedDataset(self._train_features, self._train_target)
+        self._test_dataset = RowSlicedDataset(self._test_features, self._test_target)
 
         self._model_init = None
         self._model = None
 
+        #=================================================================#
+        # Incremental prediction is accumulated into running counters,    #
+        # evaluation of each step is O(step) instead of O(accumulated)    #
+        #=================================================================#
+        self._keep_prediction_history = keep_prediction_history
         self._inc_tot_pred_result = []
         self._inc_tot_pred_related_target = []
 
-        self._inc_tot_pred_cnt = 0
-        self._inc_tot_correct_cnt = 0
-        self._inc_tot_target_cnt = 0
-        self._inc_tot_pred_target_cnt = 0
-        self._inc_tot_pickup_target_cnt = 0
-        self._inc_summary_acc = float
+        self._inc_confusion_matrix = ConfusionMatrixCounter()
+        self._inc_n_unscored_rows = 0
+        self._inc_sliding_confusion_matrix = SlidingWindowConfusionMatrix(window_size=sliding_window_size) \
+            if sliding_window_size is not None else None
 
     @abstractmethod
     def train_model(self):
@@ -154,25 +203,65 @@ class ModelExperimentWorkflow(ABC):
         print("Acc: {:.2f}".format(correct_cnt / len(test_target) * 100))
         return correct_cnt / len(test_target), pickup_target_cnt / target_cnt
 
+    def _accumulate_incremental_prediction(self, pred_result, target) -> None:
+        """
+        updating running (and sliding window) confusion matrix by the prediction of one step.
+        river model predicts None before learning anything, such unscored rows are counted as misses
+        (false negative of positive target, false positive otherwise), same as evaluating the accumulated
+        prediction with sklearn accuracy / recall.
+        :param pred_result: predicted class of the step
+        :param target: target ground true of the step
+        :return: None
+        """
+        pred_result = np.asarray(pred_result)
+        target = np.asarray(target)
+        is_scored = get_scored_mask(pred_result)
+        counted_pred_result = pred_result
+        if is_scored is not None:
+            is_unscored = ~is_scored
+            self._inc_n_unscored_rows += int(np.count_nonzero(is_unscored))
+            counted_pred_result = pred_result.copy()
+            counted_pred_result[is_unscored] = np.where(target[is_unscored] == 1, 0, 1)
+        self._inc_confusion_matrix.update(target, counted_pred_result)
+        if self._inc_sliding_confusion_matrix is not None:
+            self._inc_sliding_confusion_matrix.update(target, counted_pred_result)
+        if self._keep_prediction_history:
+            self._inc_tot_pred_result.extend(pred_result)
+            self._inc_tot_pred_related_target.extend(target)
+
     def incremental_evaluate_model_get_accuracy_recall(self):
-        # Simply Prediction
-        test_target = np.array(self._inc_tot_pred_related_target)
-        correct_cnt = 0
-        target_cnt = 0
-        pred_target_cnt = 0
-        pickup_target_cnt = 0
-        for i in range(len(test_target)):
-            if test_target[i] == 1:
-                target_cnt += 1
-                if self._inc_tot_pred_result[i] == test_target[i]:
-                    pickup_target_cnt += 1
-            if self._inc_tot_pred_result[i] == 1:
-                pred_target_cnt += 1
-            if self._inc_tot_pred_result[i] == test_target[i]:
-                correct_cnt += 1
+        """
+        accuracy and recall over all incremental prediction so far, from the running confusion matrix
+        :return: accuracy, recall
+        """
+        acc = self._inc_confusion_matrix.get_accuracy()
+        print("Acc: {:.2f}".format(acc * 100))
+        return acc, self._inc_confusion_matrix.get_recall()
 
-        print("Acc: {:.2f}".format(correct_cnt / len(test_target) * 100))
-        return correct_cnt / len(test_target), pickup_target_cnt / target_cnt
+    def incremental_evaluate_sliding_window_get_accuracy_recall(self):
+        """
+        accuracy and recall over the last `sliding_window_size` incremental prediction steps
+        :return: accuracy, recall
+        """
+        if self._inc_sliding_confusion_matrix is None:
+            raise ValueError("sliding window metrics is disabled, set sliding_window_size to enable it")
+        counter = self._inc_sliding_confusion_matrix.get_counter()
+        return counter.get_accuracy(), counter.get_recall()
+
+    def get_incremental_confusion_matrix(self) -> ConfusionMatrixCounter:
+        return self._inc_confusion_matrix
+
+    def get_incremental_n_unscored_rows(self) -> int:
+        """
+        :return: number of incremental prediction rows without prediction, counted as misses
+        """
+        return self._inc_n_unscored_rows
+
+    def get_incremental_prediction_history(self) -> (list, list):
+        """
+        :return: accumulated prediction result and target, empty if keep_prediction_history is disabled
+        """
+        return self._inc_tot_pred_result, self._inc_tot_pred_related_target
 
     def get_model_type(self):
         return type(self._model)
@@ -194,9 +283,7 @@ class ModelExperimentWorkflow(ABC):
         if type(limit_num) is not int:
             raise TypeError
         else:
-            limited_row_features = self._full_data_features.head(n=limit_num)
-            limited_row_target = self._full_data_target.head(n=limit_num)
-            return limited_row_features, limited_row_target
+            return self._full_dataset.get_frames(end_row=limit_num)
 
     def subset_rows_arbitrary_full_dataset(self, start_row=int, end_row=int) -> pandas.DataFrame:
         """
@@ -206,9 +293,7 @@ class ModelExperimentWorkflow(ABC):
         :return:
         """
 
-        subset_row_features = self._full_data_features[start_row:end_row]
-        subset_row_target = self._full_data_target[start_row:end_row]
-        return subset_row_features, subset_row_target
+        return self._full_dataset.get_frames(start_row, end_row)
 
     def limited_rows_split_train_dataset(self, limit_num=-1) -> pandas.DataFrame:
         """
@@ -220,9 +305,7 @@ class ModelExperimentWorkflow(ABC):
         if type(limit_num) is not int:
             raise TypeError
         else:
-            limited_row_features = self._train_features.head(n=limit_num)
-            limited_row_target = self._train_target.head(n=limit_num)
-            return limited_row_features, limited_row_target
+            return self._train_dataset.get_frames(end_row=limit_num)
 
     def subset_rows_arbitrary_split_train_dataset(self, start_row=int, end_row=int) -> pandas.DataFrame:
         """
@@ -232,9 +315,16 @@ class ModelExperimentWorkflow(ABC):
         :return:
         """
 
-        subset_row_features = self._train_features[start_row:end_row]
-        subset_row_target = self._train_target[start_row:end_row]
-        return subset_row_features, subset_row_target
+        return self._train_dataset.get_frames(start_row, end_row)
+
+    def get_full_dataset(self) -> RowSlicedDataset:
+        return self._full_dataset
+
+    def get_train_dataset(self) -> RowSlicedDataset:
+        return self._train_dataset
+
+    def get_test_dataset(self) -> RowSlicedDataset:
+        return self._test_dataset
 
     def get_train_size(self):
         return len(self._train_features)
@@ -245,7 +335,7 @@ class ModelSklearnWorkflow(ModelExperimentWorkflow):
 
     def train_model(self, train_num_limit=-1):
 
-        data_for_train, target_for_train = self.limited_rows_split_train_dataset(train_num_limit)
+        data_for_train, target_for_train = self._train_dataset.get_arrays(end_row=train_num_limit)
         print('Training Features Shape: ', data_for_train.shape)
         print('Training Target Shape: ', target_for_train.shape)
 
@@ -253,67 +343,61 @@ class ModelSklearnWorkflow(ModelExperimentWorkflow):
 
     def train_model_by_arbitrary_full_data(self, sub_data_start_row, sub_data_end_row):
 
-        data_for_train, target_for_train = self.subset_rows_arbitrary_full_dataset(
-            start_row=sub_data_start_row,
-            end_row=sub_data_end_row
-        )
+        data_for_train, target_for_train = self._full_dataset.get_arrays(sub_data_start_row, sub_data_end_row)
         self._model.fit(data_for_train, target_for_train)
 
     def train_model_by_arbitrary_split_train_data(self, sub_data_start_row, sub_data_end_row):
 
-        data_for_train, target_for_train = self.subset_rows_arbitrary_split_train_dataset(
-            start_row=sub_data_start_row,
-            end_row=sub_data_end_row
-        )
+        data_for_train, target_for_train = self._train_dataset.get_arrays(sub_data_start_row, sub_data_end_row)
         self._model.fit(data_for_train, target_for_train)
 
     def batch_pred_test_dataset(self):
-        pred_result = self._model.predict(self._test_features)
+        data_for_test, _ = self._test_dataset.get_arrays()
+        pred_result = self._model.predict(data_for_test)
         return pred_result, self._test_target
 
     def batch_pred_prob_test_dataset(self):
-        pred_result = self._model.predict_proba(self._test_features)
+        data_for_test, _ = self._test_dataset.get_arrays()
+        pred_result = self._model.predict_proba(data_for_test)
         return pred_result, self._test_target
 
     def batch_pred_arbitrary_full_data(self, sub_data_start_row, sub_data_end_row) -> (list, list):
 
-        data_for_test, target_for_test = self.subset_rows_arbitrary_full_dataset(
-            start_row=sub_data_start_row,
-            end_row=sub_data_end_row
-        )
+        data_for_test, target_for_test = self._full_dataset.get_arrays(sub_data_start_row, sub_data_end_row)
 
         pred_result = self._model.predict(data_for_test)
         return pred_result, target_for_test
 
     def incremental_prediction(self, start_row=int, end_row=int) -> None:
 
-        data_for_test, target_for_test = self.subset_rows_arbitrary_full_dataset(
-            start_row=start_row,
-            end_row=end_row
-        )
+        data_for_test, target_for_test = self._full_dataset.get_arrays(start_row, end_row)
 
         pred_result = self._model.predict(data_for_test)
-        self._inc_tot_pred_result.extend(pred_result)
-        self._inc_tot_pred_related_target.extend(target_for_test)
+        self._accumulate_incremental_prediction(pred_result, target_for_test)
 
 
     def incremental_prediction_proba(self, start_row=0, end_row=-1, proba_cut_threshold=0.2) -> None:
 
-        data_for_test, target_for_test = self.subset_rows_arbitrary_full_dataset(
-            start_row=start_row,
-            end_row=end_row
-        )
+        data_for_test, target_for_test = self._full_dataset.get_arrays(start_row, end_row)
         pred_proba_result = self._model.predict_proba(data_for_test)
 
-        pred_result = list(map(lambda x: 0 if x < proba_cut_threshold else 1, pred_proba_result[:, 1]))
-        self._inc_tot_pred_result.extend(pred_result)
-        self._inc_tot_pred_related_target.extend(target_for_test)
+        pred_result = (pred_proba_result[:, 1] >= proba_cut_threshold).astype(int)
+        self._accumulate_incremental_prediction(pred_result, target_for_test)
 
 
 
 
 class ModelRiverOnlineMLWorkflow(ModelExperimentWorkflow):
 
+    def _learn_dict_rows(self, dict_rows: list, target: np.ndarray):
+        learn_one = self._model.learn_one
+        for i, row in enumerate(tqdm(dict_rows)):
+            learn_one(row, target[i])
+
+    def _predict_dict_rows(self, dict_rows: list) -> list:
+        predict_one = self._model.predict_one
+        return [predict_one(row) for row in tqdm(dict_rows)]
+
     def train_model(self, is_reset_mode=True, train_num_limit=-1):
         """
         training model method on RiverML online learning implementation has slightly different from sklearn
@@ -322,8 +406,8 @@ class ModelRiverOnlineMLWorkflow(ModelExperimentWorkflow):
         :param train_num_limit:
         :return:
         """
-        data_for_train, target_for_train = self.limited_rows_split_train_dataset(train_num_limit)
-        print('Training Features Shape: ', data_for_train.shape)
+        data_for_train, target_for_train = self._train_dataset.get_dict_rows(end_row=train_num_limit)
+        print('Training Features Shape: ', (len(data_for_train), self._train_features.shape[1]))
         print('Training Target Shape: ', target_for_train.shape)
 
         #-------------------------------------------------#
@@ -334,16 +418,12 @@ class ModelRiverOnlineMLWorkflow(ModelExperimentWorkflow):
             # reset model(not incremental from previous step)
             self.reset_model()
 
-        for index, raw in tqdm(data_for_train.iterrows(), total=data_for_train.shape[0]):
-            self._model.learn_one(raw, target_for_train[index])
+        self._learn_dict_rows(data_for_train, target_for_train)
 
     def train_model_by_arbitrary_full_data(self, sub_data_start_row, sub_data_end_raw, is_reset_mode=True):
 
-        data_for_train, target_for_train = self.subset_rows_arbitrary_full_dataset(
-            start_row=sub_data_start_row,
-            end_row=sub_data_end_raw
-        )
-        print('Training Features Shape: ', data_for_train.shape)
+        data_for_train, target_for_train = self._full_dataset.get_dict_rows(sub_data_start_row, sub_data_end_raw)
+        print('Training Features Shape: ', (len(data_for_train), self._full_data_features.shape[1]))
         print('Training Target Shape: ', target_for_train.shape)
 
         # -------------------------------------------------#
@@ -354,16 +434,12 @@ class ModelRiverOnlineMLWorkflow(ModelExperimentWorkflow):
             # reset model(not incremental from previous step)
             self.reset_model()
 
-        for index, raw in tqdm(data_for_train.iterrows(), total=data_for_train.shape[0]):
-            self._model.learn_one(raw, target_for_train[index])
+        self._learn_dict_rows(data_for_train, target_for_train)
 
     def train_model_by_arbitrary_split_train_data(self, sub_data_start_row, sub_data_end_raw, is_reset_mode=True):
 
-        data_for_train, target_for_train = self.subset_rows_arbitrary_split_train_dataset(
-            start_row=sub_data_start_row,
-            end_row=sub_data_end_raw
-        )
-        print('Training Features Shape: ', data_for_train.shape)
+        data_for_train, target_for_train = self._train_dataset.get_dict_rows(sub_data_start_row, sub_data_end_raw)
+        print('Training Features Shape: ', (len(data_for_train), self._train_features.shape[1]))
         print('Training Target Shape: ', target_for_train.shape)
 
         # -------------------------------------------------#
@@ -374,21 +450,19 @@ class ModelRiverOnlineMLWorkflow(ModelExperimentWorkflow):
             # reset model(not incremental from previous step)
             self.reset_model()
 
-        for index, raw in tqdm(data_for_train.iterrows(), total=data_for_train.shape[0]):
-            self._model.learn_one(raw, target_for_train[index])
+        self._learn_dict_rows(data_for_train, target_for_train)
 
 
     def batch_pred_test_dataset(self):
-        pred_result = []
-        for index, raw in tqdm(self._test_features.iterrows(), total=self._test_features.shape[0]):
-            test_pred = self._model.predict_one(raw)
-            pred_result.append(test_pred)
+        data_for_test, _ = self._test_dataset.get_dict_rows()
+        pred_result = self._predict_dict_rows(data_for_test)
 
         return pred_result, self._test_target
 
     def batch_pred_prob_test_dataset(self):
         pred_prob_result = []
-        for index, raw in tqdm(self._test_features.iterrows(), total=self._test_features.shape[0]):
+        data_for_test, _ = self._test_dataset.get_dict_rows()
+        for raw in tqdm(data_for_test):
             pred_prob_list = []
             proba = self._model.predict_proba_one(raw)
             # river ML pred_prob return a dictionary
@@ -404,51 +478,32 @@ class ModelRiverOnlineMLWorkflow(ModelExperimentWorkflow):
 
     def batch_pred_arbitrary_full_data(self, sub_data_start_row, sub_data_end_row) -> (list, list):
 
-        pred_result = []
-        data_for_test, target_for_test = self.subset_rows_arbitrary_full_dataset(
-            start_row=sub_data_start_row,
-            end_row=sub_data_end_row
-        )
-
-        for index, raw in tqdm(data_for_test.iterrows(), total=data_for_test.shape[0]):
-            test_pred = self._model.predict_one(raw)
-            pred_result.append(test_pred)
+        data_for_test, target_for_test = self._full_dataset.get_dict_rows(sub_data_start_row, sub_data_end_row)
+        pred_result = self._predict_dict_rows(data_for_test)
 
         return pred_result, target_for_test
 
     def incremental_prediction(self, start_row=int, end_row=int) -> None:
 
-        pred_result = []
-        data_for_test, target_for_test = self.subset_rows_arbitrary_full_dataset(
-            start_row=start_row,
-            end_row=end_row
-        )
-
-        for index, row in tqdm(data_for_test.iterrows(), total=data_for_test.shape[0]):
-            test_pred = self._model.predict_one(row)
-            pred_result.append(test_pred)
+        data_for_test, target_for_test = self._full_dataset.get_dict_rows(start_row, end_row)
+        pred_result = self._predict_dict_rows(data_for_test)
 
-        self._inc_tot_pred_result.extend(pred_result)
-        self._inc_tot_pred_related_target.extend(target_for_test)
+        self._accumulate_incremental_prediction(pred_result, target_for_test)
 
 
     def incremental_prediction_proba(self, start_row=0, end_row=-1, proba_cut_threshold=0.2) -> None:
 
         pred_result = []
-        data_for_test, target_for_test = self.subset_rows_arbitrary_full_dataset(
-            start_row=start_row,
-            end_row=end_row
-        )
+        data_for_test, target_for_test = self._full_dataset.get_dict_rows(start_row, end_row)
 
-        for index, row in tqdm(data_for_test.iterrows(), total=data_for_test.shape[0]):
+        for row in tqdm(data_for_test):
             test_pred_proba = self._model.predict_proba_one(row)
             if test_pred_proba[1] <= proba_cut_threshold:
                 pred_result.append(0)
             else :
                 pred_result.append(1)
 
-        self._inc_tot_pred_result.extend(pred_result)
-        self._inc_tot_pred_related_target.extend(target_for_test)
+        self._accumulate_incremental_prediction(pred_result, target_for_test)
 
 
 if __name__ == '__main__':
@@ -462,55 +517,31 @@ if __name__ == '__main__':
     model_riverml_HTC = tree.HoeffdingTreeClassifier()
     model_riverml_AdaRF = ensemble.AdaptiveRandomForestClassifier()
 
-    exp_flow_sklearn = ModelSklearnWorkflow(AirlineDataPreparation())
-    exp_flow_riverml_HTC = ModelRiverOnlineMLWorkflow(AirlineDataPreparation())
-    exp_flow_riverml_AdaRF = ModelRiverOnlineMLWorkflow(AirlineDataPreparation())
+    from ParallelExperimentRunner import ExperimentSpec, ParallelExperimentRunner
+
+    # data is prepared once and shared by the workflows, each model experiment is running in its own process
+    airline_data_preparation = AirlineDataPreparation()
+    exp_flow_sklearn = ModelSklearnWorkflow(airline_data_preparation)
+    exp_flow_riverml_HTC = ModelRiverOnlineMLWorkflow(airline_data_preparation)
+    exp_flow_riverml_AdaRF = ModelRiverOnlineMLWorkflow(airline_data_preparation)
 
     exp_flow_sklearn.set_model(model_sklearn)
     exp_flow_riverml_HTC.set_model(model_riverml_HTC)
     exp_flow_riverml_AdaRF.set_model(model_riverml_AdaRF)
 
-    exp_flow_sklearn.train_model_by_arbitrary_full_data(1, 501)
-    exp_flow_riverml_HTC.train_model_by_arbitrary_full_data(1, 501)
-    exp_flow_riverml_AdaRF.train_model_by_arbitrary_full_data(1, 501)
-
-    exp_flow_sklearn.incremental_prediction(501, 2001)
-    exp_flow_riverml_HTC.incremental_prediction(501, 2001)
-    exp_flow_riverml_AdaRF.incremental_prediction(501, 2001)
-    i_start = 2001
-    i_size = 100
-    i_step = 100
-
-    x_text_point = []
-    acc_result_sklearn = []
-    acc_result_riverml_HTC = []
-    acc_result_riverml_AdaRF = []
-
-    while(True):
-
-        x_text_point.append(i_start + 0.5 * i_size)
-
-        # sklearn one step operation
-        exp_flow_sklearn.incremental_prediction(i_start, i_start + i_size)
-        acc, recall = exp_flow_sklearn.incremental_evaluate_model_get_accuracy_recall()
-        acc_result_sklearn.append(acc)
-
-        # riverml one step operation
-        exp_flow_riverml_HTC.incremental_prediction(i_start, i_start + i_size)
-        acc, recall = exp_flow_riverml_HTC.incremental_evaluate_model_get_accuracy_recall()
-        acc_result_riverml_HTC.append(acc)
-        exp_flow_riverml_HTC.train_model_by_arbitrary_full_data(i_start, i_start + i_size, is_reset_mode=False)
-
-        #riverml adaptive random forest one step operation
-        exp_flow_riverml_AdaRF.incremental_prediction(i_start, i_start + i_size)
-        acc, recall = exp_flow_riverml_AdaRF.incremental_evaluate_model_get_accuracy_recall()
-        acc_result_riverml_AdaRF.append(acc)
-        exp_flow_riverml_AdaRF.train_model_by_arbitrary_full_data(i_start, i_start + i_size, is_reset_mode=False)
-
-        i_start+=i_step
+    experiment_runner = ParallelExperimentRunner([
+        ExperimentSpec('sklearn', exp_flow_sklearn),
+        ExperimentSpec('river_htc', exp_flow_riverml_HTC, online_learning=True),
+        ExperimentSpec('river_adarf', exp_flow_riverml_AdaRF, online_learning=True),
+    ])
+    experiment_curves = experiment_runner.run(
+        init_train_range=(1, 501), init_predict_range=(501, 2001), start_row=2001, step_size=100, end_row=70000
+    )
 
-        if i_start > 70000:
-            break
+    x_text_point = experiment_curves['sklearn']['x']
+    acc_result_sklearn = experiment_curves['sklearn']['accuracy']
+    acc_result_riverml_HTC = experiment_curves['river_htc']['accuracy']
+    acc_result_riverml_AdaRF = experiment_curves['river_adarf']['accuracy']
 
     x_text_point = [i * 0.0001 for i in x_text_point]
     acc_result_sklearn = [i * 100 for i in acc_result_sklearn]
@@ -0,0 +1,171 @@
+import multiprocessing
+import statistics
+from concurrent import futures
+
+
+class ExperimentSpec:
+    """
+    One model experiment, the workflow (holding data and model) is run in its own process.
+    """
+
+    def __init__(self, name: str, workflow, online_learning=False):
+        """
+        :param name: experiment name, key of the merged result
+        :param workflow: ModelExperimentWorkflow with model set
+        :param online_learning: learning each step after predicting it (river model), otherwise only initial training
+        """
+        self.name = name
+        self.workflow = workflow
+        self.online_learning = online_learning
+
+
+def run_incremental_experiment(spec: ExperimentSpec, init_train_range=(1, 501), init_predict_range=(501, 2001),
+                               start_row=2001, step_size=100, end_row=70000, proba_cut_threshold=None,
+                               init_proba_cut_threshold=None, train_on_split_data=False) -> dict:
+    """
+    prequential loop of one workflow: initial training, then predict one step, evaluate the accumulated result
+    and (online learning only) learn the step.
+    :param spec: ExperimentSpec
+    :param init_train_range: (start_row, end_row) of initial training
+    :param init_predict_range: (start_row, end_row) of initial prediction
+    :param start_row: start row of the first step
+    :param step_size: number of rows of one step
+    :param end_row: stopping after start row of step exceed end_row
+    :param proba_cut_threshold: casting prediction probability to class with threshold, predicting class if None
+    :param init_proba_cut_threshold: threshold of initial prediction, same as proba_cut_threshold if None
+    :param train_on_split_data: training on split training dataset instead of full dataset
+    :return: dict of curves, `x`, `accuracy` and `recall`
+    """
+    workflow = spec.workflow
+    if train_on_split_data:
+        train_model = workflow.train_model_by_arbitrary_split_train_data
+    else:
+        train_model = workflow.train_model_by_arbitrary_full_data
+
+    def incremental_predict(i_start, i_end, proba_cut):
+        if proba_cut_threshold is None:
+            workflow.incremental_prediction(i_start, i_end)
+        else:
+            workflow.incremental_prediction_proba(i_start, i_end, proba_cut)
+
+    train_model(*init_train_range)
+    incremental_predict(*init_predict_range, init_proba_cut_threshold if init_proba_cut_threshold is not None
+                        else proba_cut_threshold)
+
+    curves = {'x': [], 'accuracy': [], 'recall': []}
+    i_start = start_row
+    while i_start <= end_row:
+        curves['x'].append(i_start + 0.5 * step_size)
+        incremental_predict(i_start, i_start + step_size, proba_cut_threshold)
+        acc, recall = workflow.incremental_evaluate_model_get_accuracy_recall()
+        curves['accuracy'].append(acc)
+        curves['recall'].append(recall)
+        if spec.online_learning:
+            train_model(i_start, i_start + step_size, is_reset_mode=False)
+        i_start += step_size
+
+    return curves
+
+
+def run_calibration_experiment(spec: ExperimentSpec, train_range=(1, 5000)):
+    """
+    training on split training dataset, then predicting probability of the split testing dataset
+    :param spec: ExperimentSpec
+    :param train_range: (start_row, end_row) of training
+    :return: (prediction probability of true class, target)
+    """
+    spec.workflow.train_model_by_arbitrary_split_train_data(*train_range)
+    proba, target = spec.workflow.batch_pred_prob_test_dataset()
+    return proba[:, 1], target
+
+
+# experiment specs inherited by forked worker processes, data is shared copy-on-write instead of pickled
+_forked_experiment_specs = []
+
+
+def _run_forked_experiment(spec_index, experiment_function, kwargs):
+    return experiment_function(_forked_experiment_specs[spec_index], **kwargs)
+
+
+def _run_experiment(spec, experiment_function, kwargs):
+    return experiment_function(spec, **kwargs)
+
+
+class ParallelExperimentRunner:
+    """
+    Running experiments of several models concurrently, one process per experiment spec.
+    With `fork` start method the workers inherit the specs (data frames and models) read-only from the parent,
+    otherwise the spec is pickled to the worker. Results are merged by experiment name.
+    """
+
+    def __init__(self, experiment_specs: list, n_workers=None, start_method=None):
+        """
+        :param experiment_specs: list of ExperimentSpec
+        :param n_workers: number of processes, default min(number of experiments, cpu count), 1 to run serially
+        :param start_method: multiprocessing start method, e.g. `fork` or `spawn`, None for the platform default
+                             (`fork` is unsafe on macOS and not available on Windows)
+        """
+        names = [spec.name for spec in experiment_specs]
+        if len(set(names)) != len(names):
+            raise ValueError("experiment names should be unique: {}".format(names))
+        self._experiment_specs = list(experiment_specs)
+        if n_workers is None:
+            n_workers = min(len(self._experiment_specs), multiprocessing.cpu_count())
+        self._n_workers = max(1, n_workers)
+        # raising ValueError for a start method not available on this platform
+        self._mp_context = multiprocessing.get_context(start_method)
+
+    def run(self, experiment_function=run_incremental_experiment, **kwargs) -> dict:
+        """
+        :param experiment_function: module level function(spec, **kwargs) returning the result of one experiment
+        :param kwargs: arguments of experiment_function
+        :return: dict of experiment name to result
+        """
+        global _forked_experiment_specs
+
+        if self._n_workers == 1 or len(self._experiment_specs) <= 1:
+            return {spec.name: experiment_function(spec, **kwargs) for spec in self._experiment_specs}
+
+        context = self._mp_context
+        is_forking = context.get_start_method() == 'fork'
+        if is_forking:
+            _forked_experiment_specs = self._experiment_specs
+
+        results = {}
+        try:
+            with futures.ProcessPoolExecutor(max_workers=self._n_workers, mp_context=context) as executor:
+                future_to_name = {}
+                for i, spec in enumerate(self._experiment_specs):
+                    if is_forking:
+                        future = executor.submit(_run_forked_experiment, i, experiment_function, kwargs)
+                    else:
+                        future = executor.submit(_run_experiment, spec, experiment_function, kwargs)
+                    future_to_name[future] = spec.name
+                for future in futures.as_completed(future_to_name):
+                    results[future_to_name[future]] = future.result()
+                    print("experiment {} finished".format(future_to_name[future]))
+        finally:
+            _forked_experiment_specs = []
+
+        # keeping the order of experiment specs
+        return {spec.name: results[spec.name] for spec in self._experiment_specs}
+
+
+def merge_experiment_curves(run_results: list, curve_name='accuracy', scale=100) -> dict:
+    """
+    merging curves of repeated runs (e.g. different random seeds) into mean and standard error per point
+    :param run_results: list of ParallelExperimentRunner.run result, one per repeated run
+    :param curve_name: curve to merge, `accuracy` or `recall`
+    :param scale: multiplying the merged value, e.g. 100 for percentage
+    :return: dict of experiment name to {'x', 'mean', 'error'}
+    """
+    merged_curves = {}
+    for name in run_results[0].keys():
+        curves = [run_result[name][curve_name] for run_result in run_results]
+        points = list(zip(*curves))
+        merged_curves[name] = {
+            'x': run_results[0][name]['x'],
+            'mean': [statistics.mean(point) * scale for point in points],
+            'error': [statistics.stdev(point) * scale if len(point) > 1 else 0 for point in points],
+        }
+    return merged_curves
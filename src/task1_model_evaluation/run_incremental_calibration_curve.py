@@ -10,6 +10,7 @@ from sklearn.ensemble import RandomForestClassifier
 
 from tools.DataPreparation import AirlineDataPreparation
 from ModelExperimentWorkflow import ModelSklearnWorkflow, ModelRiverOnlineMLWorkflow
+from ParallelExperimentRunner import ExperimentSpec, ParallelExperimentRunner, run_calibration_experiment
 
 from sklearn.calibration import calibration_curve
 
@@ -51,9 +52,11 @@ acc_result_riverml_HTC = []
 acc_result_riverml_AdaRF = []
 
 ## create model experiment workflow
-exp_flow_sklearn = ModelSklearnWorkflow(AirlineDataPreparation(), random_seed=42)
-exp_flow_riverml_HTC = ModelRiverOnlineMLWorkflow(AirlineDataPreparation(), random_seed=42)
-exp_flow_riverml_AdaRF = ModelRiverOnlineMLWorkflow(AirlineDataPreparation(), random_seed=42)
+# data is prepared once and shared by the workflows
+airline_data_preparation = AirlineDataPreparation()
+exp_flow_sklearn = ModelSklearnWorkflow(airline_data_preparation, random_seed=42)
+exp_flow_riverml_HTC = ModelRiverOnlineMLWorkflow(airline_data_preparation, random_seed=42)
+exp_flow_riverml_AdaRF = ModelRiverOnlineMLWorkflow(airline_data_preparation, random_seed=42)
 
 exp_flow_sklearn.set_model(model_sklearn)
 exp_flow_riverml_HTC.set_model(model_riverml_HTC)
@@ -90,12 +93,15 @@ exp_flow_dict = {'sklearn':
 
 cplot = CalibrationPlot()
 
-for name, exp in exp_flow_dict.items():
-    exp['workflow'].train_model_by_arbitrary_split_train_data(1, 5000)
-    proba, target = exp['workflow'].batch_pred_prob_test_dataset()
+# training and predicting of each model is running in its own process
+experiment_runner = ParallelExperimentRunner(
+    [ExperimentSpec(name, exp['workflow']) for name, exp in exp_flow_dict.items()]
+)
+calibration_results = experiment_runner.run(run_calibration_experiment, train_range=(1, 5000))
+
+for name, (proba, target) in calibration_results.items():
     print(name)
     print(proba)
-    proba = proba[:, 1]
 
     fraction_of_positives, mean_predicted_value = calibration_curve(target, proba, n_bins=10)
     cplot.add_calibration_curve(mean_predicted_value, fraction_of_positives, label=name)
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+
+def predict_proba_true_class(model, data: pd.DataFrame, true_class=1) -> np.ndarray:
+    """
+    Batch scoring of river model, return prediction probability of true class as numpy array.
+    The data frame is converted once into plain dict rows instead of building a pd.Series per row,
+    `predict_proba_many` is used if the model supports it.
+    Probability is np.nan if the model can not provide the true class probability (e.g. not trained yet).
+    :param model: river model
+    :param data: features data frame
+    :param true_class: class label of true class
+    :return: np.ndarray of probability in float
+    """
+    if len(data.index) == 0:
+        return np.empty(0, dtype=float)
+
+    if hasattr(model, 'predict_proba_many'):
+        proba_df = model.predict_proba_many(data)
+        if true_class in proba_df.columns:
+            return proba_df[true_class].to_numpy(dtype=float, na_value=np.nan)
+        return np.full(len(data.index), np.nan)
+
+    predict_proba_one = model.predict_proba_one
+    return np.fromiter(
+        (predict_proba_one(x).get(true_class, np.nan) for x in data.to_dict(orient='records')),
+        dtype=float,
+        count=len(data.index)
+    )
+
+
+def cast_proba_to_class(pred_proba: np.ndarray, proba_cut_point=0.5) -> np.ndarray:
+    """
+    casting probability to binary class, 1 if probability >= proba_cut_point else 0.
+    :param pred_proba: probability array
+    :param proba_cut_point: threshold
+    :return: np.ndarray of int
+    """
+    return (pred_proba >= proba_cut_point).astype(int)
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+
+class IncrementalLabelEncoder:
+    """
+    Label encoder with a category -> code dictionary, codes are stable once assigned.
+    Unlike sklearn LabelEncoder it can be extended incrementally, e.g. chunk by chunk in a streaming read:
+    unseen category is appended with the next code (`handle_unknown='extend'`), or mapped to `unknown_value`.
+    Missing value (NaN / None) is mapped to `missing_value`, or kept as NaN if `missing_value` is None.
+    """
+
+    def __init__(self, classes=None, handle_unknown='extend', unknown_value=-1, missing_value=None):
+        """
+        :param classes: initial categories, coded 0, 1, 2, ... in the given order
+        :param handle_unknown: `extend` to assign a new code, `ignore` to map to `unknown_value`,
+                               `error` to raise ValueError
+        :param unknown_value: code of unseen category when handle_unknown is `ignore`
+        :param missing_value: reserved code of missing value, must not collide with category codes (e.g. -2),
+                              None to keep missing value as NaN
+        """
+        if handle_unknown not in ('extend', 'ignore', 'error'):
+            raise ValueError("handle_unknown {} is not supported, acceptance: extend, ignore, error".format(
+                handle_unknown))
+        self._mapping = {}
+        self._handle_unknown = handle_unknown
+        self._unknown_value = unknown_value
+        self._missing_value = missing_value
+        if classes is not None:
+            self.extend(classes)
+
+    @property
+    def classes_(self) -> list:
+        return list(self._mapping.keys())
+
+    @property
+    def mapping(self) -> dict:
+        return self._mapping
+
+    def __len__(self):
+        return len(self._mapping)
+
+    def extend(self, categories):
+        """
+        appending unseen categories with new codes, in order of first appearance (or sorted if fitting a column)
+        :param categories: iterable of categories
+        :return: self
+        """
+        for category in categories:
+            if category not in self._mapping:
+                self._mapping[category] = len(self._mapping)
+        return self
+
+    def fit(self, values):
+        """
+        extending categories of values in sorted order, same codes as sklearn LabelEncoder on the first fit
+        :param values: array-like
+        :return: self
+        """
+        categories = pd.unique(pd.Series(values).dropna())
+        try:
+            categories = sorted(categories)
+        except TypeError:
+            pass
+        return self.extend(categories)
+
+    def transform(self, values, handle_unknown=None) -> np.ndarray:
+        """
+        mapping values to codes by dictionary lookup
+        :param values: array-like
+        :param handle_unknown: overriding handle_unknown of the encoder for this call
+        :return: np.ndarray of code, int64 if no missing value (or missing value is coded) else float64 with NaN
+        """
+        if handle_unknown is None:
+            handle_unknown = self._handle_unknown
+        series = pd.Series(values)
+        codes = series.map(self._mapping)
+        unseen_mask = codes.isna() & series.notna()
+        if unseen_mask.any():
+            if handle_unknown == 'error':
+                raise ValueError("unseen categories: {}".format(list(pd.unique(series[unseen_mask]))[:10]))
+            if handle_unknown == 'extend':
+                self.extend(pd.unique(series[unseen_mask]))
+                codes = series.map(self._mapping)
+            else:
+                codes[unseen_mask] = self._unknown_value
+        if self._missing_value is not None:
+            codes[series.isna()] = self._missing_value
+        if codes.isna().any():
+            return codes.to_numpy(dtype=np.float64)
+        return codes.to_numpy(dtype=np.int64)
+
+    def fit_transform(self, values) -> np.ndarray:
+        return self.fit(values).transform(values)
+
+    def transform_one(self, value, handle_unknown=None):
+        """
+        mapping one value to code, O(1) dictionary lookup for streaming (row by row) path
+        :param value: category
+        :param handle_unknown: overriding handle_unknown of the encoder for this call
+        :return: code, `missing_value` for missing value
+        """
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            return self._missing_value
+        code = self._mapping.get(value)
+        if code is not None:
+            return code
+        if handle_unknown is None:
+            handle_unknown = self._handle_unknown
+        if handle_unknown == 'error':
+            raise ValueError("unseen category: {}".format(value))
+        if handle_unknown == 'extend':
+            self._mapping[value] = len(self._mapping)
+            return self._mapping[value]
+        return self._unknown_value
+
+    def inverse_transform(self, codes) -> list:
+        categories = self.classes_
+        return [categories[int(code)] if 0 <= code < len(categories) else None for code in codes]
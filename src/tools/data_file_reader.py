@@ -0,0 +1,165 @@
+import multiprocessing
+import os
+import time
+from concurrent import futures
+
+import numpy as np
+import pandas as pd
+
+
+
+def _import_pyarrow_feather():
+    try:
+        import pyarrow.feather
+    except ImportError:
+        raise ImportError("pyarrow is required for feather file, please install pyarrow")
+    return pyarrow.feather
+
+
+def downcast_numeric_dtypes(df: pd.DataFrame, lossy_float=False, exclude=None) -> pd.DataFrame:
+    """
+    Downcasting int64 / float64 columns to the smallest safe type, inplace.
+    Integer columns are downcast by value range (int8 ~ int64).
+    Float columns are downcast to float32 only if every value round-trips exactly, unless `lossy_float` is True.
+    :param df: data frame
+    :param lossy_float: downcast float64 to float32 even if precision is lost
+    :param exclude: list of column names not to downcast
+    :return: df
+    """
+    exclude = set(exclude) if exclude is not None else set()
+    for col in df.columns:
+        if col in exclude:
+            continue
+        dtype = df[col].dtype
+        if pd.api.types.is_integer_dtype(dtype) and dtype.itemsize > 1:
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+        elif pd.api.types.is_float_dtype(dtype) and dtype.itemsize > 4:
+            values = df[col].to_numpy()
+            downcast_values = values.astype(np.float32)
+            if lossy_float or np.array_equal(downcast_values.astype(values.dtype), values, equal_nan=True):
+                df[col] = downcast_values
+    return df
+
+
+def read_data_file(file_path: str, usecols=None, dtype=None, downcast=False) -> pd.DataFrame:
+    """
+    Reading one data file into data frame, file type is chosen by extension.
+    csv : read by pd.read_csv with column projection and dtype applied while parsing, file is memory mapped.
+    parquet / feather : only projected columns are read, file is memory mapped instead of copied into buffer.
+    :param file_path: path of csv, parquet or feather file
+    :param usecols: list of column names to read, None for all columns
+    :param dtype: dict of column name to dtype (or one dtype for all columns), applied when reading
+    :param downcast: downcasting int64 / float64 to the smallest safe type after reading
+    :return: pd.DataFrame
+    """
+    file_extension = os.path.splitext(file_path)[1].lower()
+    if usecols is not None:
+        usecols = list(usecols)
+
+    if file_extension == '.parquet':
+        df = pd.read_parquet(file_path, columns=usecols, memory_map=True)
+    elif file_extension == '.feather':
+        pa_feather = _import_pyarrow_feather()
+        df = pa_feather.read_table(file_path, columns=usecols, memory_map=True).to_pandas()
+    else:
+        # csv (default, keeping the legacy behavior for file without known extension)
+        df = pd.read_csv(file_path, usecols=usecols, dtype=dtype, memory_map=True)
+
+    if file_extension in ('.parquet', '.feather'):
+        df = _apply_dtype(df, dtype)
+    if downcast:
+        # explicitly specified dtype is kept as is
+        downcast_numeric_dtypes(df, exclude=list(dtype.keys()) if isinstance(dtype, dict) else None)
+    return df
+
+
+def read_data_files(file_path_list: list, usecols=None, dtype=None, downcast=False, n_workers=None,
+                    show_progress=True) -> pd.DataFrame:
+    """
+    Reading multiple data files concurrently in a process pool and concatenating them once, in the given order.
+    Files are parsed in worker processes (csv parsing holds the GIL), only the parsed frames are sent back.
+    :param file_path_list: list of file path
+    :param usecols: list of column names to read, None for all columns
+    :param dtype: dict of column name to dtype, applied when reading
+    :param downcast: downcasting int64 / float64 to the smallest safe type, done in workers before sending back
+    :param n_workers: number of worker processes, default min(number of files, cpu count), 1 to read serially
+    :param show_progress: printing loading progress
+    :return: concat pd.DataFrame
+    """
+    n_files = len(file_path_list)
+    if n_workers is None:
+        n_workers = min(n_files, multiprocessing.cpu_count())
+
+    df_list = [None] * n_files
+    start_time = time.time()
+
+    def print_progress(n_done):
+        if show_progress:
+            print("\rloading {}/{} files, {:.1f} sec".format(n_done, n_files, time.time() - start_time),
+                  end='' if n_done < n_files else '\n', flush=True)
+
+    if n_workers <= 1 or n_files <= 1:
+        for i, file_path in enumerate(file_path_list):
+            df_list[i] = read_data_file(file_path, usecols=usecols, dtype=dtype, downcast=downcast)
+            print_progress(i + 1)
+    else:
+        with futures.ProcessPoolExecutor(max_workers=n_workers) as executor:
+            future_index = {
+                executor.submit(read_data_file, file_path, usecols, dtype, downcast): i
+                for i, file_path in enumerate(file_path_list)
+            }
+            for n_done, future in enumerate(futures.as_completed(future_index), start=1):
+                df_list[future_index[future]] = future.result()
+                print_progress(n_done)
+
+    # single concat, output blocks are allocated once for all files
+    concat_dataframe = pd.concat(df_list, copy=False)
+    del df_list
+    return concat_dataframe
+
+
+def _import_pyarrow_parquet():
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("pyarrow is required for reading parquet in chunks, please install pyarrow")
+    return pyarrow.parquet
+
+
+def iter_data_file_chunks(file_path: str, chunk_size=100000, usecols=None, dtype=None):
+    """
+    Reading one data file lazily, yielding data frame chunks of at most `chunk_size` rows in file order.
+    csv is read by pd.read_csv(chunksize), parquet by row group batches, feather is memory mapped and sliced.
+    Only one chunk is materialized at a time.
+    :param file_path: path of csv, parquet or feather file
+    :param chunk_size: number of rows per chunk
+    :param usecols: list of column names to read, None for all columns
+    :param dtype: dict of column name to dtype, applied when reading
+    :return: generator of pd.DataFrame
+    """
+    file_extension = os.path.splitext(file_path)[1].lower()
+    if usecols is not None:
+        usecols = list(usecols)
+
+    if file_extension == '.parquet':
+        pa_parquet = _import_pyarrow_parquet()
+        parquet_file = pa_parquet.ParquetFile(file_path, memory_map=True)
+        for record_batch in parquet_file.iter_batches(batch_size=chunk_size, columns=usecols):
+            yield _apply_dtype(record_batch.to_pandas(), dtype)
+    elif file_extension == '.feather':
+        pa_feather = _import_pyarrow_feather()
+        table = pa_feather.read_table(file_path, columns=usecols, memory_map=True)
+        for offset in range(0, table.num_rows, chunk_size):
+            yield _apply_dtype(table.slice(offset, chunk_size).to_pandas(), dtype)
+    else:
+        with pd.read_csv(file_path, usecols=usecols, dtype=dtype, chunksize=chunk_size) as chunk_reader:
+            for chunk in chunk_reader:
+                yield chunk
+
+
+def _apply_dtype(df: pd.DataFrame, dtype=None) -> pd.DataFrame:
+    if dtype is None:
+        return df
+    if isinstance(dtype, dict):
+        dtype = {col: col_dtype for col, col_dtype in dtype.items() if col in df.columns}
+    return df.astype(dtype)
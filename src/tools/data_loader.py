@@ -10,49 +10,77 @@ from sklearn.pipeline import make_pipeline
 
 from time import time
 
+from tools.data_file_reader import read_data_file, read_data_files, iter_data_file_chunks
+from tools.label_encoder_registry import LabelEncoderRegistry
+from tools.time_partition_index import TimePartitionIndex
+
 class DataLoader(ABC):
 
     """
     Abstraction class of data_loader, which is responsible for reading data from file (generally should be csv file)
     """
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, usecols=None, dtype=None, downcast=False, n_load_workers=None,
+                 label_encoder_registry: LabelEncoderRegistry = None):
         """
         Initialization of DataLoader, which is going to read data from external data file.
         Loaded as pandas dataframe for following usage in ML pipeline
-        :param file_path: input data file path. Generally csv files.
+        :param file_path: input data file path. csv, parquet or feather files.
+        :param usecols: list of columns to load, unwanted columns are never read (instead of drop_feature after load)
+        :param dtype: dict of column name to dtype applied when reading
+        :param downcast: downcasting int64 / float64 columns to the smallest safe type
+        :param n_load_workers: number of processes reading a list of files concurrently,
+                               default min(number of files, cpu count), 1 to read serially
+        :param label_encoder_registry: label encoders shared with other loaders (e.g. training / testing loader),
+                                       a new registry is created if not provided
         """
         self._raw_df = None
         self._op_df = self.get_raw_df()
+        self._usecols = usecols
+        self._dtype = dtype
+        self._downcast = downcast
+        self._label_encoder_registry = label_encoder_registry if label_encoder_registry is not None \
+            else LabelEncoderRegistry()
 
         if isinstance(file_path, str):
-            self._raw_df = self._read_data_from_single_file(file_path)
+            self._raw_df = self._read_data_from_single_file(file_path, usecols, dtype, downcast)
         elif isinstance(file_path, list):
-            self._raw_df = self._read_data_from_multiple_files(file_path)
+            self._raw_df = self._read_data_from_multiple_files(file_path, usecols, dtype, downcast, n_load_workers)
 
 
     @staticmethod
-    def _read_data_from_single_file(file_path) -> pd.DataFrame:
+    def _read_data_from_single_file(file_path, usecols=None, dtype=None, downcast=False) -> pd.DataFrame:
         """
         Reading data from single file with string of path.
-        :param file_path: input file path, should be csv in general case.
+        :param file_path: input file path, csv in general case, parquet / feather are memory mapped.
         :type file_path: str
+        :param usecols: list of columns to load
+        :param dtype: dict of column name to dtype
+        :param downcast: downcasting numeric columns to the smallest safe type
         :return: loaded data as pandas dataframe
         :rtype: pd.Dataframe
         """
-        df = pd.read_csv(file_path)
+        df = read_data_file(file_path, usecols=usecols, dtype=dtype, downcast=downcast)
         return df
 
     @staticmethod
-    def _read_data_from_multiple_files(file_path_list) -> pd.DataFrame:
+    def _read_data_from_multiple_files(file_path_list, usecols=None, dtype=None, downcast=False,
+                                       n_workers=None) -> pd.DataFrame:
         """
         Reading data from multiple files with a list of string.
+        Files are read concurrently in a process pool and concatenated once in the given order.
         :param file_path_list: list of input files path.
         :type file_path_list: list
+        :param usecols: list of columns to load
+        :param dtype: dict of column name to dtype
+        :param downcast: downcasting numeric columns to the smallest safe type
+        :param n_workers: number of worker processes
         :return: loaded data as concat pandas data frame
         :rtype: pd.Dataframe
         """
-        concat_dataframe = pd.concat(map(pd.read_csv, file_path_list))
+        concat_dataframe = read_data_files(
+            file_path_list, usecols=usecols, dtype=dtype, downcast=downcast, n_workers=n_workers
+        )
         return concat_dataframe
 
     def fill_na_with_zero(self):
@@ -64,12 +92,15 @@ class DataLoader(ABC):
 
     def label_encoding(self):
         """
-        data preprocessing step, string encoding to int
+        data preprocessing step, string encoding to int.
+        encoders are kept in label encoder registry, column already in registry is encoded with the same codes,
+        unseen categories are appended with new codes.
         :return:
         """
-        for col in self._op_df:
-            if self._op_df[col].dtype == 'object':
-                self._op_df[col] = LabelEncoder().fit_transform(self._op_df[col])
+        self._label_encoder_registry.encode_frame(self._op_df)
+
+    def get_label_encoder_registry(self) -> LabelEncoderRegistry:
+        return self._label_encoder_registry
 
     def do_one_hot_encoding_by_col(self, col_name: str):
         """
@@ -118,8 +149,10 @@ class DataLoader(ABC):
 
 class GeneralDataLoader(DataLoader):
 
-    def __init__(self, file_path):
-        super().__init__(file_path)
+    def __init__(self, file_path, usecols=None, dtype=None, downcast=False, n_load_workers=None,
+                 label_encoder_registry=None):
+        super().__init__(file_path, usecols=usecols, dtype=dtype, downcast=downcast, n_load_workers=n_load_workers,
+                         label_encoder_registry=label_encoder_registry)
         self._op_df = self.get_raw_df()
 
         # encoding data if it is not int
@@ -136,12 +169,22 @@ class TimeSeriesDataLoader(DataLoader):
 
     def __init__(self, file_path,
                  time_series_column_name: str,
-                 time_format: str
+                 time_format: str,
+                 usecols=None,
+                 dtype=None,
+                 downcast=False,
+                 n_load_workers=None,
+                 label_encoder_registry=None
                  ):
-        super().__init__(file_path)
+        # time series column is always loaded
+        if usecols is not None and time_series_column_name not in usecols:
+            usecols = [time_series_column_name] + list(usecols)
+        super().__init__(file_path, usecols=usecols, dtype=dtype, downcast=downcast, n_load_workers=n_load_workers,
+                         label_encoder_registry=label_encoder_registry)
         # specified the time series columns and get the time format
         self._time_series_column_name = time_series_column_name
         self._time_format = time_format
+        self._time_partition_index = None
 
         # extract time series column into datetime format
         self._op_df = self.get_raw_df()
@@ -159,20 +202,25 @@ class TimeSeriesDataLoader(DataLoader):
         self._distinct_time_set_iterator = iter(list(self._distinct_time_set))
         
         # extract distinct date set
-        self._distinct_date_set = sorted(self._op_df[self._time_series_column_name].dt.date.unique())
+        self._distinct_date_set = self._time_partition_index.get_date_list()
         self._distinct_date_set_iterator = iter(list(self._distinct_date_set))
 
         # extract distinct year/month set
-        self._distinct_month_year_set = sorted(self._op_df[self._time_series_column_name].dt.strftime("%y-%m").unique())
+        self._distinct_month_year_set = self._time_partition_index.get_month_year_list()
         self._distinct_month_year_set_iterator = iter(list(self._distinct_month_year_set))
 
     def sort_by_time(self, ascending_order=True):
         """
-        sorting by time
+        sorting by time, the row offset index of date / month is rebuilt for ascending order
         :return:
         """
-        self._op_df.sort_values([self._time_series_column_name], ascending=ascending_order)
+        self._op_df.sort_values([self._time_series_column_name], ascending=ascending_order,
+                                kind='mergesort', inplace=True)
         self._op_df.reset_index(inplace=True, drop=True)
+        if ascending_order:
+            self._time_partition_index = TimePartitionIndex(self._op_df[self._time_series_column_name].to_numpy())
+        else:
+            self._time_partition_index = None
         print("sorting by time in ascending order:{}, successfully".format(ascending_order))
     
     # def fill_na_with_zero(self):
@@ -291,6 +339,8 @@ class TimeSeriesDataLoader(DataLoader):
         :param selected_date:
         :return: pd.DataFrame
         """
+        if self._time_partition_index is not None:
+            return self._op_df.iloc[self._time_partition_index.get_date_slice(selected_date)]
         df = self._op_df[self._op_df[self._time_series_column_name].dt.date == selected_date]
         return df
 
@@ -302,6 +352,8 @@ class TimeSeriesDataLoader(DataLoader):
         :param selected_month_year:
         :return: pd.DataFrame
         """
+        if self._time_partition_index is not None:
+            return self._op_df.iloc[self._time_partition_index.get_month_year_slice(selected_month_year)]
         sub_df = self._op_df[self._op_df[self._time_series_column_name].dt.strftime('%y-%m') == selected_month_year]
         return sub_df
 
@@ -321,6 +373,8 @@ class TimeSeriesDataLoader(DataLoader):
         if end_time is None:
             end_time = start_time
 
+        if self._time_partition_index is not None:
+            return self._op_df.iloc[self._time_partition_index.get_time_interval_slice(start_time, end_time)]
         df = self._op_df[self._op_df[self._time_series_column_name].between(pd.to_datetime(start_time), pd.to_datetime(end_time), inclusive=True)]
         return df
 
@@ -353,6 +407,101 @@ class TimeSeriesDataLoader(DataLoader):
         raise NotImplementedError
 
 
+class TimeSeriesStreamingDataLoader:
+    """
+    Lazy streaming counterpart of TimeSeriesDataLoader for data larger than memory.
+    Nothing is loaded at construction, `iter_chunks` / `iter_rows` read the file(s) chunk by chunk from disk
+    (csv chunks, parquet row group batches) and apply the same preprocessing incrementally:
+    time column parsing, label encoding with encoders kept stable across chunks (missing category gets the reserved
+    missing value code of the registry), and filling na with 0.
+
+    Data is yielded in file order, files are expected to be time ordered (e.g. monthly files in order).
+    Rows within a chunk are sorted by time, a chunk starting earlier than the previous one is reported.
+    """
+
+    def __init__(self, file_path,
+                 time_series_column_name: str,
+                 time_format: str = None,
+                 chunk_size=100000,
+                 usecols=None,
+                 dtype=None,
+                 label_encoder_registry: LabelEncoderRegistry = None
+                 ):
+        """
+        :param file_path: input data file path or list of file paths, csv, parquet or feather files.
+        :param time_series_column_name: time series column name
+        :param time_format: strftime format of time series column passed to pd.to_datetime, e.g. "%Y-%m-%d %H:%M:%S",
+                            None to infer the format
+        :param chunk_size: number of rows per chunk
+        :param usecols: list of columns to load, time series column is always loaded
+        :param dtype: dict of column name to dtype applied when reading
+        :param label_encoder_registry: label encoders shared with other loaders, e.g. fitted on training data,
+                                       a new registry is created if not provided.
+        """
+        if isinstance(file_path, str):
+            file_path = [file_path]
+        if usecols is not None and time_series_column_name not in usecols:
+            usecols = [time_series_column_name] + list(usecols)
+
+        self._file_path_list = list(file_path)
+        self._time_series_column_name = time_series_column_name
+        self._time_format = time_format
+        self._chunk_size = chunk_size
+        self._usecols = usecols
+        self._dtype = dtype
+        self._label_encoder_registry = label_encoder_registry if label_encoder_registry is not None \
+            else LabelEncoderRegistry()
+
+    def get_label_encoder_registry(self) -> LabelEncoderRegistry:
+        return self._label_encoder_registry
+
+    def get_time_series_column_name(self) -> str:
+        return self._time_series_column_name
+
+    def _preprocess_chunk(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        chunk[self._time_series_column_name] = pd.to_datetime(chunk[self._time_series_column_name],
+                                                              format=self._time_format)
+        if not chunk[self._time_series_column_name].is_monotonic_increasing:
+            chunk.sort_values([self._time_series_column_name], kind='mergesort', inplace=True)
+        chunk.reset_index(inplace=True, drop=True)
+
+        # label encoding, first fit in sorted order as DataLoader.label_encoding, codes never change between chunks
+        # a chunk with only missing categories is read as float column, it still gets the missing value code
+        for col in chunk.columns:
+            if chunk[col].dtype == 'object' or \
+                    (self._label_encoder_registry.has_encoder(col) and chunk[col].isna().all()):
+                chunk[col] = self._label_encoder_registry.encode_column(col, chunk[col], extend=True)
+
+        chunk.fillna(0, inplace=True)
+        return chunk
+
+    def iter_chunks(self):
+        """
+        yielding preprocessed data frame chunks in time order
+        :return: generator of pd.DataFrame
+        """
+        last_time = None
+        for file_path in self._file_path_list:
+            for chunk in iter_data_file_chunks(file_path, self._chunk_size, self._usecols, self._dtype):
+                if len(chunk.index) == 0:
+                    continue
+                chunk = self._preprocess_chunk(chunk)
+                chunk_time = chunk[self._time_series_column_name]
+                if last_time is not None and chunk_time.iloc[0] < last_time:
+                    print("chunk of {} starts at {}, earlier than previous chunk {}, data is not time ordered".format(
+                        file_path, chunk_time.iloc[0], last_time))
+                last_time = chunk_time.iloc[-1]
+                yield chunk
+
+    def iter_rows(self):
+        """
+        yielding preprocessed rows as dict in time order, e.g. for river learn_one / predict_proba_one
+        :return: generator of dict
+        """
+        for chunk in self.iter_chunks():
+            yield from chunk.to_dict(orient='records')
+
+
 if __name__ == '__main__':
 
     data_loader = TimeSeriesDataLoader(
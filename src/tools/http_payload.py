@@ -0,0 +1,134 @@
+import io
+import json
+
+import pandas as pd
+import msgpack
+
+from tools.message_codec import to_native_type
+
+
+CONTENT_TYPE_JSON = 'application/json'
+CONTENT_TYPE_MSGPACK = 'application/msgpack'
+CONTENT_TYPE_ARROW = 'application/vnd.apache.arrow.stream'
+CONTENT_TYPE_PARQUET = 'application/vnd.apache.parquet'
+
+# metadata headers used by binary table payload (arrow / parquet), values are json encoded to keep their type
+X_AXIS_NAME_HEADER = 'X-Axis-Name'
+LABEL_NAME_HEADER = 'X-Label-Name'
+
+PAYLOAD_FORMAT_CONTENT_TYPE = {
+    'json': CONTENT_TYPE_JSON,
+    'msgpack': CONTENT_TYPE_MSGPACK,
+    'arrow': CONTENT_TYPE_ARROW,
+    'parquet': CONTENT_TYPE_PARQUET,
+}
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("pyarrow is required for arrow / parquet payload, please install pyarrow")
+    return pyarrow
+
+
+def encode_data_payload(df: pd.DataFrame, x_axis_name=None, label_name=None, payload_format='json'):
+    """
+    Client side, encode data frame into http body of /model/inference/ and /model/validation/
+    json : legacy envelope, {'x_axis_name', 'label_name', 'Data': df.to_json() string}
+    msgpack : envelope {'x_axis_name', 'label_name', 'Data': {column: [values]}} in columnar layout
+    arrow / parquet : table as body, x axis name and label name in http headers as json values
+    :param df: data frame to send
+    :param x_axis_name: x axis item of this batch
+    :param label_name: label column name
+    :param payload_format: `json`, `msgpack`, `arrow` or `parquet`
+    :return: (body, headers)
+    """
+    if payload_format not in PAYLOAD_FORMAT_CONTENT_TYPE:
+        raise ValueError("payload format {} is not supported, acceptance: {}".format(
+            payload_format, list(PAYLOAD_FORMAT_CONTENT_TYPE.keys())))
+
+    headers = {'content-type': PAYLOAD_FORMAT_CONTENT_TYPE[payload_format]}
+
+    if payload_format == 'json':
+        wrap_to_send = {
+            'x_axis_name': x_axis_name,
+            'label_name': label_name,
+            'Data': str(df.to_json())
+        }
+        return json.dumps(wrap_to_send), headers
+
+    if payload_format == 'msgpack':
+        wrap_to_send = {
+            'x_axis_name': x_axis_name,
+            'label_name': label_name,
+            'Data': {str(col): df[col].tolist() for col in df.columns}
+        }
+        return msgpack.packb(wrap_to_send, default=to_native_type, use_bin_type=True), headers
+
+    pa = _import_pyarrow()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    if payload_format == 'arrow':
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        pa.parquet.write_table(table, sink)
+
+    if x_axis_name is not None:
+        headers[X_AXIS_NAME_HEADER] = json.dumps(x_axis_name, default=to_native_type)
+    if label_name is not None:
+        headers[LABEL_NAME_HEADER] = json.dumps(label_name, default=to_native_type)
+    return sink.getvalue().to_pybytes(), headers
+
+
+def _decode_header_value(headers, name):
+    """
+    :return: json value of header, header of a client sending plain text is returned as str, None if absent
+    """
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def decode_data_payload(content_type: str, body: bytes, headers) -> (object, str, pd.DataFrame):
+    """
+    Server side, decode http body into (x_axis_item, label_name, data frame), format is chosen by Content-Type.
+    For json envelope, `Data` can be legacy json string or json object (no double encoding).
+    x axis item keeps its type (e.g. int batch offset or str month) in all formats.
+    :param content_type: Content-Type of request
+    :param body: raw request body
+    :param headers: request headers (dict-like)
+    :return: x_axis_item, label_name, df
+    """
+    mimetype = (content_type or CONTENT_TYPE_JSON).split(';')[0].strip().lower()
+
+    if mimetype == CONTENT_TYPE_JSON:
+        receive_data_payload = json.loads(body)
+        data = receive_data_payload['Data']
+        if isinstance(data, str):
+            df = pd.read_json(io.StringIO(data))
+        else:
+            df = pd.DataFrame(data)
+        return receive_data_payload.get('x_axis_name'), receive_data_payload.get('label_name'), df
+
+    if mimetype == CONTENT_TYPE_MSGPACK:
+        receive_data_payload = msgpack.unpackb(body, raw=False)
+        df = pd.DataFrame(receive_data_payload['Data'])
+        return receive_data_payload.get('x_axis_name'), receive_data_payload.get('label_name'), df
+
+    if mimetype in (CONTENT_TYPE_ARROW, CONTENT_TYPE_PARQUET):
+        pa = _import_pyarrow()
+        if mimetype == CONTENT_TYPE_ARROW:
+            table = pa.ipc.open_stream(pa.BufferReader(body)).read_all()
+        else:
+            table = pa.parquet.read_table(pa.BufferReader(body))
+        return _decode_header_value(headers, X_AXIS_NAME_HEADER), _decode_header_value(headers, LABEL_NAME_HEADER), \
+            table.to_pandas()
+
+    raise ValueError("Content-Type {} is not supported".format(content_type))
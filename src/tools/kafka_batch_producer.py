@@ -0,0 +1,110 @@
+import threading
+
+from kafka import KafkaProducer
+
+
+class BatchedKafkaProducer:
+    """
+    Asynchronous kafka producer wrapper.
+    Messages are batched by kafka client (linger_ms / batch_size), send is not blocking on broker round trip.
+    In-flight sends are tracked by futures with delivery callbacks, explicit `flush()` or context manager
+    is expected at the end of a pump run.
+
+    >> with BatchedKafkaProducer('localhost:9092') as producer:
+    >>     for payload in payload_list:
+    >>         producer.send('testTopic', payload)
+    """
+
+    def __init__(self, bootstrap_servers, linger_ms=20, batch_size=256 * 1024, compression_type=None,
+                 acks=1, max_in_flight=100000, **producer_configs):
+        """
+        :param bootstrap_servers: kafka broker host
+        :param linger_ms: time to wait for more messages to join one batch
+        :param batch_size: upper bound of bytes in one batch per partition
+        :param compression_type: None, 'gzip', 'snappy', 'lz4' or 'zstd'
+        :param acks: acknowledgement required from broker
+        :param max_in_flight: max number of un-acknowledged sends, producer is flushed when exceed
+        :param producer_configs: other configs passing to KafkaProducer
+        """
+        self.__kafka_producer = KafkaProducer(
+            bootstrap_servers=bootstrap_servers,
+            linger_ms=linger_ms,
+            batch_size=batch_size,
+            compression_type=compression_type,
+            acks=acks,
+            **producer_configs
+        )
+        self.__max_in_flight = max_in_flight
+
+        self.__lock = threading.Lock()
+        self.__in_flight_futures = set()
+        self.__delivered_cnt = 0
+        self.__failed_cnt = 0
+        self.__last_error = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+        return False
+
+    @property
+    def in_flight_cnt(self):
+        return len(self.__in_flight_futures)
+
+    @property
+    def delivered_cnt(self):
+        return self.__delivered_cnt
+
+    @property
+    def failed_cnt(self):
+        return self.__failed_cnt
+
+    @property
+    def last_error(self):
+        return self.__last_error
+
+    def send(self, topic: str, value: bytes, headers=None, key=None):
+        """
+        sending message asynchronously, return future of the send.
+        :param topic: target topic
+        :param value: message payload in bytes
+        :param headers: list of (key, value) tuple
+        :param key: message key
+        :return: future of record metadata
+        """
+        if len(self.__in_flight_futures) >= self.__max_in_flight:
+            self.flush()
+
+        future = self.__kafka_producer.send(topic, value, key=key, headers=headers)
+        with self.__lock:
+            self.__in_flight_futures.add(future)
+
+        future.add_callback(self._on_send_success, future)
+        future.add_errback(self._on_send_error, future)
+        return future
+
+    def _on_send_success(self, future, record_metadata):
+        with self.__lock:
+            self.__in_flight_futures.discard(future)
+            self.__delivered_cnt += 1
+
+    def _on_send_error(self, future, exception):
+        with self.__lock:
+            self.__in_flight_futures.discard(future)
+            self.__failed_cnt += 1
+            self.__last_error = exception
+        print("Kafka delivery error: {}".format(exception))
+
+    def flush(self, timeout=None):
+        """
+        block until all in-flight messages are delivered (or failed)
+        :param timeout: seconds to wait, None for no timeout
+        :return:
+        """
+        self.__kafka_producer.flush(timeout=timeout)
+
+    def close(self, timeout=None):
+        self.flush(timeout=timeout)
+        self.__kafka_producer.close(timeout=timeout)
@@ -0,0 +1,142 @@
+import json
+import os
+import threading
+
+import pandas as pd
+
+from tools.category_encoder import IncrementalLabelEncoder
+
+
+# registry saved where training data loaders are built, loaded by data pumper and serving
+DEFAULT_LABEL_ENCODER_REGISTRY_PATH = '../../model_store/label_encoder_registry.json'
+
+class LabelEncoderRegistry:
+    """
+    Registry of per-column label encoders shared by data loaders, kafka producers and serving,
+    so the same category is always mapped to the same code.
+
+    A column seen for the first time is fitted in sorted order (same codes as sklearn LabelEncoder),
+    afterwards codes never change: unseen category is appended with a new code (`extend=True`, e.g. loaders)
+    or mapped to `unknown_value` (`extend=False`, e.g. serving, where the model never saw the new code anyway).
+    Missing value is mapped to the reserved `missing_value`, so filling na with 0 afterwards does not turn it
+    into the code of a real category.
+    The mapping is persisted as json and can be loaded by another process.
+    """
+
+    def __init__(self, unknown_value=-1, missing_value=-2):
+        """
+        :param unknown_value: code of unseen category when encoding without extending
+        :param missing_value: code of missing value (NaN / None), None to keep missing value as NaN
+        """
+        self._unknown_value = unknown_value
+        self._missing_value = missing_value
+        self._encoders = {}
+        self._lock = threading.Lock()
+
+    def _create_encoder(self, classes=None) -> IncrementalLabelEncoder:
+        return IncrementalLabelEncoder(classes=classes, unknown_value=self._unknown_value,
+                                       missing_value=self._missing_value)
+
+    def get_columns(self) -> list:
+        return list(self._encoders.keys())
+
+    def has_encoder(self, column) -> bool:
+        return column in self._encoders
+
+    def get_encoder(self, column) -> IncrementalLabelEncoder:
+        """
+        :param column: column name
+        :return: encoder of the column, created (empty) if not exist
+        """
+        with self._lock:
+            if column not in self._encoders:
+                self._encoders[column] = self._create_encoder()
+            return self._encoders[column]
+
+    def encode_column(self, column, values, extend=True):
+        """
+        :param column: column name
+        :param values: array-like of categories
+        :param extend: appending unseen categories, otherwise mapping them to unknown_value
+        :return: np.ndarray of codes
+        """
+        with self._lock:
+            encoder = self._encoders.get(column)
+            if encoder is None:
+                encoder = self._create_encoder()
+                self._encoders[column] = encoder
+            # an empty encoder (e.g. created by get_encoder or a non-extending lookup) is fitted like a new column
+            if extend and len(encoder) == 0:
+                encoder.fit(values)
+            return encoder.transform(values, handle_unknown='extend' if extend else 'ignore')
+
+    def encode_frame(self, df: pd.DataFrame, columns=None, extend=True, exclude=None) -> pd.DataFrame:
+        """
+        encoding categorical columns of data frame, inplace
+        :param df: data frame
+        :param columns: columns to encode, default all object columns
+        :param extend: appending unseen categories, otherwise mapping them to unknown_value
+        :param exclude: columns not to encode
+        :return: df
+        """
+        exclude = set(exclude) if exclude is not None else set()
+        if columns is None:
+            columns = [col for col in df.columns if df[col].dtype == 'object']
+        for col in columns:
+            if col in df.columns and col not in exclude:
+                df[col] = self.encode_column(col, df[col], extend=extend)
+        return df
+
+    def encode_row(self, row: dict, columns=None, extend=True) -> dict:
+        """
+        encoding one row (dict) for the streaming path, O(1) lookup per value
+        :param row: dict of column name to value
+        :param columns: columns to encode, default the columns registered in this registry
+        :param extend: appending unseen categories, otherwise mapping them to unknown_value
+        :return: new dict with encoded values
+        """
+        if columns is None:
+            columns = self._encoders.keys()
+        encoded_row = dict(row)
+        with self._lock:
+            for col in columns:
+                if col not in encoded_row:
+                    continue
+                encoder = self._encoders.get(col)
+                if encoder is None:
+                    encoder = self._create_encoder()
+                    self._encoders[col] = encoder
+                encoded_row[col] = encoder.transform_one(encoded_row[col],
+                                                         handle_unknown='extend' if extend else 'ignore')
+        return encoded_row
+
+    def save(self, path: str):
+        """
+        persisting mapping as json, categories are kept in code order
+        :param path: json file path
+        :return:
+        """
+        with self._lock:
+            content = {
+                'unknown_value': self._unknown_value,
+                'missing_value': self._missing_value,
+                'encoders': {str(col): encoder.classes_ for col, encoder in self._encoders.items()},
+            }
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(content, f, default=str)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def load(path: str):
+        """
+        :param path: json file path saved by `save`
+        :return: LabelEncoderRegistry
+        """
+        with open(path, 'r') as f:
+            content = json.load(f)
+        registry = LabelEncoderRegistry(unknown_value=content.get('unknown_value', -1),
+                                        missing_value=content.get('missing_value', -2))
+        for col, classes in content['encoders'].items():
+            registry._encoders[col] = registry._create_encoder(classes)
+        return registry
@@ -0,0 +1,220 @@
+import abc
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import msgpack
+
+
+CONTENT_TYPE_HEADER = 'content-type'
+
+
+class MessageCodec(abc.ABC):
+    """
+    Abstraction of message codec, which is responsible for the wire format of streaming events.
+    Shared by kafka producers (data sourcing / generator / pumper) and consumer (online ml server).
+    Encoding is negotiated by the `content-type` message header,
+    message without header is considered as legacy json text.
+    """
+
+    name = ''
+    content_type = ''
+
+    @abc.abstractmethod
+    def encode_row(self, row: dict) -> bytes:
+        """
+        encode one row (event) into bytes
+        :param row: dict of feature name and value
+        :return: encoded bytes
+        """
+        pass
+
+    def encode_frame(self, df: pd.DataFrame) -> bytes:
+        """
+        encode a block of rows into one message,
+        only codec supports record batch can implement this.
+        :param df: data frame to encode
+        :return: encoded bytes
+        """
+        raise NotImplementedError("codec {} can not encode multiple rows into one message".format(self.name))
+
+    @abc.abstractmethod
+    def decode(self, payload: bytes) -> list:
+        """
+        decode message payload to list of rows (dict)
+        :param payload: message bytes
+        :return: list of dict
+        """
+        pass
+
+    def get_headers(self) -> list:
+        return [(CONTENT_TYPE_HEADER, self.content_type.encode('utf-8'))]
+
+
+class JsonCodec(MessageCodec):
+
+    name = 'json'
+    content_type = 'application/json'
+
+    def encode_row(self, row: dict) -> bytes:
+        return json.dumps(row, default=to_native_type).encode('utf-8')
+
+    def encode_frame(self, df: pd.DataFrame) -> bytes:
+        return df.to_json(orient='records').encode('utf-8')
+
+    def decode(self, payload: bytes) -> list:
+        decoded = json.loads(payload.decode('utf-8'))
+        if isinstance(decoded, list):
+            return decoded
+        return [decoded]
+
+
+class MsgpackCodec(MessageCodec):
+
+    name = 'msgpack'
+    content_type = 'application/msgpack'
+
+    def encode_row(self, row: dict) -> bytes:
+        return msgpack.packb(row, default=to_native_type, use_bin_type=True)
+
+    def encode_frame(self, df: pd.DataFrame) -> bytes:
+        return msgpack.packb(df.to_dict(orient='records'), default=to_native_type, use_bin_type=True)
+
+    def decode(self, payload: bytes) -> list:
+        decoded = msgpack.unpackb(payload, raw=False)
+        if isinstance(decoded, list):
+            return decoded
+        return [decoded]
+
+
+class ArrowCodec(MessageCodec):
+    """
+    Arrow IPC stream codec, a message carries one record batch (one or many rows).
+    pyarrow is an optional dependency, only imported when this codec is used.
+    """
+
+    name = 'arrow'
+    content_type = 'application/vnd.apache.arrow.stream'
+
+    def __init__(self):
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError("pyarrow is required for arrow codec, please install pyarrow")
+        self._pa = pyarrow
+
+    def encode_row(self, row: dict) -> bytes:
+        return self.encode_frame(pd.DataFrame([row]))
+
+    def encode_frame(self, df: pd.DataFrame) -> bytes:
+        record_batch = self._pa.RecordBatch.from_pandas(df, preserve_index=False)
+        sink = self._pa.BufferOutputStream()
+        with self._pa.ipc.new_stream(sink, record_batch.schema) as writer:
+            writer.write_batch(record_batch)
+        return sink.getvalue().to_pybytes()
+
+    def decode(self, payload: bytes) -> list:
+        reader = self._pa.ipc.open_stream(io.BytesIO(payload))
+        return reader.read_all().to_pylist()
+
+
+_CODEC_CLASSES = {
+    JsonCodec.name: JsonCodec,
+    MsgpackCodec.name: MsgpackCodec,
+    ArrowCodec.name: ArrowCodec,
+}
+
+_CONTENT_TYPE_TO_NAME = {codec_class.content_type: name for name, codec_class in _CODEC_CLASSES.items()}
+
+_codec_instances = {}
+
+
+def to_native_type(obj):
+    """
+    default hook for serializer, casting numpy / pandas scalar to python native type
+    """
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    raise TypeError("Object of type {} is not serializable".format(type(obj).__name__))
+
+
+def get_codec(name: str = 'json') -> MessageCodec:
+    """
+    get codec instance by name, `json`, `msgpack` or `arrow`
+    :param name: codec name
+    :return: MessageCodec
+    """
+    if name not in _CODEC_CLASSES:
+        raise ValueError("codec {} is not supported, acceptance: {}".format(name, list(_CODEC_CLASSES.keys())))
+    if name not in _codec_instances:
+        _codec_instances[name] = _CODEC_CLASSES[name]()
+    return _codec_instances[name]
+
+
+def get_codec_by_headers(headers) -> MessageCodec:
+    """
+    negotiating codec from kafka message headers, fall back to json when header not provided
+    :param headers: list of (key, value) tuples
+    :return: MessageCodec
+    """
+    for key, value in headers or []:
+        if key == CONTENT_TYPE_HEADER:
+            content_type = value.decode('utf-8') if isinstance(value, bytes) else value
+            if content_type not in _CONTENT_TYPE_TO_NAME:
+                raise ValueError("content type {} is not supported".format(content_type))
+            return get_codec(_CONTENT_TYPE_TO_NAME[content_type])
+    return get_codec(JsonCodec.name)
+
+
+def encode_message(data, codec: MessageCodec):
+    """
+    encode data to send into kafka, return payload and headers.
+    str and bytearray are sent as is without header (legacy json text).
+    :param data: str / bytearray / pd.Series / pd.DataFrame
+    :param codec: codec used to encode pd.Series and pd.DataFrame
+    :return: (payload, headers), payload is None if data type not supported
+    """
+    if isinstance(data, str):
+        return bytes(data, 'utf-8'), None
+    elif isinstance(data, bytearray):
+        return bytes(data), None
+    elif isinstance(data, pd.Series):
+        if isinstance(codec, JsonCodec):
+            # keep exactly the same text as the legacy producer
+            return bytes(str(data.to_json()), 'utf-8'), codec.get_headers()
+        return codec.encode_row(data.to_dict()), codec.get_headers()
+    elif isinstance(data, pd.DataFrame):
+        return codec.encode_frame(data), codec.get_headers()
+    return None, None
+
+
+def decode_consumer_record(record) -> list:
+    """
+    decode one kafka consumer record into list of rows (dict),
+    record from legacy producer (no header) is decoded as json.
+    Record with unsupported content type or malformed payload is logged and skipped (empty list),
+    so a single bad message does not stop the consuming thread.
+    :param record: kafka ConsumerRecord
+    :return: list of dict
+    """
+    try:
+        codec = get_codec_by_headers(getattr(record, 'headers', None))
+        return codec.decode(record.value)
+    except Exception as e:
+        print("Skip undecodable record (topic {}, partition {}, offset {}): {}".format(
+            getattr(record, 'topic', None), getattr(record, 'partition', None), getattr(record, 'offset', None), e))
+        return []
+
+
+def decode_consumer_records_to_frame(records) -> pd.DataFrame:
+    """
+    decode a block of kafka consumer records into a single data frame (one row per decoded event)
+    :param records: list of kafka ConsumerRecord
+    :return: pd.DataFrame
+    """
+    return pd.DataFrame.from_records(
+        [row for record in records for row in decode_consumer_record(record)]
+    )
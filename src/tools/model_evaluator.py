@@ -5,6 +5,7 @@ import numpy as np
 from tqdm import tqdm
 
 from tools.model_perform_visualization import PredictionProbabilityDist, TrendPlot
+from tools.prequential_evaluator import PrequentialEvaluator
 
 from sklearn.metrics import accuracy_score, recall_score, f1_score, roc_curve, auc, roc_auc_score
 from sklearn.metrics import RocCurveDisplay
@@ -180,75 +181,57 @@ class SklearnModelEvaluator(ModelEvaluator):
 
 
 class RiverModelEvaluator(ModelEvaluator):
-    def __init__(self, model, data_loader_for_testing, label):
+    def __init__(self, model, data_loader_for_testing, label, checkpoint_path=None, checkpoint_interval=None):
+        """
+        :param checkpoint_path: pickle file path to checkpoint and resume the prequential evaluation,
+                                only resumed on the same rows (e.g. same date subset) it was saved from
+        :param checkpoint_interval: number of rows between checkpoints
+        """
         super(RiverModelEvaluator, self).__init__(model, data_loader_for_testing, label)
+        self._checkpoint_path = checkpoint_path
+        self._checkpoint_interval = checkpoint_interval
+        self._running_metrics = {}
 
 
-    def _run_prediction(self, X_test, y_test, do_online_training):
-        pred_proba_result_list = []
-        corresponding_ans = []
-        for index, raw in tqdm(X_test.iterrows(), total=X_test.shape[0]):
-            try:
-                pred_proba_result = self._model.predict_proba_one(raw)
-                if isinstance(pred_proba_result, dict):
-                    pred_proba_result_element = pred_proba_result.get(1)
-                    if pred_proba_result_element is not None:
-                        pred_proba_result_list.append(pred_proba_result.get(1))
-                        corresponding_ans.append(y_test[index])
-                    else:
-                        print('Critical error: prediction proba result from riverml Model is None')
-                else:
-                    print(
-                        'Critical error: prediction proba result from riverml Model is not dict type (unexpect type found !) ')
-
-            except:
-                print("error happen while prediction")
-
-            if do_online_training:
-                '''
-                if do online training option is on, go to do it, or skip this part
-                '''
-                try:
-                    # -------------------------------------------------#
-                    # if prediction is fine, go learn one observation #
-                    # -------------------------------------------------#
-                    self._model.learn_one(raw, y_test[index])
-                except:
-                    print("error happen while learning")
-
-        if all(isinstance(x, float) for x in pred_proba_result_list):
-            return pred_proba_result_list, corresponding_ans
-        else:
-            print("river model prediction probabality cause error, not all return result provide float type!!, check")
-            raise RuntimeError
+    def _run_prequential_evaluation(self, X_test, y_test, do_online_training):
+        """
+        test-then-train over all rows, model is replaced by the resumed one if resuming from checkpoint
+        :return: PrequentialState
+        """
+        evaluator = PrequentialEvaluator(
+            self._model,
+            do_online_training=do_online_training,
+            checkpoint_path=self._checkpoint_path,
+            checkpoint_interval=self._checkpoint_interval
+        )
+        state = evaluator.evaluate(X_test, y_test, resume=self._checkpoint_path is not None)
+        self._model = evaluator.get_model()
+        self._running_metrics = evaluator.get_metrics()
+        return state
 
+    def _run_prediction(self, X_test, y_test, do_online_training):
+        """
+        :return: prediction probability list and corresponding answer list, rows without probability are skipped
+        """
+        state = self._run_prequential_evaluation(X_test, y_test, do_online_training)
+        is_valid_proba = ~np.isnan(state.pred_proba)
+        if not is_valid_proba.all():
+            print('Critical error: prediction proba result from riverml Model is None in {} rows'.format(
+                int(np.count_nonzero(~is_valid_proba))))
+        return state.pred_proba[is_valid_proba].tolist(), state.y_true[is_valid_proba].tolist()
 
     def predict_proba_true_class_full_set(self, i_date=None, do_online_training=True):
         X_test, y_test = self.get_testing_x_y_full_set()
-        pred_proba_result_list = []
-        for index, raw in tqdm(X_test.iterrows(), total=X_test.shape[0]):
-            try:
-                pred_proba_result = self._model.predict_proba_one(raw)
-                if isinstance(pred_proba_result, dict):
-                    pred_proba_result_list.append(pred_proba_result.get(1))
-                
-            except:
-                print("error happen")
-
-            if do_online_training:
-                '''
-                if do online training option is on, go to do it, or skip this part
-                '''
-                try:
-                    # -------------------------------------------------#
-                    # if prediction is fine, go learn one observation #
-                    # -------------------------------------------------#
-                    self._model.learn_one(raw, y_test[index])
-                except:
-                    print("error happen while learning")
-        
-        return np.array(pred_proba_result_list), y_test
-            
+        state = self._run_prequential_evaluation(X_test, y_test, do_online_training)
+        return state.pred_proba, y_test
+
+    def get_running_metrics(self) -> dict:
+        """
+        running accuracy / recall / precision / f1 of the last prequential evaluation
+        :return: dict of metrics
+        """
+        return self._running_metrics
+
     def predict_proba_true_class_by_date(self, i_date=None, do_online_training=False):
 
         # sub_df_by_date = self._data_loader_for_testing.get_sub_df_by_date(i_date)
@@ -9,6 +9,7 @@ from river import tree
 from river.ensemble import AdaptiveRandomForestClassifier
 
 from tools.data_loader import TimeSeriesDataLoader
+from tools.label_encoder_registry import DEFAULT_LABEL_ENCODER_REGISTRY_PATH
 
 import abc
 from tqdm import tqdm
@@ -19,7 +20,8 @@ class ModelTrainerReader(abc.ABC):
                  n_tree=100, max_depth=10, criterion='gini',
                  training_data_start_time=None, training_data_end_time=None,
                  time_series_col_name='DateTime', time_format="%yyyy-%mm-%dd %HH:%MM:%SS",
-                 label_col="TrafficJam60MinLater"
+                 label_col="TrafficJam60MinLater",
+                 label_encoder_registry_path=DEFAULT_LABEL_ENCODER_REGISTRY_PATH
                  ):
 
         """
@@ -35,6 +37,8 @@ class ModelTrainerReader(abc.ABC):
         :param time_series_col_name:
         :param time_format:
         :param label_col:
+        :param label_encoder_registry_path: json path the label encoder registry of data loader is saved to
+                                            together with model, loaded by data pumper and serving. None to not save.
         """
 
         self._model = None
@@ -48,6 +52,7 @@ class ModelTrainerReader(abc.ABC):
 
         self._time_series_col_name = time_series_col_name
         self._time_format = time_format
+        self._label_encoder_registry_path = label_encoder_registry_path
 
         self._training_data_start_time = training_data_start_time
         self._training_data_end_time = training_data_end_time
@@ -104,6 +109,20 @@ class ModelTrainerReader(abc.ABC):
         with open(self._model_location, 'wb') as f:
             pickle.dump(self._model, f)
             print("saving Model : {} successfully".format(self._model_location))
+        self._save_label_encoder_registry()
+
+    def _save_label_encoder_registry(self):
+        """
+        saving category codes the model is trained with, for data pumper and serving
+        """
+        if self._label_encoder_registry_path is None or not hasattr(self._data_loader, 'get_label_encoder_registry'):
+            return
+        try:
+            self._data_loader.get_label_encoder_registry().save(self._label_encoder_registry_path)
+            print("saving label encoder registry : {} successfully".format(self._label_encoder_registry_path))
+        except OSError:
+            print("Can not save label encoder registry {}, please check the folder exists".format(
+                self._label_encoder_registry_path))
 
     def get_data_loader(self):
         return self._data_loader
@@ -120,7 +139,8 @@ class SklearnRandomForestClassifierTrainer(ModelTrainerReader):
                  n_tree=100, max_depth=10, criterion='gini',
                  training_data_start_time=None, training_data_end_time=None,
                  label_col="TrafficJam60MinLater",
-                 time_series_col_name='DateTime', time_format="%yyyy-%mm-%dd %HH:%MM:%SS"
+                 time_series_col_name='DateTime', time_format="%yyyy-%mm-%dd %HH:%MM:%SS",
+                 label_encoder_registry_path=DEFAULT_LABEL_ENCODER_REGISTRY_PATH
                  ):
 
         super(SklearnRandomForestClassifierTrainer, self).__init__(
@@ -128,7 +148,7 @@ class SklearnRandomForestClassifierTrainer(ModelTrainerReader):
             n_tree=n_tree, max_depth=max_depth, criterion=criterion,
             training_data_start_time=training_data_start_time, training_data_end_time=training_data_end_time,
             time_series_col_name=time_series_col_name, time_format=time_format,
-            label_col=label_col
+            label_col=label_col, label_encoder_registry_path=label_encoder_registry_path
         )
 
         def is_parameter_correct(input_p, model_p):
@@ -205,7 +225,8 @@ class RiverAdaRandomForestClassifier(ModelTrainerReader):
                  n_tree=100, max_depth=10, criterion='gini',
                  training_data_start_time=None, training_data_end_time=None,
                  label_col="TrafficJam60MinLater",
-                 time_series_col_name='DateTime', time_format="%yyyy-%mm-%dd %HH:%MM:%SS"):
+                 time_series_col_name='DateTime', time_format="%yyyy-%mm-%dd %HH:%MM:%SS",
+                 label_encoder_registry_path=DEFAULT_LABEL_ENCODER_REGISTRY_PATH):
 
 
         super(RiverAdaRandomForestClassifier, self).__init__(
@@ -213,7 +234,7 @@ class RiverAdaRandomForestClassifier(ModelTrainerReader):
             n_tree=n_tree, max_depth=max_depth, criterion=criterion,
             training_data_start_time=training_data_start_time, training_data_end_time=training_data_end_time,
             time_series_col_name=time_series_col_name, time_format=time_format,
-            label_col=label_col
+            label_col=label_col, label_encoder_registry_path=label_encoder_registry_path
         )
 
         if self._is_model_exist:
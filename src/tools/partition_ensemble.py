@@ -0,0 +1,67 @@
+import pandas as pd
+
+
+class PartitionEnsembleClassifier:
+    """
+    Serving-side ensemble merged from replicas trained on disjoint kafka partitions.
+    Prediction probability is the average of replicas, weighted by number of events each replica has trained,
+    which is bagging across workers (each replica sees a partition subset of the stream instead of a re-sample).
+    It is read only, replicas keep training in their own worker process.
+    """
+
+    def __init__(self, replicas: list, weights: list = None):
+        """
+        :param replicas: list of trained river classifiers
+        :param weights: weight of each replica (e.g. trained event count), equal weights if not provided
+        """
+        if len(replicas) == 0:
+            raise ValueError("at least one replica is required")
+        if weights is None:
+            weights = [1.0] * len(replicas)
+        if len(weights) != len(replicas):
+            raise ValueError("length of weights {} and replicas {} mismatch".format(len(weights), len(replicas)))
+        total_weight = float(sum(weights))
+        if total_weight <= 0:
+            weights = [1.0] * len(replicas)
+            total_weight = float(len(replicas))
+
+        self._replicas = list(replicas)
+        self._weights = [w / total_weight for w in weights]
+
+    @property
+    def replicas(self) -> list:
+        return self._replicas
+
+    @property
+    def models(self) -> list:
+        """
+        members of all replicas (replica itself if it is not an ensemble), used by tree structure inspector
+        """
+        models = []
+        for replica in self._replicas:
+            models.extend(getattr(replica, 'models', [replica]))
+        return models
+
+    def predict_proba_one(self, x: dict) -> dict:
+        merged_proba = {}
+        for replica, weight in zip(self._replicas, self._weights):
+            for label, proba in replica.predict_proba_one(x).items():
+                merged_proba[label] = merged_proba.get(label, 0.0) + weight * proba
+        return merged_proba
+
+    def predict_proba_many(self, X: pd.DataFrame) -> pd.DataFrame:
+        """
+        weighted average prediction probability of replicas
+        :param X: features data frame
+        :return: data frame, one column per class
+        """
+        if len(X.index) == 0:
+            return pd.DataFrame(index=X.index)
+        rows = X.to_dict(orient='records')
+        return pd.DataFrame([self.predict_proba_one(x) for x in rows], index=X.index).fillna(0.0)
+
+    def predict_one(self, x: dict):
+        proba = self.predict_proba_one(x)
+        if len(proba) == 0:
+            return None
+        return max(proba, key=proba.get)
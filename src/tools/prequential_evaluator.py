@@ -0,0 +1,192 @@
+import hashlib
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from tools.streaming_metrics import ConfusionMatrixCounter
+
+# predicted class below the probability cut point, never equal to any label and not an unscored (None) prediction
+_NEGATIVE_PREDICTION = object()
+
+
+def get_subset_fingerprint(X: pd.DataFrame, y_values: np.ndarray) -> str:
+    """
+    fingerprint of the evaluated rows, hash of index of X and the answers,
+    so a checkpoint is never resumed on another subset (e.g. another date) of the same number of rows
+    :param X: features data frame
+    :param y_values: answers aligned with rows of X
+    :return: hex digest
+    """
+    fingerprint = hashlib.sha1()
+    fingerprint.update(pd.util.hash_pandas_object(X.index).to_numpy().tobytes())
+    fingerprint.update(pd.util.hash_pandas_object(pd.Series(y_values), index=False).to_numpy().tobytes())
+    return fingerprint.hexdigest()
+
+
+class PrequentialState:
+    """
+    Progress of a prequential evaluation, persisted as checkpoint to resume a long evaluation.
+    `pred_proba` is preallocated for the full dataset, rows after `next_row` are not evaluated yet.
+    `y_true` keeps the answers in their own dtype, `fingerprint` identifies the evaluated subset.
+    """
+
+    # checkpoint saved before fingerprint was recorded, never resumed
+    fingerprint = None
+
+    def __init__(self, model, y_true, positive_label=1, fingerprint=None):
+        self.model = model
+        self.next_row = 0
+        self.y_true = np.array(y_true)
+        self.pred_proba = np.full(len(self.y_true), np.nan, dtype=np.float64)
+        self.fingerprint = fingerprint
+        self.confusion_matrix = ConfusionMatrixCounter(positive_label=positive_label)
+        self.n_predict_error = 0
+        self.n_learn_error = 0
+
+    @property
+    def n_rows(self):
+        return len(self.pred_proba)
+
+    def is_finished(self):
+        return self.next_row >= self.n_rows
+
+
+class PrequentialEvaluator:
+    """
+    Prequential (test-then-train) evaluation of river model.
+    Each row is predicted by the model before learning it, prediction probability of the true class and
+    the answer are written into preallocated numpy arrays, and the running confusion matrix is updated inline.
+    The data frame is converted into plain dict rows once, instead of building a pd.Series per row by `iterrows`.
+    Progress (model and results) can be checkpointed every `checkpoint_interval` rows and resumed.
+    """
+
+    def __init__(self, model, true_class=1, proba_cut_point=0.5, do_online_training=True,
+                 checkpoint_path=None, checkpoint_interval=None, show_progress=True):
+        """
+        :param model: river model supporting predict_proba_one / learn_one
+        :param true_class: class label of true class
+        :param proba_cut_point: threshold casting probability to class for the running metrics
+        :param do_online_training: learning each row after predicting it
+        :param checkpoint_path: pickle file path of checkpoint, no checkpoint if None
+        :param checkpoint_interval: number of rows between checkpoints, only at the end if None
+        :param show_progress: showing tqdm progress bar
+        """
+        self._model = model
+        self._true_class = true_class
+        self._proba_cut_point = proba_cut_point
+        self._do_online_training = do_online_training
+        self._checkpoint_path = checkpoint_path
+        self._checkpoint_interval = checkpoint_interval
+        self._show_progress = show_progress
+        self._state = None
+
+    def get_model(self):
+        return self._model
+
+    def get_state(self) -> PrequentialState:
+        return self._state
+
+    def get_metrics(self) -> dict:
+        if self._state is None:
+            return {}
+        return self._state.confusion_matrix.get_metrics()
+
+    def save_checkpoint(self):
+        """
+        persisting evaluation state, written to a temp file and renamed so a crash never leaves a broken checkpoint
+        :return:
+        """
+        if self._checkpoint_path is None or self._state is None:
+            return
+        temp_path = self._checkpoint_path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            pickle.dump(self._state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self._checkpoint_path)
+
+    def load_checkpoint(self):
+        """
+        :return: PrequentialState, None if no checkpoint is found
+        """
+        if self._checkpoint_path is None or not os.path.isfile(self._checkpoint_path):
+            return None
+        with open(self._checkpoint_path, 'rb') as f:
+            return pickle.load(f)
+
+    def evaluate(self, X: pd.DataFrame, y, resume=False) -> PrequentialState:
+        """
+        running test-then-train over all rows of X
+        :param X: features data frame
+        :param y: answers aligned with rows of X
+        :param resume: resuming from unfinished checkpoint (model and evaluated rows) of the same rows,
+                       i.e. same index of X and same answers
+        :return: PrequentialState, rows that model can not provide probability are np.nan in pred_proba
+        """
+        y_values = np.asarray(y)
+        n_rows = len(X.index)
+        if len(y_values) != n_rows:
+            raise ValueError("X of {} rows and y of {} rows mismatch".format(n_rows, len(y_values)))
+
+        fingerprint = get_subset_fingerprint(X, y_values)
+        state = self.load_checkpoint() if resume else None
+        if state is not None and state.fingerprint != fingerprint:
+            print("checkpoint {} is of other rows, evaluation starts from the first row".format(self._checkpoint_path))
+            state = None
+        if state is not None and not state.is_finished():
+            print("resuming prequential evaluation from row {}/{}".format(state.next_row, n_rows))
+            self._model = state.model
+        else:
+            state = PrequentialState(self._model, y_values, positive_label=self._true_class, fingerprint=fingerprint)
+        self._state = state
+
+        x_rows = X.to_dict(orient='records')
+        self._run_rows(x_rows, state)
+        self.save_checkpoint()
+        return state
+
+    def _run_rows(self, x_rows: list, state: PrequentialState):
+        model = self._model
+        predict_proba_one = model.predict_proba_one
+        learn_one = model.learn_one
+        true_class = self._true_class
+        proba_cut_point = self._proba_cut_point
+        do_online_training = self._do_online_training
+        pred_proba = state.pred_proba
+        y_true = state.y_true
+        confusion_matrix = state.confusion_matrix
+        checkpoint_interval = self._checkpoint_interval if self._checkpoint_path is not None else None
+
+        start_row = state.next_row
+        row_range = range(start_row, state.n_rows)
+        if self._show_progress:
+            row_range = tqdm(row_range, initial=start_row, total=state.n_rows)
+
+        for i in row_range:
+            x = x_rows[i]
+            try:
+                proba = predict_proba_one(x).get(true_class)
+            except Exception as e:
+                proba = None
+                state.n_predict_error += 1
+                if state.n_predict_error == 1:
+                    print("error happen while prediction: {}".format(e))
+            if proba is not None:
+                pred_proba[i] = proba
+                confusion_matrix.update_one(y_true[i], true_class if proba >= proba_cut_point else _NEGATIVE_PREDICTION)
+
+            if do_online_training:
+                try:
+                    learn_one(x, y_true[i])
+                except Exception as e:
+                    state.n_learn_error += 1
+                    if state.n_learn_error == 1:
+                        print("error happen while learning: {}".format(e))
+
+            state.next_row = i + 1
+            if checkpoint_interval is not None and state.next_row % checkpoint_interval == 0:
+                self.save_checkpoint()
+
+        if state.n_predict_error > 0 or state.n_learn_error > 0:
+            print("prediction error: {}, learning error: {}".format(state.n_predict_error, state.n_learn_error))
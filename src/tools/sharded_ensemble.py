@@ -0,0 +1,344 @@
+import copy
+import multiprocessing
+import threading
+import traceback
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+
+def _clone_member(model, seed):
+    """
+    clone base model as ensemble member with its own seed (if the model takes seed)
+    """
+    get_params = getattr(model, '_get_params', None)
+    if get_params is not None and 'seed' in get_params():
+        try:
+            return model.clone({'seed': seed})
+        except TypeError:
+            pass
+    return copy.deepcopy(model)
+
+
+def _learn_rows(models, rngs, lam, rows, y_list):
+    """
+    online bagging (Oza & Russell), each member learns each row k ~ Poisson(lambda) times,
+    k is drawn from the member's own random state
+    """
+    for x, y in zip(rows, y_list):
+        for model, rng in zip(models, rngs):
+            for _ in range(rng.poisson(lam)):
+                model.learn_one(x, y)
+
+
+def _sum_proba_rows(models, rows):
+    """
+    sum of members prediction probability for each row
+    """
+    summed_proba_list = []
+    for x in rows:
+        summed_proba = {}
+        for model in models:
+            for label, proba in model.predict_proba_one(x).items():
+                summed_proba[label] = summed_proba.get(label, 0.0) + proba
+        summed_proba_list.append(summed_proba)
+    return summed_proba_list
+
+
+def _read_rows_from_shared_memory(shm_name, shape, columns):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    matrix = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    values_list = matrix.tolist()
+    # release the view on shared buffer before closing it
+    del matrix
+    shm.close()
+    return [dict(zip(columns, values)) for values in values_list]
+
+
+def _ensemble_shard_worker(conn, models, rngs, lam):
+    """
+    worker process owning a shard of ensemble members with their random states.
+    features of event batch are read from shared memory, labels and commands are passing by pipe.
+    """
+    while True:
+        command = conn.recv()
+        try:
+            if command[0] == 'learn':
+                _, shm_name, shape, columns, y_list = command
+                rows = _read_rows_from_shared_memory(shm_name, shape, columns)
+                _learn_rows(models, rngs, lam, rows, y_list)
+                conn.send(('ok', None))
+            elif command[0] == 'predict_proba':
+                _, shm_name, shape, columns = command
+                rows = _read_rows_from_shared_memory(shm_name, shape, columns)
+                conn.send(('ok', _sum_proba_rows(models, rows)))
+            elif command[0] == 'get_models':
+                conn.send(('ok', (models, rngs)))
+            elif command[0] == 'stop':
+                conn.send(('ok', None))
+                break
+            else:
+                conn.send(('error', 'unknown command {}'.format(command[0])))
+        except Exception:
+            conn.send(('error', traceback.format_exc()))
+    conn.close()
+
+
+class ShardedBaggingClassifier:
+    """
+    Online bagging ensemble with members sharded across a process pool.
+    Each worker process owns `n_models / n_workers` members, event batch is written once into shared memory
+    and all workers train their own members in parallel. Prediction aggregates (averages) the members votes.
+
+    The members are independent, each member i re-samples by Poisson with its own random state seeded
+    `seed + i`, so training result does not depend on how members are sharded. Boosting (e.g. AdaBoost) is sequential among members and can not be sharded.
+
+    n_workers=0 runs all members in current process, which is also what a pickled snapshot becomes.
+    Only numeric features are supported in process mode (features are passing as float64 matrix).
+
+    In process mode, every shared memory and pipe round trip is guarded by one lock, so the ensemble can be
+    trained in one thread while another thread (e.g. model persist) gathers the members.
+    Rows of `learn_one` are buffered and sent to workers as one batch.
+    """
+
+    def __init__(self, model, n_models=10, n_workers=None, lam=1.0, seed=42, learn_one_buffer_size=100):
+        """
+        :param model: base river model, cloned (deep copy) for each member
+        :param n_models: number of ensemble members
+        :param n_workers: number of worker process, default min(n_models, cpu count)
+        :param lam: lambda of Poisson re-sampling
+        :param seed: random seed
+        :param learn_one_buffer_size: number of `learn_one` rows buffered before sending to workers (process mode),
+                                      buffered rows are also sent before any prediction or member gathering.
+        """
+        self._n_models = n_models
+        self._lam = lam
+        self._seed = seed
+        self._learn_one_buffer_size = learn_one_buffer_size
+        self._lock = threading.Lock()
+        self._pending_rows = []
+        self._pending_y = []
+        if n_workers is None:
+            n_workers = min(n_models, multiprocessing.cpu_count())
+        self._n_workers = min(n_workers, n_models)
+
+        members = [_clone_member(model, seed + i) for i in range(n_models)]
+        rngs = [np.random.RandomState(seed + i) for i in range(n_models)]
+
+        self._local_models = None
+        self._local_rngs = None
+        self._workers = []
+        self._shm = None
+
+        if self._n_workers <= 0:
+            self._local_models = members
+            self._local_rngs = rngs
+        else:
+            self._start_workers(members, rngs)
+
+    def _start_workers(self, members, rngs):
+        context = multiprocessing.get_context()
+        for i in range(self._n_workers):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_ensemble_shard_worker,
+                args=(child_conn, members[i::self._n_workers], rngs[i::self._n_workers], self._lam),
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self._workers.append((process, parent_conn))
+
+    @property
+    def n_models(self):
+        return self._n_models
+
+    @property
+    def models(self) -> list:
+        """
+        list of ensemble members, fetching from workers in process mode
+        """
+        return self._gather_members()[0]
+
+    def _gather_members(self):
+        """
+        :return: (members, random states of members) in member order, fetching from workers in process mode
+        """
+        if self._local_models is not None:
+            return self._local_models, self._local_rngs
+        with self._lock:
+            self._flush_pending_rows()
+            shards = self._broadcast(('get_models',))
+        models = [None] * self._n_models
+        rngs = [None] * self._n_models
+        # worker i owns members i, i + n_workers, i + 2 * n_workers, ...
+        for i, (shard_models, shard_rngs) in enumerate(shards):
+            models[i::self._n_workers] = shard_models
+            rngs[i::self._n_workers] = shard_rngs
+        return models, rngs
+
+    def _broadcast(self, command) -> list:
+        """
+        sending command to all workers and gathering their results, caller must hold the lock
+        """
+        for process, conn in self._workers:
+            conn.send(command)
+        results = []
+        for process, conn in self._workers:
+            status, result = conn.recv()
+            if status != 'ok':
+                raise RuntimeError("ensemble shard worker error: {}".format(result))
+            results.append(result)
+        return results
+
+    def _write_shared_matrix(self, X: pd.DataFrame):
+        matrix = X.to_numpy(dtype=np.float64)
+        if self._shm is None or self._shm.size < max(matrix.nbytes, 1):
+            self._release_shared_memory()
+            self._shm = shared_memory.SharedMemory(create=True, size=max(matrix.nbytes, 1))
+        shared_matrix = np.ndarray(matrix.shape, dtype=np.float64, buffer=self._shm.buf)
+        shared_matrix[:] = matrix
+        del shared_matrix
+        return self._shm.name, matrix.shape, list(X.columns)
+
+    def _release_shared_memory(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def _learn_shared_matrix(self, X: pd.DataFrame, y_list: list):
+        """
+        workers train their shard of members on the batch, caller must hold the lock
+        """
+        shm_name, shape, columns = self._write_shared_matrix(X)
+        self._broadcast(('learn', shm_name, shape, columns, y_list))
+
+    def _flush_pending_rows(self):
+        """
+        sending buffered `learn_one` rows to workers as one batch, caller must hold the lock
+        """
+        if len(self._pending_rows) == 0:
+            return
+        X = pd.DataFrame(self._pending_rows)
+        y_list = self._pending_y
+        self._pending_rows = []
+        self._pending_y = []
+        self._learn_shared_matrix(X, y_list)
+
+    def learn_one(self, x: dict, y):
+        if self._local_models is not None:
+            _learn_rows(self._local_models, self._local_rngs, self._lam, [x], [y])
+            return self
+
+        with self._lock:
+            self._pending_rows.append(x)
+            self._pending_y.append(y)
+            if len(self._pending_rows) >= self._learn_one_buffer_size:
+                self._flush_pending_rows()
+        return self
+
+    def learn_many(self, X: pd.DataFrame, y: pd.Series):
+        """
+        training a batch of events, workers train their shard of members in parallel.
+        :param X: features data frame
+        :param y: target series
+        :return: self
+        """
+        if len(X.index) == 0:
+            return self
+        y_list = list(y)
+        if self._local_models is not None:
+            _learn_rows(self._local_models, self._local_rngs, self._lam, X.to_dict(orient='records'), y_list)
+            return self
+
+        with self._lock:
+            # keeping the order of buffered learn_one rows
+            self._flush_pending_rows()
+            self._learn_shared_matrix(X, y_list)
+        return self
+
+    def predict_proba_many(self, X: pd.DataFrame) -> pd.DataFrame:
+        """
+        averaged prediction probability of all members
+        :param X: features data frame
+        :return: data frame, one column per class
+        """
+        if len(X.index) == 0:
+            return pd.DataFrame(index=X.index)
+
+        if self._local_models is not None:
+            summed_list = [_sum_proba_rows(self._local_models, X.to_dict(orient='records'))]
+        else:
+            with self._lock:
+                self._flush_pending_rows()
+                shm_name, shape, columns = self._write_shared_matrix(X)
+                summed_list = self._broadcast(('predict_proba', shm_name, shape, columns))
+
+        n_rows = len(X.index)
+        merged = [{} for _ in range(n_rows)]
+        for shard_result in summed_list:
+            for i in range(n_rows):
+                for label, proba in shard_result[i].items():
+                    merged[i][label] = merged[i].get(label, 0.0) + proba
+
+        proba_df = pd.DataFrame(merged, index=X.index).fillna(0.0)
+        return proba_df / self._n_models
+
+    def predict_proba_one(self, x: dict) -> dict:
+        proba_df = self.predict_proba_many(pd.DataFrame([x]))
+        return {label: proba for label, proba in proba_df.iloc[0].items()}
+
+    def predict_one(self, x: dict):
+        proba = self.predict_proba_one(x)
+        if len(proba) == 0:
+            return None
+        return max(proba, key=proba.get)
+
+    def close(self):
+        """
+        stop all worker processes and release shared memory
+        :return:
+        """
+        with self._lock:
+            if len(self._workers) > 0:
+                try:
+                    self._flush_pending_rows()
+                    self._broadcast(('stop',))
+                except (EOFError, BrokenPipeError, RuntimeError):
+                    pass
+                for process, conn in self._workers:
+                    process.join(timeout=5)
+                    conn.close()
+                self._workers = []
+            self._release_shared_memory()
+
+    def __getstate__(self):
+        """
+        pickled (or deep copied) ensemble is a local snapshot, members and their random states are gathered
+        from workers
+        """
+        models, rngs = self._gather_members()
+        return {
+            '_n_models': self._n_models,
+            '_lam': self._lam,
+            '_seed': self._seed,
+            '_learn_one_buffer_size': self._learn_one_buffer_size,
+            '_local_models': models,
+            '_local_rngs': rngs,
+        }
+
+    def __setstate__(self, state):
+        # snapshot pickled with one random state shared by all members
+        shared_rng = state.pop('_local_rng', None)
+        if '_local_rngs' not in state:
+            state['_local_rngs'] = [np.random.RandomState(state['_seed'] + i) for i in range(state['_n_models'])] \
+                if shared_rng is None else [shared_rng] * state['_n_models']
+        self.__dict__.update(state)
+        self._n_workers = 0
+        self._workers = []
+        self._shm = None
+        self._lock = threading.Lock()
+        self._pending_rows = []
+        self._pending_y = []
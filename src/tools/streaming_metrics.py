@@ -0,0 +1,248 @@
+from collections import deque
+
+import numpy as np
+
+
+def get_scored_mask(y_pred) -> np.ndarray:
+    """
+    mask of rows having a prediction, model without enough learning gives None (or NaN) prediction
+    :param y_pred: array-like prediction
+    :return: bool array, None if every row is scored
+    """
+    y_pred = np.asarray(y_pred)
+    if y_pred.dtype.kind == 'f':
+        is_scored = ~np.isnan(y_pred)
+    elif y_pred.dtype == object:
+        is_scored = np.fromiter((p is not None and p == p for p in y_pred), dtype=bool, count=y_pred.size)
+    else:
+        return None
+    if is_scored.all():
+        return None
+    return is_scored
+
+
+class ConfusionMatrixCounter:
+    """
+    Binary confusion matrix counter, updated incrementally in O(batch).
+    Metrics are derived from TP / FP / TN / FN counts without keeping any prediction history.
+    """
+
+    def __init__(self, positive_label=1, zero_division=0.0):
+        """
+        :param positive_label: label of positive (target) class
+        :param zero_division: metric value returned when denominator is zero, same as sklearn zero_division
+        """
+        self._positive_label = positive_label
+        self._zero_division = zero_division
+        self.tp = 0
+        self.fp = 0
+        self.tn = 0
+        self.fn = 0
+
+    def update(self, y_true, y_pred):
+        """
+        accumulating one batch of prediction, unscored rows (None / NaN prediction) are not counted
+        :param y_true: array-like ground truth
+        :param y_pred: array-like prediction (class, not probability)
+        :return: self
+        """
+        y_true = np.asarray(y_true)
+        y_pred = np.asarray(y_pred)
+        if y_true.shape != y_pred.shape:
+            raise ValueError("y_true {} and y_pred {} shape mismatch".format(y_true.shape, y_pred.shape))
+        is_scored = get_scored_mask(y_pred)
+        if is_scored is not None:
+            y_true = y_true[is_scored]
+            y_pred = y_pred[is_scored]
+        y_true = y_true == self._positive_label
+        y_pred = y_pred == self._positive_label
+
+        tp = int(np.count_nonzero(y_true & y_pred))
+        fp = int(np.count_nonzero(y_pred)) - tp
+        fn = int(np.count_nonzero(y_true)) - tp
+        self.tp += tp
+        self.fp += fp
+        self.fn += fn
+        self.tn += y_true.size - tp - fp - fn
+        return self
+
+    def update_one(self, y_true, y_pred):
+        if y_pred is None or y_pred != y_pred:
+            # unscored row
+            return self
+        is_true = y_true == self._positive_label
+        is_pred = y_pred == self._positive_label
+        if is_true and is_pred:
+            self.tp += 1
+        elif is_pred:
+            self.fp += 1
+        elif is_true:
+            self.fn += 1
+        else:
+            self.tn += 1
+        return self
+
+    def add(self, other):
+        self.tp += other.tp
+        self.fp += other.fp
+        self.tn += other.tn
+        self.fn += other.fn
+        return self
+
+    def subtract(self, other):
+        self.tp -= other.tp
+        self.fp -= other.fp
+        self.tn -= other.tn
+        self.fn -= other.fn
+        return self
+
+    def reset(self):
+        self.tp = 0
+        self.fp = 0
+        self.tn = 0
+        self.fn = 0
+
+    def copy(self):
+        counter = ConfusionMatrixCounter(self._positive_label, self._zero_division)
+        return counter.add(self)
+
+    @property
+    def n_sample(self):
+        return self.tp + self.fp + self.tn + self.fn
+
+    def _safe_divide(self, numerator, denominator):
+        if denominator == 0:
+            return self._zero_division
+        return numerator / denominator
+
+    def get_accuracy(self):
+        return self._safe_divide(self.tp + self.tn, self.n_sample)
+
+    def get_recall(self):
+        return self._safe_divide(self.tp, self.tp + self.fn)
+
+    def get_precision(self):
+        return self._safe_divide(self.tp, self.tp + self.fp)
+
+    def get_f1_score(self):
+        return self._safe_divide(2 * self.tp, 2 * self.tp + self.fp + self.fn)
+
+    def get_metrics(self) -> dict:
+        return {
+            'accuracy': self.get_accuracy(),
+            'recall': self.get_recall(),
+            'precision': self.get_precision(),
+            'f1': self.get_f1_score(),
+        }
+
+
+class SlidingWindowConfusionMatrix:
+    """
+    Confusion matrix over the last `window_size` batches.
+    New batch is added and the evicted batch is subtracted, update cost is O(batch).
+    """
+
+    def __init__(self, window_size=10, positive_label=1, zero_division=0.0):
+        self._window_size = window_size
+        self._positive_label = positive_label
+        self._zero_division = zero_division
+        self._batch_counters = deque()
+        self._window_counter = ConfusionMatrixCounter(positive_label, zero_division)
+
+    def update(self, y_true, y_pred):
+        batch_counter = ConfusionMatrixCounter(self._positive_label, self._zero_division).update(y_true, y_pred)
+        self._batch_counters.append(batch_counter)
+        self._window_counter.add(batch_counter)
+        if len(self._batch_counters) > self._window_size:
+            self._window_counter.subtract(self._batch_counters.popleft())
+        return self
+
+    def get_counter(self) -> ConfusionMatrixCounter:
+        return self._window_counter
+
+    def get_metrics(self) -> dict:
+        return self._window_counter.get_metrics()
+
+
+class TumblingWindowConfusionMatrix:
+    """
+    Confusion matrix over non-overlapping windows of `window_size` batches.
+    Metrics of the last completed window is kept, current window is reset when it is completed.
+    """
+
+    def __init__(self, window_size=10, positive_label=1, zero_division=0.0):
+        self._window_size = window_size
+        self._n_batch_in_window = 0
+        self._current_counter = ConfusionMatrixCounter(positive_label, zero_division)
+        self._last_completed_counter = None
+
+    def update(self, y_true, y_pred):
+        self._current_counter.update(y_true, y_pred)
+        self._n_batch_in_window += 1
+        if self._n_batch_in_window >= self._window_size:
+            self._last_completed_counter = self._current_counter.copy()
+            self._current_counter.reset()
+            self._n_batch_in_window = 0
+        return self
+
+    def get_counter(self) -> ConfusionMatrixCounter:
+        """
+        counter of last completed window, or current window if no window completed yet
+        """
+        if self._last_completed_counter is None:
+            return self._current_counter
+        return self._last_completed_counter
+
+    def get_metrics(self) -> dict:
+        return self.get_counter().get_metrics()
+
+
+class MetricsHistory:
+    """
+    Fixed-size metrics history for trend display.
+    The latest `recent_capacity` points are kept as is in a ring buffer,
+    points falling out of it are down-sampled (averaged every `downsample_factor` points)
+    into an archive ring buffer of `archive_capacity` points. Memory is bounded no matter how long it runs.
+    """
+
+    def __init__(self, metric_names: list, recent_capacity=1000, archive_capacity=1000, downsample_factor=10):
+        self._metric_names = list(metric_names)
+        self._downsample_factor = downsample_factor
+        self._recent = deque(maxlen=recent_capacity)
+        self._archive = deque(maxlen=archive_capacity)
+        self._pending_bucket = []
+
+    def append(self, x_item, **metrics):
+        """
+        append one point of history
+        :param x_item: x axis item
+        :param metrics: metric name and value
+        :return:
+        """
+        if len(self._recent) == self._recent.maxlen:
+            self._downsample_into_archive(self._recent[0])
+        self._recent.append((x_item, tuple(metrics.get(name) for name in self._metric_names)))
+
+    def _downsample_into_archive(self, point):
+        self._pending_bucket.append(point)
+        if len(self._pending_bucket) >= self._downsample_factor:
+            x_item = self._pending_bucket[-1][0]
+            values = []
+            for i in range(len(self._metric_names)):
+                metric_values = [p[1][i] for p in self._pending_bucket if p[1][i] is not None]
+                values.append(sum(metric_values) / len(metric_values) if len(metric_values) > 0 else None)
+            self._archive.append((x_item, tuple(values)))
+            self._pending_bucket = []
+
+    def __len__(self):
+        return len(self._archive) + len(self._recent)
+
+    def _points(self):
+        return list(self._archive) + list(self._recent)
+
+    def get_x_list(self) -> list:
+        return [p[0] for p in self._points()]
+
+    def get_metric_list(self, metric_name: str) -> list:
+        i = self._metric_names.index(metric_name)
+        return [p[1][i] for p in self._points()]
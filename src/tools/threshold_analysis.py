@@ -0,0 +1,108 @@
+import numpy as np
+
+
+class ThresholdSweep:
+    """
+    Classification metrics of prediction probability at many cut thresholds in one vectorized pass.
+    Scores are sorted once with the cumulative count of positive answers,
+    confusion matrix at any threshold is then a binary search (predicted positive if score >= threshold).
+    """
+
+    def __init__(self, scores, y_true, positive_label=1, zero_division=0.0):
+        """
+        :param scores: prediction probability of positive class
+        :param y_true: ground truth
+        :param positive_label: label of positive (target) class
+        :param zero_division: metric value returned when denominator is zero, same as sklearn zero_division
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        is_positive = np.asarray(y_true) == positive_label
+        if scores.shape != is_positive.shape:
+            raise ValueError("scores {} and y_true {} shape mismatch".format(scores.shape, is_positive.shape))
+
+        is_valid_score = ~np.isnan(scores)
+        if not is_valid_score.all():
+            print("{} rows without prediction probability are skipped".format(
+                int(np.count_nonzero(~is_valid_score))))
+            scores = scores[is_valid_score]
+            is_positive = is_positive[is_valid_score]
+
+        order = np.argsort(scores, kind='mergesort')
+        self._sorted_scores = scores[order]
+        # number of positive answers in the first k rows of ascending scores
+        self._positive_prefix = np.concatenate(([0], np.cumsum(is_positive[order])))
+        self._n_sample = len(self._sorted_scores)
+        self._n_positive = int(self._positive_prefix[-1])
+        self._zero_division = zero_division
+
+    @property
+    def n_sample(self):
+        return self._n_sample
+
+    @property
+    def n_positive(self):
+        return self._n_positive
+
+    def get_confusion_counts(self, thresholds) -> (np.ndarray, np.ndarray, np.ndarray, np.ndarray):
+        """
+        :param thresholds: array-like of probability cut threshold
+        :return: tp, fp, tn, fn arrays aligned with thresholds
+        """
+        thresholds = np.asarray(thresholds, dtype=np.float64)
+        n_predicted_negative = np.searchsorted(self._sorted_scores, thresholds, side='left')
+        tp = self._n_positive - self._positive_prefix[n_predicted_negative]
+        fp = (self._n_sample - n_predicted_negative) - tp
+        fn = self._n_positive - tp
+        tn = self._n_sample - tp - fp - fn
+        return tp, fp, tn, fn
+
+    def _safe_divide(self, numerator, denominator) -> np.ndarray:
+        numerator = np.asarray(numerator, dtype=np.float64)
+        denominator = np.asarray(denominator, dtype=np.float64)
+        result = np.full(numerator.shape, self._zero_division, dtype=np.float64)
+        np.divide(numerator, denominator, out=result, where=denominator != 0)
+        return result
+
+    def get_metrics(self, thresholds) -> dict:
+        """
+        :param thresholds: array-like of probability cut threshold
+        :return: dict of accuracy, recall, precision and f1 arrays aligned with thresholds
+        """
+        tp, fp, tn, fn = self.get_confusion_counts(thresholds)
+        return {
+            'accuracy': self._safe_divide(tp + tn, np.full(tp.shape, self._n_sample)),
+            'recall': self._safe_divide(tp, tp + fn),
+            'precision': self._safe_divide(tp, tp + fp),
+            'f1': self._safe_divide(2 * tp, 2 * tp + fp + fn),
+        }
+
+    def get_distinct_thresholds(self) -> np.ndarray:
+        """
+        :return: distinct scores in descending order, every point of the curves
+        """
+        return np.unique(self._sorted_scores)[::-1]
+
+    def get_roc_curve(self) -> (np.ndarray, np.ndarray, np.ndarray):
+        """
+        :return: fpr, tpr, thresholds in descending order, starting from (0, 0) at threshold inf like sklearn
+        """
+        thresholds = np.concatenate(([np.inf], self.get_distinct_thresholds()))
+        tp, fp, tn, fn = self.get_confusion_counts(thresholds)
+        fpr = self._safe_divide(fp, fp + tn)
+        tpr = self._safe_divide(tp, tp + fn)
+        return fpr, tpr, thresholds
+
+    def get_roc_auc(self) -> float:
+        fpr, tpr, _ = self.get_roc_curve()
+        # trapezoidal rule, fpr is non-decreasing along descending thresholds
+        return float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))
+
+    def get_pr_curve(self) -> (np.ndarray, np.ndarray, np.ndarray):
+        """
+        :return: precision, recall, thresholds in descending order
+        """
+        thresholds = self.get_distinct_thresholds()
+        tp, fp, tn, fn = self.get_confusion_counts(thresholds)
+        precision = self._safe_divide(tp, tp + fp)
+        recall = self._safe_divide(tp, tp + fn)
+        return precision, recall, thresholds
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+
+class TimePartitionIndex:
+    """
+    Row offset index over a time column sorted in ascending order.
+    Row range of each date and each month is computed once, sub-selection by date / month is a dict lookup
+    and by time interval is a binary search, both return a slice of row positions (no boolean mask over all rows).
+    NaT rows (sorted to the end) are not indexed.
+    """
+
+    def __init__(self, time_values):
+        """
+        :param time_values: sorted datetime64 array-like
+        """
+        self._time_values = np.asarray(time_values, dtype='datetime64[ns]')
+        n_valid = len(self._time_values) - int(np.count_nonzero(np.isnat(self._time_values)))
+        valid_time_values = self._time_values[:n_valid]
+        if n_valid > 1 and np.any(valid_time_values[1:] < valid_time_values[:-1]):
+            raise ValueError("time values should be sorted in ascending order")
+        self._n_valid = n_valid
+
+        self._date_offsets = {}
+        unique_dates, date_starts = np.unique(valid_time_values.astype('datetime64[D]'), return_index=True)
+        for date, start, end in zip(unique_dates, date_starts, np.append(date_starts[1:], n_valid)):
+            self._date_offsets[date.astype(object)] = (int(start), int(end))
+
+        self._month_year_offsets = {}
+        unique_months, month_starts = np.unique(valid_time_values.astype('datetime64[M]'), return_index=True)
+        for month, start, end in zip(unique_months, month_starts, np.append(month_starts[1:], n_valid)):
+            self._month_year_offsets[pd.Timestamp(month).strftime('%y-%m')] = (int(start), int(end))
+
+    def get_date_list(self) -> list:
+        """
+        :return: sorted list of datetime.date
+        """
+        return list(self._date_offsets.keys())
+
+    def get_month_year_list(self) -> list:
+        """
+        :return: sorted list of month/year string in `%y-%m`
+        """
+        return list(self._month_year_offsets.keys())
+
+    def get_date_slice(self, selected_date) -> slice:
+        """
+        :param selected_date: datetime.date, datetime, or date string e.g. "2021-01-01"
+        :return: slice of row positions, empty slice if date not found
+        """
+        start, end = self._date_offsets.get(pd.Timestamp(selected_date).date(), (0, 0))
+        return slice(start, end)
+
+    def get_month_year_slice(self, selected_month_year) -> slice:
+        """
+        :param selected_month_year: month/year in `%y-%m` (e.g. "21-01"), or parsable month e.g. "2021-01"
+        :return: slice of row positions, empty slice if month not found
+        """
+        offsets = self._month_year_offsets.get(selected_month_year)
+        if offsets is None:
+            offsets = self._month_year_offsets.get(pd.Timestamp(selected_month_year).strftime('%y-%m'), (0, 0))
+        start, end = offsets
+        return slice(start, end)
+
+    def get_time_interval_slice(self, start_time, end_time) -> slice:
+        """
+        :param start_time: start time (inclusive)
+        :param end_time: end time (inclusive)
+        :return: slice of row positions
+        """
+        valid_time_values = self._time_values[:self._n_valid]
+        start = np.searchsorted(valid_time_values, pd.Timestamp(start_time).to_datetime64(), side='left')
+        end = np.searchsorted(valid_time_values, pd.Timestamp(end_time).to_datetime64(), side='right')
+        return slice(int(start), int(max(start, end)))
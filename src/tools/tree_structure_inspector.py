@@ -1,4 +1,31 @@
+import glob
+import os
+import threading
 import time
+import traceback
+from concurrent import futures
+from datetime import datetime
+
+
+def get_tree_fingerprint(tree) -> tuple:
+    """
+    structure fingerprint of a hoeffding tree: node count, depth and split (feature, threshold) in dfs order.
+    statistics in leaves are not included, fingerprint changes only when the tree splits or prunes.
+    :param tree: river hoeffding tree
+    :return: hashable tuple
+    """
+    splits = []
+    root = getattr(tree, '_root', None)
+    if root is not None and hasattr(root, 'iter_dfs'):
+        for node in root.iter_dfs():
+            feature = getattr(node, 'feature', None)
+            if feature is not None:
+                splits.append((feature, getattr(node, 'threshold', None)))
+    return (
+        getattr(tree, 'n_nodes', None),
+        getattr(tree, 'height', None),
+        tuple(splits)
+    )
 
 
 class HoeffdingEnsembleTreeInspector:
@@ -28,3 +55,124 @@ class HoeffdingEnsembleTreeInspector:
         trees = self.__model.models
         return trees[tree_index].draw()
 
+    def get_tree_fingerprints(self) -> list:
+        return [get_tree_fingerprint(tree) for tree in self.__model.models]
+
+
+class IncrementalTreeStructureRenderer:
+    """
+    Rendering tree structure figures of an ensemble incrementally.
+    Each call fingerprints the trees and renders only the trees whose structure changed since the last render,
+    graphviz rendering (`dot` subprocess) runs in a background thread pool instead of the caller thread.
+
+    Output file names are the same as HoeffdingEnsembleTreeInspector.draw_tree:
+    `{fig_file_name}_tree_{i}.png` for all trees (tree_index=None), `{fig_file_name}.png` for one tree.
+    With `timestamped=True` file name is prefixed by timestamp as a historical record,
+    only the newest `max_kept_files` records are kept in the folder.
+    """
+
+    def __init__(self, output_fig_dir: str, fig_file_name: str, tree_index=None, timestamped=False,
+                 max_kept_files=None, render_pool: futures.Executor = None):
+        """
+        :param output_fig_dir: folder of rendered figures
+        :param fig_file_name: figure file name
+        :param tree_index: index of tree to render, None for all trees
+        :param timestamped: prefix file name by timestamp, keeping each render as a historical record
+        :param max_kept_files: max number of historical records kept in folder, None for no limit
+        :param render_pool: executor to run graphviz render, a 2 thread pool is created if not provided
+        """
+        if output_fig_dir[-1] != '/':
+            output_fig_dir += '/'
+        self._output_fig_dir = output_fig_dir
+        self._fig_file_name = fig_file_name
+        self._tree_index = tree_index
+        self._timestamped = timestamped
+        self._max_kept_files = max_kept_files
+        self._render_pool = render_pool if render_pool is not None else futures.ThreadPoolExecutor(2)
+
+        self._fingerprints = {}
+        self._render_futures = {}
+        # rendered counter is updated from pool threads
+        self._rendered_cnt_lock = threading.Lock()
+        self._rendered_cnt = 0
+        self._skipped_cnt = 0
+
+    @property
+    def rendered_cnt(self):
+        return self._rendered_cnt
+
+    @property
+    def skipped_cnt(self):
+        return self._skipped_cnt
+
+    def _get_render_path(self, i) -> str:
+        fig_file_name = self._fig_file_name
+        if self._tree_index is None:
+            fig_file_name += "_tree_{}".format(i)
+        if self._timestamped:
+            fig_file_name = "{}_{}".format(datetime.now().strftime('%y-%m-%d-%H-%M-%S'), fig_file_name)
+        return self._output_fig_dir + fig_file_name
+
+    def render_dirty_trees(self, model) -> list:
+        """
+        submitting render of trees changed since last render.
+        trees are read (fingerprint and tree.draw()) in caller thread and the pool only renders the built graph,
+        the model must not be trained meanwhile, e.g. a published snapshot or a checkpoint copy of the model.
+        :param model: ensemble model with `models`
+        :return: list of tree index submitted to render
+        """
+        trees = model.models
+        tree_index_list = range(len(trees)) if self._tree_index is None else [self._tree_index]
+
+        submitted_list = []
+        for i in tree_index_list:
+            fingerprint = get_tree_fingerprint(trees[i])
+            if self._fingerprints.get(i) == fingerprint:
+                self._skipped_cnt += 1
+                continue
+            pending_future = self._render_futures.get(i)
+            if pending_future is not None and not pending_future.done():
+                # still rendering previous structure, keep it dirty for next call
+                continue
+
+            g = trees[i].draw()
+            self._fingerprints[i] = fingerprint
+            self._render_futures[i] = self._render_pool.submit(self._render, g, self._get_render_path(i))
+            submitted_list.append(i)
+        return submitted_list
+
+    def _render(self, g, render_path):
+        try:
+            g.render(render_path, format='png')
+            with self._rendered_cnt_lock:
+                self._rendered_cnt += 1
+        except Exception:
+            print("Tree structure render error {}".format(render_path))
+            print(traceback.format_exc())
+            return
+        if self._timestamped and self._max_kept_files is not None:
+            self._remove_outdated_files()
+
+    def _remove_outdated_files(self):
+        """
+        keeping newest `max_kept_files` historical png, removing older png and its graphviz source file
+        """
+        fig_file_suffix = self._fig_file_name if self._tree_index is not None else self._fig_file_name + "_tree_*"
+        png_list = sorted(
+            glob.glob(self._output_fig_dir + "*_{}.png".format(fig_file_suffix)),
+            key=os.path.getmtime
+        )
+        for png_path in png_list[:max(0, len(png_list) - self._max_kept_files)]:
+            for path in (png_path, png_path[:-len('.png')]):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def wait(self, timeout=None):
+        """
+        waiting for submitted render to finish
+        :param timeout: seconds
+        :return:
+        """
+        futures.wait([f for f in self._render_futures.values()], timeout=timeout)
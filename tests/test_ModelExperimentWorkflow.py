@@ -41,3 +41,68 @@ def test_subset_rows_split_train_dataset():
 def test_batch_pred_test_dataset():
 
     assert False
+
+
+def test_row_sliced_dataset_hands_out_views():
+    import numpy as np
+    import pandas as pd
+    from task1_model_evaluation.ModelExperimentWorkflow import RowSlicedDataset
+
+    features = pd.DataFrame({'a': [1.0, 2.0, 3.0, 4.0], 'b': [0.1, 0.2, 0.3, 0.4]}, index=[10, 11, 12, 13])
+    target = pd.Series([0, 1, 1, 0], index=[10, 11, 12, 13])
+    dataset = RowSlicedDataset(features, target)
+
+    feature_array, target_array = dataset.get_arrays(1, 3)
+    assert feature_array.tolist() == [[2.0, 0.2], [3.0, 0.3]]
+    assert target_array.tolist() == [1, 1]
+    assert np.shares_memory(feature_array, dataset.get_arrays()[0])
+
+    dict_rows, target_array = dataset.get_dict_rows(2, None)
+    assert dict_rows == [{'a': 3.0, 'b': 0.3}, {'a': 4.0, 'b': 0.4}]
+    assert target_array.tolist() == [1, 0]
+    assert dataset.get_dict_rows(2, 3)[0][0] is dict_rows[0]
+
+
+def test_incremental_evaluation_by_running_counters():
+    import numpy as np
+    import pandas as pd
+    from tools.DataPreparation import DataPreparation
+    from task1_model_evaluation.ModelExperimentWorkflow import ModelSklearnWorkflow
+
+    class _ToyDataPreparation(DataPreparation):
+        def __init__(self):
+            self._df = pd.DataFrame({'x': [0, 1, 1, 0, 1, 0, 1, 1, 0, 0]})
+            self._target = pd.Series([0, 1, 0, 0, 1, 1, 1, 1, 0, 0])
+
+        def _data_prepare(self):
+            pass
+
+    class _EchoModel:
+        """predicting the feature as class"""
+
+        def fit(self, X, y):
+            return self
+
+        def predict(self, X):
+            return np.asarray(X)[:, 0]
+
+    exp_flow = ModelSklearnWorkflow(_ToyDataPreparation(), keep_prediction_history=True, sliding_window_size=1)
+    exp_flow.set_model(_EchoModel())
+
+    exp_flow.incremental_prediction(0, 5)
+    assert exp_flow.incremental_evaluate_model_get_accuracy_recall() == (0.8, 1.0)
+    exp_flow.incremental_prediction(5, 10)
+    assert exp_flow.incremental_evaluate_model_get_accuracy_recall() == (0.8, 0.8)
+    assert exp_flow.incremental_evaluate_sliding_window_get_accuracy_recall() == (0.8, 2 / 3)
+    pred_result, target = exp_flow.get_incremental_prediction_history()
+    assert len(pred_result) == len(target) == 10
+
+    # river model predicts None before learning anything, unscored rows are counted as misses
+    exp_flow._accumulate_incremental_prediction(np.array([None, 1, None], dtype=object), np.array([1, 1, 0]))
+    confusion_matrix = exp_flow.get_incremental_confusion_matrix()
+    assert confusion_matrix.n_sample == 13
+    assert exp_flow.get_incremental_n_unscored_rows() == 2
+    assert exp_flow.incremental_evaluate_model_get_accuracy_recall() == (9 / 13, 5 / 7)
+    pred_result, target = exp_flow.get_incremental_prediction_history()
+    assert len(pred_result) == len(target) == 13
+    assert pred_result[10] is None
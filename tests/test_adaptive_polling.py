@@ -0,0 +1,55 @@
+from serving.adaptive_polling import AdaptivePollingController, get_consumer_lag
+
+
+def test_max_records_bounded_by_training_cost():
+    controller = AdaptivePollingController(target_batch_time_sec=1.0, min_records=10, max_records=1000)
+    assert controller.get_max_records() == 10
+
+    # 1 ms per event -> 1000 events per second, clipped by max_records
+    controller.record_polling(100, 0.1)
+    assert controller.get_max_records() == 1000
+
+    controller = AdaptivePollingController(target_batch_time_sec=1.0, min_records=10, max_records=1000)
+    # 10 ms per event -> 100 events per second
+    controller.record_polling(50, 0.5)
+    assert controller.get_max_records() == 100
+
+
+def test_backoff_only_when_idle():
+    controller = AdaptivePollingController(busy_poll_timeout_ms=10, min_idle_poll_timeout_ms=100,
+                                           max_poll_timeout_ms=500)
+    assert controller.get_poll_timeout_ms() == 10
+
+    controller.record_polling(0, 0.0)
+    assert controller.get_poll_timeout_ms() == 100
+    controller.record_polling(0, 0.0)
+    assert controller.get_poll_timeout_ms() == 200
+    controller.record_polling(0, 0.0)
+    controller.record_polling(0, 0.0)
+    assert controller.get_poll_timeout_ms() == 500
+
+    controller.record_polling(5, 0.01)
+    assert controller.get_poll_timeout_ms() == 10
+
+
+class _FakeConsumer:
+
+    def __init__(self, end_offsets, positions):
+        self._end_offsets = end_offsets
+        self._positions = positions
+
+    def assignment(self):
+        return set(self._end_offsets.keys())
+
+    def end_offsets(self, partitions):
+        return {tp: self._end_offsets[tp] for tp in partitions}
+
+    def position(self, tp):
+        return self._positions[tp]
+
+
+def test_get_consumer_lag():
+    consumer = _FakeConsumer({('testTopic', 0): 100, ('testTopic', 1): 50},
+                             {('testTopic', 0): 90, ('testTopic', 1): 50})
+    assert get_consumer_lag(consumer) == {('testTopic', 0): 10, ('testTopic', 1): 0}
+    assert get_consumer_lag(object()) == {}
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from tools.batch_scoring import predict_proba_true_class, cast_proba_to_class
+
+
+class DummyRiverModel:
+
+    def predict_proba_one(self, x):
+        if x['X1'] < 0:
+            return {}
+        return {0: 1 - x['X1'], 1: x['X1']}
+
+
+def test_predict_proba_true_class():
+    df = pd.DataFrame({'X1': [0.1, 0.7, -1.0], 'X2': [1, 2, 3]})
+
+    pred_proba = predict_proba_true_class(DummyRiverModel(), df)
+
+    assert pred_proba.shape == (3,)
+    assert pred_proba[:2].tolist() == [0.1, 0.7]
+    assert np.isnan(pred_proba[2])
+
+
+def test_cast_proba_to_class():
+    pred_class = cast_proba_to_class(np.array([0.1, 0.5, 0.7]), proba_cut_point=0.5)
+    assert pred_class.tolist() == [0, 1, 1]
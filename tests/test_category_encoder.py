@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from tools.category_encoder import IncrementalLabelEncoder
+
+
+def test_codes_are_stable_across_chunks():
+    encoder = IncrementalLabelEncoder()
+    assert encoder.transform(['b', 'a', 'b']).tolist() == [0, 1, 0]
+    assert encoder.transform(['c', 'a']).tolist() == [2, 1]
+    assert encoder.classes_ == ['b', 'a', 'c']
+    assert encoder.inverse_transform([2, 0]) == ['c', 'b']
+
+
+def test_fit_in_sorted_order_like_sklearn():
+    encoder = IncrementalLabelEncoder()
+    assert encoder.fit_transform(['tue', 'mon', 'wed', 'mon']).tolist() == [1, 0, 2, 0]
+
+
+def test_unseen_category_handling():
+    encoder = IncrementalLabelEncoder(classes=['a', 'b'], handle_unknown='ignore', unknown_value=-1)
+    assert encoder.transform(['a', 'z']).tolist() == [0, -1]
+    assert len(encoder) == 2
+
+    encoder = IncrementalLabelEncoder(classes=['a'], handle_unknown='error')
+    with pytest.raises(ValueError):
+        encoder.transform(['z'])
+
+
+def test_missing_value_is_kept():
+    codes = IncrementalLabelEncoder().transform(['a', None, 'b'])
+    assert codes[0] == 0
+    assert np.isnan(codes[1])
+    assert codes[2] == 1
+
+
+def test_missing_value_gets_reserved_code():
+    encoder = IncrementalLabelEncoder(missing_value=-2)
+    codes = encoder.transform(['a', None, float('nan'), 'b'])
+    assert codes.dtype == np.int64
+    assert codes.tolist() == [0, -2, -2, 1]
+    assert encoder.transform_one(None) == -2
+    assert encoder.classes_ == ['a', 'b']
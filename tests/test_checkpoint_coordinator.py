@@ -0,0 +1,153 @@
+from collections import namedtuple
+
+from serving import checkpoint_coordinator
+from serving.checkpoint_coordinator import CheckpointCoordinator
+
+
+ConsumerRecord = namedtuple('ConsumerRecord', ['topic', 'partition', 'offset'])
+TopicPartition = namedtuple('TopicPartition', ['topic', 'partition'])
+
+
+class _SeekRecorder:
+
+    def __init__(self):
+        self.seek_list = []
+
+    def seek(self, tp, offset):
+        self.seek_list.append((tp, offset))
+
+
+def test_checkpoint_round_trip_resumes_from_offsets(tmp_path):
+    coordinator = CheckpointCoordinator(str(tmp_path), checkpoint_interval_events=3, checkpoint_interval_sec=3600)
+    assert coordinator.load_checkpoint() is None
+    assert not coordinator.is_checkpoint_due()
+
+    coordinator.track_records([ConsumerRecord('testTopic', 0, 10), ConsumerRecord('testTopic', 0, 11)])
+    assert not coordinator.is_checkpoint_due()
+    coordinator.track_records([ConsumerRecord('testTopic', 1, 4)])
+    assert coordinator.is_checkpoint_due()
+
+    checkpoint = coordinator.save_checkpoint({'weights': [1, 2]}, trained_event_counter=3)
+    assert checkpoint.offsets == {('testTopic', 0): 12, ('testTopic', 1): 5}
+    assert not coordinator.is_checkpoint_due()
+
+    # events trained after checkpoint are not in checkpoint
+    coordinator.track_records([ConsumerRecord('testTopic', 0, 12)])
+
+    restarted_coordinator = CheckpointCoordinator(str(tmp_path))
+    restored = restarted_coordinator.load_checkpoint()
+    assert restored.model == {'weights': [1, 2]}
+    assert restored.trained_event_counter == 3
+    assert restored.offsets == {('testTopic', 0): 12, ('testTopic', 1): 5}
+
+    consumer = _SeekRecorder()
+    restarted_coordinator.seek_assigned_partitions(
+        consumer, [TopicPartition('testTopic', 0), TopicPartition('testTopic', 2)]
+    )
+    assert consumer.seek_list == [(TopicPartition('testTopic', 0), 12)]
+
+
+def test_broken_checkpoint_is_ignored(tmp_path):
+    coordinator = CheckpointCoordinator(str(tmp_path))
+    with open(coordinator.checkpoint_path, 'wb') as f:
+        f.write(b'not a pickle')
+    assert coordinator.load_checkpoint() is None
+
+
+def test_read_checkpoint_keeps_tracked_offsets(tmp_path):
+    coordinator = CheckpointCoordinator(str(tmp_path))
+    coordinator.track_records([ConsumerRecord('testTopic', 0, 10)])
+    coordinator.save_checkpoint({'weights': [1]}, trained_event_counter=1, metrics={'accuracy': 1.0})
+    coordinator.track_records([ConsumerRecord('testTopic', 0, 11)])
+
+    checkpoint = coordinator.read_checkpoint()
+    assert checkpoint.model == {'weights': [1]}
+    assert checkpoint.offsets == {('testTopic', 0): 11}
+    assert checkpoint.metrics == {'accuracy': 1.0}
+    # offsets tracked after the checkpoint are not rolled back
+    assert coordinator.get_tracked_offsets() == {('testTopic', 0): 12}
+
+
+class _GroupMemberConsumer:
+    """consumer of a group sharing committed offsets with other members"""
+
+    def __init__(self, group_offsets, partitions):
+        self._group_offsets = group_offsets
+        self.partitions = list(partitions)
+        self.seek_list = []
+
+    def assignment(self):
+        return {TopicPartition('testTopic', partition) for partition in self.partitions}
+
+    def commit(self, offsets):
+        self._group_offsets.update(offsets)
+
+    def committed(self, tp):
+        return self._group_offsets.get((tp.topic, tp.partition))
+
+    def seek(self, tp, offset):
+        self.seek_list.append((tp, offset))
+
+
+def test_rebalance_between_two_workers(tmp_path, monkeypatch):
+    # commit offsets as {(topic, partition): offset}, kafka structs are not needed
+    monkeypatch.setattr(checkpoint_coordinator, '_build_commit_offsets', dict)
+    group_offsets = {}
+    worker_a = CheckpointCoordinator(str(tmp_path), checkpoint_file_name='worker_a.pickle')
+    worker_b = CheckpointCoordinator(str(tmp_path), checkpoint_file_name='worker_b.pickle')
+    consumer_a = _GroupMemberConsumer(group_offsets, [0, 1])
+    consumer_b = _GroupMemberConsumer(group_offsets, [])
+
+    worker_a.track_records([ConsumerRecord('testTopic', 0, 9), ConsumerRecord('testTopic', 1, 4)])
+    worker_a.save_checkpoint('model a', trained_event_counter=2, kafka_consumer=consumer_a)
+    worker_a.track_records([ConsumerRecord('testTopic', 1, 5)])
+
+    # partition 1 moves to worker b: a checkpoints its final offset, then releases it
+    revoked = [TopicPartition('testTopic', 1)]
+    worker_a.save_checkpoint('model a', trained_event_counter=3, kafka_consumer=consumer_a)
+    worker_a.release_partitions(revoked)
+    consumer_a.partitions = [0]
+    assert group_offsets == {('testTopic', 0): 10, ('testTopic', 1): 6}
+
+    consumer_b.partitions = [1]
+    worker_b.seek_assigned_partitions(consumer_b, revoked)
+    worker_b.track_records([ConsumerRecord('testTopic', 1, offset) for offset in range(6, 21)])
+    worker_b.save_checkpoint('model b', trained_event_counter=15, kafka_consumer=consumer_b)
+
+    # worker a only commits its own partition, offset of partition 1 is not moved back
+    worker_a.track_records([ConsumerRecord('testTopic', 0, 10)])
+    checkpoint = worker_a.save_checkpoint('model a', trained_event_counter=4, kafka_consumer=consumer_a)
+    assert checkpoint.offsets == {('testTopic', 0): 11}
+    assert group_offsets == {('testTopic', 0): 11, ('testTopic', 1): 21}
+
+
+def test_stale_checkpoint_offset_is_not_resumed(tmp_path):
+    coordinator = CheckpointCoordinator(str(tmp_path))
+    coordinator.track_records([ConsumerRecord('testTopic', 0, 9), ConsumerRecord('testTopic', 1, 4)])
+    coordinator.save_checkpoint('model', trained_event_counter=2)
+
+    # partition 1 was consumed up to 21 by another worker before this worker restarted and got it back
+    restarted_coordinator = CheckpointCoordinator(str(tmp_path))
+    restarted_coordinator.load_checkpoint()
+    consumer = _GroupMemberConsumer({('testTopic', 0): 10, ('testTopic', 1): 21}, [0, 1])
+    restarted_coordinator.seek_assigned_partitions(
+        consumer, [TopicPartition('testTopic', 0), TopicPartition('testTopic', 1)]
+    )
+    assert consumer.seek_list == [(TopicPartition('testTopic', 0), 10)]
+    assert restarted_coordinator.get_tracked_offsets() == {('testTopic', 0): 10}
+
+
+def test_last_checkpoint_info_is_kept_in_memory(tmp_path):
+    coordinator = CheckpointCoordinator(str(tmp_path))
+    assert coordinator.get_last_checkpoint_info() is None
+    coordinator.track_records([ConsumerRecord('testTopic', 0, 10)])
+    checkpoint = coordinator.save_checkpoint({'weights': [1]}, trained_event_counter=1, metrics={'accuracy': 1.0})
+
+    info = coordinator.get_last_checkpoint_info()
+    assert info.model is None
+    assert (info.offsets, info.trained_event_counter, info.saved_time, info.metrics) == \
+        ({('testTopic', 0): 11}, 1, checkpoint.saved_time, {'accuracy': 1.0})
+
+    restarted_coordinator = CheckpointCoordinator(str(tmp_path))
+    restarted_coordinator.load_checkpoint()
+    assert restarted_coordinator.get_last_checkpoint_info().saved_time == checkpoint.saved_time
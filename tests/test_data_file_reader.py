@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools.data_file_reader import read_data_file, read_data_files, downcast_numeric_dtypes
+
+
+def _make_df():
+    return pd.DataFrame({
+        'DateTime': ['2021-01-01 00:00:00', '2021-01-01 00:05:00', '2021-01-01 00:10:00'],
+        'GantryID': ['01F0005S', '01F0005S', '01F0017N'],
+        'Traffic': [120, 98, 30000],
+        'Speed': [82.5, 90.0, 77.25],
+        'Ratio': [0.1, 0.2, 0.3],
+    })
+
+
+def test_downcast_numeric_dtypes_is_lossless_by_default():
+    df = downcast_numeric_dtypes(_make_df())
+    assert df['Traffic'].dtype == np.int16
+    # 82.5 / 90.0 / 77.25 are exact in float32, 0.1 is not
+    assert df['Speed'].dtype == np.float32
+    assert df['Ratio'].dtype == np.float64
+
+    df = downcast_numeric_dtypes(_make_df(), lossy_float=True)
+    assert df['Ratio'].dtype == np.float32
+
+
+def test_read_csv_with_projection_and_dtype(tmp_path):
+    csv_path = str(tmp_path / 'traffic.csv')
+    _make_df().to_csv(csv_path, index=False)
+
+    df = read_data_file(csv_path, usecols=['DateTime', 'Traffic', 'Ratio'], dtype={'Traffic': 'int32'},
+                        downcast=True)
+    assert list(df.columns) == ['DateTime', 'Traffic', 'Ratio']
+    # explicitly specified dtype is not downcast
+    assert df['Traffic'].dtype == np.int32
+    assert df['Ratio'].tolist() == [0.1, 0.2, 0.3]
+
+
+def test_read_parquet_with_projection(tmp_path):
+    pytest.importorskip('pyarrow')
+    parquet_path = str(tmp_path / 'traffic.parquet')
+    _make_df().to_parquet(parquet_path, index=False)
+
+    df = read_data_file(parquet_path, usecols=['GantryID', 'Speed'], downcast=True)
+    assert list(df.columns) == ['GantryID', 'Speed']
+    assert df['Speed'].dtype == np.float32
+
+
+def test_read_data_files_keeps_file_order(tmp_path):
+    path_list = []
+    for i in range(4):
+        path = str(tmp_path / 'traffic_{}.csv'.format(i))
+        pd.DataFrame({'month': [i, i], 'Traffic': [10 * i, 10 * i + 1]}).to_csv(path, index=False)
+        path_list.append(path)
+
+    serial_df = read_data_files(path_list, n_workers=1, show_progress=False)
+    parallel_df = read_data_files(path_list, n_workers=2, show_progress=False)
+    assert serial_df['month'].tolist() == [0, 0, 1, 1, 2, 2, 3, 3]
+    pd.testing.assert_frame_equal(serial_df, parallel_df)
@@ -0,0 +1,35 @@
+import threading
+
+from serving.figure_render_worker import LatestFigureRenderWorker
+
+
+class DummyFigure:
+
+    def __init__(self, value, saved):
+        self._value = value
+        self._saved = saved
+
+    def savefig(self, path):
+        self._saved.append((path, self._value))
+
+
+def test_render_worker_coalesces_burst():
+    saved = []
+    release_draw = threading.Event()
+
+    def draw(value):
+        release_draw.wait(5)
+        return DummyFigure(value, saved)
+
+    worker = LatestFigureRenderWorker(draw)
+    worker.submit(['first.png'], 0)
+    # first job is blocked in drawing, following burst only keep the latest one
+    for i in range(1, 10):
+        worker.submit(['latest.png', 'online.png'], i)
+    release_draw.set()
+    worker.stop(timeout=5)
+
+    assert ('latest.png', 9) in saved
+    assert ('online.png', 9) in saved
+    assert all(value in (0, 9) for path, value in saved)
+    assert worker.dropped_cnt >= 8
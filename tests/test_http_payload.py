@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+from tools.http_payload import encode_data_payload, decode_data_payload, X_AXIS_NAME_HEADER, LABEL_NAME_HEADER
+
+
+def test_http_payload_round_trip():
+    df = pd.DataFrame({'X1': [1.5, 2.5, 3.5], 'Y': [0, 1, 0]})
+
+    for payload_format in ['json', 'msgpack']:
+        body, headers = encode_data_payload(df, x_axis_name=3, label_name='Y', payload_format=payload_format)
+        x_axis_item, label_name, decoded_df = decode_data_payload(headers['content-type'], body, headers)
+
+        assert x_axis_item == 3
+        assert label_name == 'Y'
+        assert decoded_df['X1'].tolist() == [1.5, 2.5, 3.5]
+        assert decoded_df['Y'].tolist() == [0, 1, 0]
+
+
+def test_http_payload_table_round_trip():
+    pytest.importorskip('pyarrow')
+    df = pd.DataFrame({'X1': [1.5, 2.5, 3.5], 'Y': [0, 1, 0]})
+
+    for payload_format in ['arrow', 'parquet']:
+        for x_axis_name in [3, '2021-01']:
+            body, headers = encode_data_payload(df, x_axis_name=x_axis_name, label_name='Y',
+                                                payload_format=payload_format)
+            assert X_AXIS_NAME_HEADER in headers and LABEL_NAME_HEADER in headers
+            x_axis_item, label_name, decoded_df = decode_data_payload(headers['content-type'], body, headers)
+
+            assert x_axis_item == x_axis_name
+            assert label_name == 'Y'
+            assert decoded_df['X1'].tolist() == [1.5, 2.5, 3.5]
+            assert decoded_df['Y'].tolist() == [0, 1, 0]
+
+
+def test_plain_text_metadata_header():
+    pytest.importorskip('pyarrow')
+    df = pd.DataFrame({'X1': [1.5], 'Y': [1]})
+    body, headers = encode_data_payload(df, payload_format='arrow')
+    headers.update({X_AXIS_NAME_HEADER: '2021-01', LABEL_NAME_HEADER: 'Y'})
+
+    x_axis_item, label_name, _ = decode_data_payload(headers['content-type'], body, headers)
+    assert (x_axis_item, label_name) == ('2021-01', 'Y')
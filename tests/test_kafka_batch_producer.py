@@ -0,0 +1,126 @@
+import pytest
+
+import tools.kafka_batch_producer as kafka_batch_producer
+from tools.kafka_batch_producer import BatchedKafkaProducer
+
+
+class _FakeFuture:
+    """kafka future stand-in, callbacks are invoked with extra args followed by the result"""
+
+    def __init__(self):
+        self.callbacks = []
+        self.errbacks = []
+
+    def add_callback(self, fn, *args):
+        self.callbacks.append((fn, args))
+        return self
+
+    def add_errback(self, fn, *args):
+        self.errbacks.append((fn, args))
+        return self
+
+    def success(self, value):
+        for fn, args in self.callbacks:
+            fn(*args, value)
+
+    def failure(self, exception):
+        for fn, args in self.errbacks:
+            fn(*args, exception)
+
+
+class _FakeKafkaProducer:
+
+    def __init__(self, **configs):
+        self.configs = configs
+        self.sent = []
+        self.futures = []
+        self.n_flush = 0
+        self.is_closed = False
+
+    def send(self, topic, value, key=None, headers=None):
+        self.sent.append((topic, value, key, headers))
+        future = _FakeFuture()
+        self.futures.append(future)
+        return future
+
+    def flush(self, timeout=None):
+        self.n_flush += 1
+        for future in self.futures:
+            future.success('metadata')
+        self.futures = []
+
+    def close(self, timeout=None):
+        self.is_closed = True
+
+
+@pytest.fixture
+def fake_producers(monkeypatch):
+    created = []
+
+    def make_producer(**configs):
+        created.append(_FakeKafkaProducer(**configs))
+        return created[-1]
+
+    monkeypatch.setattr(kafka_batch_producer, 'KafkaProducer', make_producer)
+    return created
+
+
+def test_batching_configs(fake_producers):
+    BatchedKafkaProducer('localhost:9092', linger_ms=50, batch_size=1024, compression_type='gzip', acks='all',
+                         client_id='pumper')
+
+    assert fake_producers[0].configs == {
+        'bootstrap_servers': 'localhost:9092',
+        'linger_ms': 50,
+        'batch_size': 1024,
+        'compression_type': 'gzip',
+        'acks': 'all',
+        'client_id': 'pumper',
+    }
+
+
+def test_delivery_callbacks(fake_producers):
+    producer = BatchedKafkaProducer('localhost:9092')
+    headers = [('content-type', b'application/json')]
+    futures = [producer.send('testTopic', b'payload-%d' % i, headers=headers) for i in range(3)]
+
+    assert fake_producers[0].sent[0] == ('testTopic', b'payload-0', None, headers)
+    assert producer.in_flight_cnt == 3
+
+    futures[0].success('metadata')
+    error = RuntimeError('broker unavailable')
+    futures[1].failure(error)
+
+    assert producer.in_flight_cnt == 1
+    assert producer.delivered_cnt == 1
+    assert producer.failed_cnt == 1
+    assert producer.last_error is error
+
+
+def test_flush_when_max_in_flight_exceeded(fake_producers):
+    producer = BatchedKafkaProducer('localhost:9092', max_in_flight=2)
+    for i in range(3):
+        producer.send('testTopic', b'payload')
+
+    assert fake_producers[0].n_flush == 1
+    assert producer.delivered_cnt == 2
+    assert producer.in_flight_cnt == 1
+
+
+def test_context_manager_flushes(fake_producers):
+    with BatchedKafkaProducer('localhost:9092') as producer:
+        producer.send('testTopic', b'payload')
+        assert producer.in_flight_cnt == 1
+
+    assert fake_producers[0].n_flush == 1
+    assert producer.in_flight_cnt == 0
+    assert producer.delivered_cnt == 1
+
+
+def test_close_flushes_and_closes(fake_producers):
+    producer = BatchedKafkaProducer('localhost:9092')
+    producer.send('testTopic', b'payload')
+    producer.close()
+
+    assert producer.delivered_cnt == 1
+    assert fake_producers[0].is_closed
@@ -0,0 +1,86 @@
+import pandas as pd
+
+from pipeline.onlineml_pipeline import ExperimentPipeline
+from tools.data_loader import GeneralDataLoader
+from tools.label_encoder_registry import LabelEncoderRegistry
+
+
+def test_training_and_testing_frames_share_codes():
+    registry = LabelEncoderRegistry()
+    training_df = pd.DataFrame({'GantryID': ['01F0017N', '01F0005S', '01F0017N'], 'Traffic': [1, 2, 3]})
+    testing_df = pd.DataFrame({'GantryID': ['03F0150S', '01F0017N'], 'Traffic': [4, 5]})
+
+    registry.encode_frame(training_df)
+    registry.encode_frame(testing_df)
+
+    # first fit is sorted like sklearn LabelEncoder, unseen category of testing data is appended
+    assert training_df['GantryID'].tolist() == [1, 0, 1]
+    assert testing_df['GantryID'].tolist() == [2, 1]
+    assert registry.get_columns() == ['GantryID']
+
+
+def test_unseen_category_without_extending():
+    registry = LabelEncoderRegistry(unknown_value=-1)
+    registry.encode_column('GantryID', ['a', 'b'])
+
+    assert registry.encode_column('GantryID', ['b', 'z'], extend=False).tolist() == [1, -1]
+    assert registry.encode_row({'GantryID': 'z', 'Traffic': 7}, extend=False) == {'GantryID': -1, 'Traffic': 7}
+    assert registry.get_encoder('GantryID').classes_ == ['a', 'b']
+
+    assert registry.encode_row({'GantryID': 'z'})['GantryID'] == 2
+
+
+def test_save_and_load(tmp_path):
+    registry = LabelEncoderRegistry()
+    registry.encode_column('GantryID', ['b', 'a', 'c'])
+    path = str(tmp_path / 'label_encoders.json')
+    registry.save(path)
+
+    loaded_registry = LabelEncoderRegistry.load(path)
+    assert loaded_registry.get_encoder('GantryID').classes_ == ['a', 'b', 'c']
+    assert loaded_registry.encode_column('GantryID', ['c', 'a']).tolist() == [2, 0]
+
+
+def test_missing_value_does_not_collide_with_category_after_fill_na(tmp_path):
+    registry = LabelEncoderRegistry()
+    df = pd.DataFrame({'GantryID': ['01F0005S', None, '01F0017N'], 'Traffic': [1.0, None, 3.0]})
+    registry.encode_frame(df)
+    df.fillna(0, inplace=True)
+    assert df['GantryID'].tolist() == [0, -2, 1]
+
+    path = str(tmp_path / 'label_encoders.json')
+    registry.save(path)
+    assert LabelEncoderRegistry.load(path).encode_row({'GantryID': None}, extend=False) == {'GantryID': -2}
+
+
+def test_empty_encoder_is_fitted_in_sorted_order():
+    registry = LabelEncoderRegistry()
+    registry.get_encoder('GantryID')
+    registry.encode_row({'Lane': 'z'}, columns=['Lane'], extend=False)
+
+    assert registry.encode_column('GantryID', ['c', 'a', 'b']).tolist() == [2, 0, 1]
+    assert registry.encode_column('Lane', ['y', 'x']).tolist() == [1, 0]
+
+
+def test_registry_saved_by_pipeline_encodes_serving_data_with_training_codes(tmp_path):
+    pd.DataFrame({
+        'DateTime': ['2020-01-01 00:00:00', '2020-01-01 00:05:00', '2020-01-01 00:10:00'],
+        'GantryID': ['01F0017N', '01F0005S', '01F0017N']
+    }).to_csv(tmp_path / 'training.csv', index=False)
+    pd.DataFrame({
+        'DateTime': ['2020-01-02 00:00:00', '2020-01-02 00:05:00'],
+        'GantryID': ['03F0150S', '01F0005S']
+    }).to_csv(tmp_path / 'testing.csv', index=False)
+    pd.DataFrame({'GantryID': ['03F0150S', '01F0017N', '01F0005S']}).to_csv(tmp_path / 'serving.csv', index=False)
+    path = str(tmp_path / 'label_encoder_registry.json')
+
+    pipeline = ExperimentPipeline(label_encoder_registry_path=path)
+    pipeline.data_preparation(str(tmp_path / 'training.csv'), str(tmp_path / 'testing.csv'),
+                              'DateTime', "%Y-%m-%d %H:%M:%S")
+    assert pipeline.get_training_dataloader().get_full_df()['GantryID'].tolist() == [1, 0, 1]
+    assert pipeline.get_testing_dataloader().get_full_df()['GantryID'].tolist() == [2, 0]
+
+    # a loader on the serving side encodes with the saved codes instead of refitting
+    serving_loader = GeneralDataLoader(str(tmp_path / 'serving.csv'),
+                                       label_encoder_registry=LabelEncoderRegistry.load(path))
+    assert serving_loader.get_full_df()['GantryID'].tolist() == [2, 1, 0]
@@ -0,0 +1,43 @@
+from collections import namedtuple
+
+import pandas as pd
+
+from tools.message_codec import get_codec, get_codec_by_headers, encode_message, decode_consumer_record
+
+ConsumerRecord = namedtuple('ConsumerRecord', ['value', 'headers'])
+
+
+def test_codec_round_trip():
+    row = pd.Series({"X1": 100.5, "X2": 99.1, "Y": 1})
+
+    for codec_name in ['json', 'msgpack']:
+        codec = get_codec(codec_name)
+        payload, headers = encode_message(row, codec)
+        decoded = decode_consumer_record(ConsumerRecord(payload, headers))
+        assert decoded == [{"X1": 100.5, "X2": 99.1, "Y": 1}]
+
+
+def test_codec_frame_round_trip():
+    df = pd.DataFrame({"X1": [1.0, 2.0], "Y": [0, 1]})
+
+    codec = get_codec('msgpack')
+    payload, headers = encode_message(df, codec)
+    decoded = decode_consumer_record(ConsumerRecord(payload, headers))
+    assert decoded == [{"X1": 1.0, "Y": 0}, {"X1": 2.0, "Y": 1}]
+
+
+def test_legacy_message_without_header():
+    row = pd.Series({"X1": 100.5, "Y": 0})
+    legacy_payload = bytes(str(row.to_json()), 'utf-8')
+
+    assert get_codec_by_headers(None).name == 'json'
+    assert decode_consumer_record(ConsumerRecord(legacy_payload, [])) == [{"X1": 100.5, "Y": 0}]
+
+
+def test_unsupported_content_type_is_skipped():
+    row = pd.Series({"X1": 100.5, "Y": 0})
+    payload, headers = encode_message(row, get_codec('json'))
+    unknown_headers = [('content-type', b'application/x-unknown')]
+
+    assert decode_consumer_record(ConsumerRecord(payload, unknown_headers)) == []
+    assert decode_consumer_record(ConsumerRecord(b'not a json', headers)) == []
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from serving import model_registry
+from serving.model_registry import ModelRegistry, load_model_file
+
+
+def test_register_versions_with_index_and_retention(tmp_path):
+    registry = ModelRegistry(str(tmp_path), compression='none', max_versions=2)
+    assert registry.get_latest_version_info() is None
+    with pytest.raises(FileNotFoundError):
+        registry.get_model_path()
+
+    for i in range(3):
+        version = registry.register(
+            {'weights': [i]},
+            trained_event_counter=100 * i,
+            metrics={'accuracy': 0.5 + i / 10},
+            offsets={('testTopic', 0): 10 * i}
+        )
+        assert version == i + 1
+
+    assert [info.version for info in registry.list_versions()] == [2, 3]
+    assert not os.path.exists(str(tmp_path) + '/model_v1.pickle')
+    assert registry.load() == {'weights': [2]}
+    assert registry.load(2) == {'weights': [1]}
+    with pytest.raises(KeyError):
+        registry.get_version_info(1)
+
+    # index is reloaded by a new registry instance, versions keep increasing
+    reopened_registry = ModelRegistry(str(tmp_path), compression='none', max_versions=2)
+    latest_info = reopened_registry.get_latest_version_info()
+    assert latest_info.version == 3
+    assert latest_info.trained_event_counter == 200
+    assert latest_info.metrics == {'accuracy': 0.7}
+    assert latest_info.offsets == {('testTopic', 0): 20}
+    assert reopened_registry.register({'weights': [3]}) == 4
+
+
+def test_zstd_compressed_round_trip(tmp_path):
+    pytest.importorskip('zstandard')
+    registry = ModelRegistry(str(tmp_path), compression='zstd')
+    version = registry.register({'weights': list(range(1000))})
+    model_path = registry.get_model_path(version)
+    assert model_path.endswith('.pickle.zst')
+    assert load_model_file(model_path) == {'weights': list(range(1000))}
+
+
+def test_unsupported_compression(tmp_path):
+    with pytest.raises(ValueError):
+        ModelRegistry(str(tmp_path), compression='gzip')
+
+
+def test_missing_compression_package_falls_back_to_plain_pickle(tmp_path, monkeypatch):
+    def import_missing_package():
+        raise ImportError("zstandard is required for zstd compression, please install zstandard")
+
+    monkeypatch.setitem(model_registry._COMPRESSION_IMPORTERS, 'zstd', import_missing_package)
+    registry = ModelRegistry(str(tmp_path), compression='zstd')
+    version = registry.register({'weights': [1]})
+
+    assert registry.get_model_path(version).endswith('model_v1.pickle')
+    assert registry.get_version_info(version).compression == 'none'
+    assert registry.load() == {'weights': [1]}
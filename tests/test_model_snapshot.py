@@ -0,0 +1,120 @@
+import os
+import subprocess
+import sys
+import uuid
+
+import serving.model_snapshot
+from serving.model_snapshot import InProcessModelSnapshotChannel, SharedMemoryModelSnapshotChannel
+
+
+def test_in_process_snapshot_is_copy_on_write():
+    channel = InProcessModelSnapshotChannel()
+    assert channel.get_latest_snapshot() is None
+
+    model = {'weights': [1, 2, 3]}
+    version = channel.publish(model)
+    model['weights'].append(4)
+
+    snapshot = channel.get_latest_snapshot()
+    assert version == 1
+    assert snapshot.version == 1
+    assert snapshot.model == {'weights': [1, 2, 3]}
+
+    channel.publish(model)
+    assert channel.get_latest_version() == 2
+    assert channel.get_latest_snapshot().model == {'weights': [1, 2, 3, 4]}
+
+
+def test_shared_memory_snapshot_handoff():
+    name = 'onlineml_test_{}'.format(uuid.uuid4().hex[:8])
+    publisher = SharedMemoryModelSnapshotChannel(name=name, size=1024 * 1024, create=True)
+    subscriber = SharedMemoryModelSnapshotChannel(name=name)
+    try:
+        assert subscriber.get_latest_snapshot() is None
+
+        publisher.publish({'n_models': 10})
+        snapshot = subscriber.get_latest_snapshot()
+        assert snapshot.version == 1
+        assert snapshot.model == {'n_models': 10}
+        # same version is served from cache
+        assert subscriber.get_latest_snapshot() is snapshot
+
+        publisher.publish({'n_models': 20})
+        assert subscriber.get_latest_snapshot().model == {'n_models': 20}
+    finally:
+        subscriber.close()
+        publisher.close()
+
+
+def test_shared_memory_outlives_subscriber_process():
+    name = 'onlineml_test_{}'.format(uuid.uuid4().hex[:8])
+    publisher = SharedMemoryModelSnapshotChannel(name=name, size=1024 * 1024, create=True)
+    try:
+        publisher.publish({'n_models': 10})
+        src_dir = os.path.dirname(os.path.dirname(serving.model_snapshot.__file__))
+        subscriber_code = (
+            "from serving.model_snapshot import SharedMemoryModelSnapshotChannel\n"
+            "channel = SharedMemoryModelSnapshotChannel(name='{}')\n"
+            "assert channel.get_latest_snapshot().model == {{'n_models': 10}}\n"
+            "channel.close()\n"
+        ).format(name)
+        # output pipe is closed only after resource tracker of the subscriber process exits as well
+        result = subprocess.run([sys.executable, '-c', subscriber_code], env=dict(os.environ, PYTHONPATH=src_dir),
+                                capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+        assert 'leaked shared_memory' not in result.stderr
+
+        # block is still owned by publisher after the subscriber process exits
+        subscriber = SharedMemoryModelSnapshotChannel(name=name)
+        assert subscriber.get_latest_snapshot().model == {'n_models': 10}
+        subscriber.close()
+    finally:
+        publisher.close()
+
+
+def test_subscriber_follows_restarted_publisher():
+    name = 'onlineml_test_{}'.format(uuid.uuid4().hex[:8])
+    publisher = SharedMemoryModelSnapshotChannel(name=name, size=1024 * 1024, create=True)
+    subscriber = SharedMemoryModelSnapshotChannel(name=name, reattach_interval_sec=0)
+    try:
+        publisher.publish({'n_models': 10})
+        publisher.publish({'n_models': 20})
+        old_snapshot = subscriber.get_latest_snapshot()
+        assert old_snapshot.version == 2
+
+        # trainer restarts, the old block is unlinked and a new one is created under the same name
+        publisher.close()
+        publisher = SharedMemoryModelSnapshotChannel(name=name, size=1024 * 1024, create=True)
+        publisher.publish({'n_models': 30})
+
+        snapshot = subscriber.get_latest_snapshot()
+        assert snapshot.version == 1
+        assert snapshot.generation != old_snapshot.generation
+        assert snapshot.model == {'n_models': 30}
+    finally:
+        subscriber.close()
+        publisher.close()
+
+
+def test_reused_block_starts_a_new_generation():
+    name = 'onlineml_test_{}'.format(uuid.uuid4().hex[:8])
+    publisher = SharedMemoryModelSnapshotChannel(name=name, size=1024 * 1024, create=True)
+    subscriber = SharedMemoryModelSnapshotChannel(name=name, reattach_interval_sec=None)
+    restarted_publisher = None
+    try:
+        publisher.publish({'n_models': 10})
+        old_snapshot = subscriber.get_latest_snapshot()
+
+        # block left by a crashed trainer is reused by the restarted one
+        restarted_publisher = SharedMemoryModelSnapshotChannel(name=name, size=1024 * 1024, create=True)
+        restarted_publisher.publish({'n_models': 30})
+
+        snapshot = subscriber.get_latest_snapshot()
+        assert (snapshot.generation, snapshot.version) != (old_snapshot.generation, old_snapshot.version)
+        assert snapshot.model == {'n_models': 30}
+    finally:
+        subscriber.close()
+        if restarted_publisher is not None:
+            restarted_publisher.close()
+        else:
+            publisher.close()
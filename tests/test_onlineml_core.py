@@ -0,0 +1,202 @@
+import pandas as pd
+
+from benchmarks.in_memory_kafka import InMemoryKafkaBroker, InMemoryKafkaProducer, InMemoryKafkaConsumer
+from tools.message_codec import get_codec, encode_message
+from serving.checkpoint_coordinator import CheckpointCoordinator
+from serving.model_registry import ModelRegistry
+from serving.model_snapshot import InProcessModelSnapshotChannel
+from serving.onlineml_core import OnlineMachineLearningServer
+
+
+class _LearnManyModel:
+
+    def __init__(self):
+        self.batches = []
+
+    def learn_many(self, X, y):
+        self.batches.append((X.copy(), y.copy()))
+
+
+class _LearnOneModel:
+
+    def __init__(self):
+        self.rows = []
+
+    def learn_one(self, x, y):
+        self.rows.append((x, y))
+
+
+class _StoppingConsumer(InMemoryKafkaConsumer):
+    """stopping the server once the topic is drained"""
+
+    def __init__(self, broker, server_holder):
+        super().__init__(broker)
+        self._server_holder = server_holder
+
+    def poll(self, timeout_ms=0, max_records=None, update_offsets=True):
+        result = super().poll(timeout_ms=timeout_ms, max_records=max_records, update_offsets=update_offsets)
+        if len(result) == 0:
+            self._server_holder[0].stop()
+        return result
+
+
+class _IdleThenStoppingConsumer(InMemoryKafkaConsumer):
+    """polling at most 10 records, stopping the server on the second empty poll"""
+
+    def __init__(self, broker, server_holder, channel):
+        super().__init__(broker)
+        self._server_holder = server_holder
+        self._channel = channel
+        self.n_empty_polls = 0
+        self.n_batches_published_when_idle = None
+
+    def poll(self, timeout_ms=0, max_records=None, update_offsets=True):
+        result = super().poll(timeout_ms=timeout_ms, max_records=10, update_offsets=update_offsets)
+        if len(result) == 0:
+            self.n_empty_polls += 1
+            if self.n_empty_polls == 2:
+                self.n_batches_published_when_idle = len(self._channel.get_latest_snapshot().model.batches)
+                self._server_holder[0].stop()
+        return result
+
+
+def _make_broker(n_events=10, codec_name='json'):
+    broker = InMemoryKafkaBroker()
+    producer = InMemoryKafkaProducer(broker)
+    codec = get_codec(codec_name)
+    for i in range(n_events):
+        payload, headers = encode_message(pd.Series({'x1': float(i), 'x2': i % 3, 'Y': i % 2}), codec)
+        producer.send('testTopic', payload, headers=headers)
+    return broker
+
+
+def _make_server(consumer, model, **server_kwargs):
+    server = OnlineMachineLearningServer(kafka_consumer=consumer, **server_kwargs)
+    server._OnlineMachineLearningServer__model = model
+    return server
+
+
+def _poll_records(consumer, max_records=None):
+    return [record for records in consumer.poll(max_records=max_records).values() for record in records]
+
+
+def test_columnar_polling_batch_by_learn_many():
+    consumer = InMemoryKafkaConsumer(_make_broker())
+    model = _LearnManyModel()
+    server = _make_server(consumer, model)
+
+    server.train_model_by_columnar_polling_batch(_poll_records(consumer), 'Y')
+
+    assert len(model.batches) == 1
+    batch_x, batch_y = model.batches[0]
+    assert list(batch_x.columns) == ['x1', 'x2']
+    assert batch_y.tolist() == [i % 2 for i in range(10)]
+    assert server.get_trained_event_counter() == 10
+
+
+def test_columnar_polling_batch_falls_back_to_learn_one():
+    consumer = InMemoryKafkaConsumer(_make_broker(codec_name='msgpack'))
+    model = _LearnOneModel()
+    server = _make_server(consumer, model)
+
+    server.train_model_by_columnar_polling_batch(_poll_records(consumer), 'Y')
+
+    assert len(model.rows) == 10
+    assert model.rows[3] == ({'x1': 3.0, 'x2': 0}, 1)
+    assert server.get_trained_event_counter() == 10
+
+
+def test_empty_poll_is_not_trained():
+    consumer = InMemoryKafkaConsumer(_make_broker(n_events=0))
+    model = _LearnManyModel()
+    server = _make_server(consumer, model)
+
+    server.train_model_by_columnar_polling_batch(_poll_records(consumer), 'Y')
+
+    assert model.batches == []
+    assert server.get_trained_event_counter() == 0
+
+
+def test_batch_polling_mode_trains_whole_topic():
+    server_holder = []
+    consumer = _StoppingConsumer(_make_broker(n_events=25), server_holder)
+    model = _LearnManyModel()
+    server = _make_server(consumer, model)
+    server_holder.append(server)
+
+    server.run(consumer_run_mode='batch_polling', label_name='Y')
+
+    assert sum(len(batch_y) for batch_x, batch_y in model.batches) == 25
+    assert server.get_trained_event_counter() == 25
+
+
+def test_model_snapshot_is_published_by_interval():
+    consumer = InMemoryKafkaConsumer(_make_broker(n_events=30))
+    channel = InProcessModelSnapshotChannel()
+    server = _make_server(consumer, _LearnManyModel(), model_snapshot_channel=channel,
+                          snapshot_publish_interval_sec=3600)
+
+    server.train_model_by_columnar_polling_batch(_poll_records(consumer, max_records=10), 'Y')
+    published_version = channel.get_latest_version()
+    assert published_version >= 1
+
+    for _ in range(2):
+        server.train_model_by_columnar_polling_batch(_poll_records(consumer, max_records=10), 'Y')
+    assert channel.get_latest_version() == published_version
+
+    server._publish_model_snapshot(force=True)
+    assert channel.get_latest_version() == published_version + 1
+    assert len(channel.get_latest_snapshot().model.batches) == 3
+
+
+def test_pending_model_snapshot_is_published_on_empty_poll():
+    server_holder = []
+    channel = InProcessModelSnapshotChannel()
+    consumer = _IdleThenStoppingConsumer(_make_broker(n_events=20), server_holder, channel)
+    server = _make_server(consumer, _LearnManyModel(), model_snapshot_channel=channel,
+                          snapshot_publish_interval_sec=3600)
+    server_holder.append(server)
+
+    server.run(consumer_run_mode='batch_polling', label_name='Y')
+
+    # second batch is throttled by the interval, published once the topic is idle
+    assert consumer.n_batches_published_when_idle == 2
+
+
+def test_tree_structure_is_rendered_from_published_snapshot():
+    consumer = InMemoryKafkaConsumer(_make_broker(n_events=10))
+    channel = InProcessModelSnapshotChannel()
+    server = _make_server(consumer, _LearnManyModel(), model_snapshot_channel=channel)
+
+    server.train_model_by_columnar_polling_batch(_poll_records(consumer), 'Y')
+
+    # persist thread reads the snapshot copy, never the model being trained
+    render_model = server._get_tree_render_model(model_path=None)
+    assert render_model is channel.get_latest_snapshot().model
+    assert render_model is not server.get_model()
+
+
+def test_checkpoint_is_read_only_once_per_new_checkpoint(tmp_path, monkeypatch):
+    coordinator = CheckpointCoordinator(str(tmp_path))
+    registry = ModelRegistry(str(tmp_path / 'registry'), compression='none')
+    consumer = InMemoryKafkaConsumer(_make_broker(n_events=10))
+    server = _make_server(consumer, _LearnManyModel(), checkpoint_coordinator=coordinator, model_registry=registry)
+    read_checkpoint = coordinator.read_checkpoint
+    read_list = []
+
+    def counting_read_checkpoint():
+        read_list.append(1)
+        return read_checkpoint()
+
+    monkeypatch.setattr(coordinator, 'read_checkpoint', counting_read_checkpoint)
+    assert server._register_model() is None
+
+    records = _poll_records(consumer)
+    server.train_model_by_columnar_polling_batch(records, 'Y')
+    server._track_trained_records(records)
+    server._save_checkpoint()
+
+    assert server._register_model() == 1
+    assert server._register_model() is None
+    assert len(read_list) == 1
+    assert registry.get_latest_version_info().offsets == {('testTopic', 0): 10}
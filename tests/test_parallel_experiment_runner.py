@@ -0,0 +1,66 @@
+import pytest
+
+from task1_model_evaluation.ParallelExperimentRunner import ExperimentSpec, ParallelExperimentRunner, \
+    run_incremental_experiment, merge_experiment_curves
+
+
+class _CountingWorkflow:
+    """predicting everything as 1, accuracy of each step is the fraction of learned rows"""
+
+    def __init__(self, n_rows):
+        self._n_rows = n_rows
+        self.n_learned = 0
+        self.n_predicted = 0
+
+    def train_model_by_arbitrary_full_data(self, start_row, end_row, is_reset_mode=True):
+        if is_reset_mode:
+            self.n_learned = 0
+        self.n_learned += end_row - start_row
+
+    def incremental_prediction(self, start_row, end_row):
+        self.n_predicted += end_row - start_row
+
+    def incremental_evaluate_model_get_accuracy_recall(self):
+        return self.n_learned / self._n_rows, 1.0
+
+
+def _experiment_curves(n_workers, start_method=None):
+    runner = ParallelExperimentRunner([
+        ExperimentSpec('batch', _CountingWorkflow(100)),
+        ExperimentSpec('online', _CountingWorkflow(100), online_learning=True),
+    ], n_workers=n_workers, start_method=start_method)
+    return runner.run(run_incremental_experiment, init_train_range=(0, 10), init_predict_range=(10, 20),
+                      start_row=20, step_size=10, end_row=40)
+
+
+def test_incremental_experiment_curves():
+    curves = _experiment_curves(n_workers=1)
+    assert list(curves.keys()) == ['batch', 'online']
+    assert curves['batch']['x'] == [25, 35, 45]
+    assert curves['batch']['accuracy'] == [0.1, 0.1, 0.1]
+    assert curves['online']['accuracy'] == [0.1, 0.2, 0.3]
+
+
+def test_parallel_run_is_same_as_serial_run():
+    assert _experiment_curves(n_workers=2) == _experiment_curves(n_workers=1)
+
+
+def test_spawned_run_is_same_as_serial_run():
+    # specs are pickled to the workers instead of inherited by fork
+    assert _experiment_curves(n_workers=2, start_method='spawn') == _experiment_curves(n_workers=1)
+
+
+def test_merge_experiment_curves():
+    run_results = [
+        {'online': {'x': [1, 2], 'accuracy': [0.1, 0.2]}},
+        {'online': {'x': [1, 2], 'accuracy': [0.3, 0.2]}},
+    ]
+    merged = merge_experiment_curves(run_results, scale=100)
+    assert merged['online']['x'] == [1, 2]
+    assert merged['online']['mean'] == pytest.approx([20, 20])
+    assert merged['online']['error'] == pytest.approx([14.142135, 0], abs=1e-5)
+
+
+def test_experiment_name_is_unique():
+    with pytest.raises(ValueError):
+        ParallelExperimentRunner([ExperimentSpec('a', None), ExperimentSpec('a', None)])
@@ -0,0 +1,44 @@
+import pytest
+
+from tools.partition_ensemble import PartitionEnsembleClassifier
+
+
+class _ConstantModel:
+
+    def __init__(self, proba: dict):
+        self._proba = proba
+
+    def predict_proba_one(self, x):
+        return dict(self._proba)
+
+
+class _EnsembleModel(_ConstantModel):
+
+    def __init__(self, proba: dict, n_models):
+        super().__init__(proba)
+        self.models = [_ConstantModel(proba) for _ in range(n_models)]
+
+
+def test_weighted_average_of_replicas():
+    merged = PartitionEnsembleClassifier(
+        replicas=[_ConstantModel({0: 1.0, 1: 0.0}), _ConstantModel({0: 0.0, 1: 1.0})],
+        weights=[300, 100]
+    )
+    proba = merged.predict_proba_one({'x': 1.0})
+    assert proba[0] == pytest.approx(0.75)
+    assert proba[1] == pytest.approx(0.25)
+    assert merged.predict_one({'x': 1.0}) == 0
+
+
+def test_members_of_replicas_are_flattened():
+    merged = PartitionEnsembleClassifier(
+        replicas=[_EnsembleModel({1: 1.0}, 3), _EnsembleModel({1: 1.0}, 2), _ConstantModel({1: 1.0})]
+    )
+    assert len(merged.models) == 6
+
+
+def test_replicas_required():
+    with pytest.raises(ValueError):
+        PartitionEnsembleClassifier(replicas=[])
+    with pytest.raises(ValueError):
+        PartitionEnsembleClassifier(replicas=[_ConstantModel({1: 1.0})], weights=[1, 2])
@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from benchmarks.in_memory_kafka import InMemoryKafkaBroker, InMemoryKafkaConsumer
+from tools.message_codec import get_codec, encode_message
+from serving.model_snapshot import InProcessModelSnapshotChannel
+from serving.partition_parallel_trainer import PartitionParallelTrainer
+
+
+class _CountingModel:
+
+    def __init__(self):
+        self.n_learned = 0
+
+    def learn_one(self, x, y):
+        self.n_learned += 1
+
+    def predict_proba_one(self, x):
+        return {1: 1.0}
+
+
+class _PartitionedConsumerFactory:
+    """
+    each created consumer is assigned one partition, as kafka splits partitions among consumers of a group.
+    workers are forked, the broker and the partition counter are inherited from the test process.
+    """
+
+    def __init__(self, broker):
+        self._broker = broker
+        self._next_partition = multiprocessing.Value('i', 0)
+        self.n_auto_commit_consumers = multiprocessing.Value('i', 0)
+
+    def __call__(self, **kwargs):
+        with self._next_partition.get_lock():
+            partition = self._next_partition.value
+            self._next_partition.value += 1
+        if kwargs['enable_auto_commit']:
+            with self.n_auto_commit_consumers.get_lock():
+                self.n_auto_commit_consumers.value += 1
+        return InMemoryKafkaConsumer(self._broker, partitions=[partition])
+
+
+def _make_broker(n_partitions, n_events_per_partition):
+    broker = InMemoryKafkaBroker(n_partitions=n_partitions)
+    codec = get_codec('json')
+    for partition in range(n_partitions):
+        for i in range(n_events_per_partition):
+            payload, headers = encode_message(pd.Series({'x1': float(i), 'Y': i % 2}), codec)
+            broker.append('testTopic', payload, headers=headers, partition=partition)
+    return broker
+
+
+def _run_trainer(trainer, n_expected_events, timeout_sec=30):
+    trainer.start()
+    try:
+        for _ in range(timeout_sec * 10):
+            if trainer.get_trained_event_counter() >= n_expected_events:
+                break
+            time.sleep(0.1)
+    finally:
+        trainer.stop()
+
+
+def test_workers_train_their_partitions_and_replicas_are_merged(tmp_path):
+    if multiprocessing.get_start_method() != 'fork':
+        pytest.skip("in-memory broker is inherited by forked workers only")
+
+    consumer_factory = _PartitionedConsumerFactory(_make_broker(n_partitions=2, n_events_per_partition=30))
+    channel = InProcessModelSnapshotChannel()
+    trainer = PartitionParallelTrainer(
+        _CountingModel(), n_workers=2, merge_interval_sec=0, model_snapshot_channel=channel,
+        consumer_factory=consumer_factory, checkpoint_dir=str(tmp_path)
+    )
+    _run_trainer(trainer, n_expected_events=60)
+
+    assert trainer.get_trained_event_counter() == 60
+    merged_model = trainer.get_merged_model()
+    assert sorted(replica.n_learned for replica in merged_model.replicas) == [30, 30]
+    assert channel.get_latest_version() == trainer.get_merged_version()
+    # offsets are committed with checkpoint, not by kafka auto commit
+    assert consumer_factory.n_auto_commit_consumers.value == 0
+    assert sorted(os.listdir(str(tmp_path))) == ['partition_worker_0_checkpoint.pickle',
+                                                 'partition_worker_1_checkpoint.pickle']
@@ -0,0 +1,121 @@
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools.prequential_evaluator import PrequentialEvaluator
+
+
+class _MeanLabelModel:
+    """predicting the mean of learned labels, no probability before learning anything"""
+
+    def __init__(self):
+        self.n_learned = 0
+        self.n_true = 0
+
+    def predict_proba_one(self, x):
+        if self.n_learned == 0:
+            return {}
+        proba = self.n_true / self.n_learned
+        return {0: 1 - proba, 1: proba}
+
+    def learn_one(self, x, y):
+        self.n_learned += 1
+        self.n_true += int(y == 1)
+
+
+# interrupting the evaluation when learning the n-th row, module level so the checkpointed model is not affected
+_interrupt_at = None
+
+
+class _InterruptedModel(_MeanLabelModel):
+
+    def learn_one(self, x, y):
+        if _interrupt_at is not None and self.n_learned + 1 == _interrupt_at:
+            raise KeyboardInterrupt
+        super().learn_one(x, y)
+
+
+def _make_x_y():
+    X = pd.DataFrame({'a': [1, 2, 3, 4, 5, 6], 'b': [0.5, 0.1, 0.2, 0.3, 0.4, 0.6]})
+    y = pd.Series([1, 1, 0, 0, 1, 0])
+    return X, y
+
+
+def test_test_then_train():
+    X, y = _make_x_y()
+    evaluator = PrequentialEvaluator(_MeanLabelModel(), show_progress=False)
+    state = evaluator.evaluate(X, y)
+
+    assert np.isnan(state.pred_proba[0])
+    np.testing.assert_allclose(state.pred_proba[1:], [1.0, 1.0, 2 / 3, 0.5, 3 / 5])
+    assert state.y_true.tolist() == [1, 1, 0, 0, 1, 0]
+    # prediction with threshold 0.5: 1, 1, 1, 1, 1 for answers 1, 0, 0, 1, 0
+    counter = state.confusion_matrix
+    assert (counter.tp, counter.fp, counter.tn, counter.fn) == (2, 3, 0, 0)
+    assert evaluator.get_model().n_learned == 6
+
+
+def test_resume_from_checkpoint(tmp_path, monkeypatch):
+    X, y = _make_x_y()
+    checkpoint_path = str(tmp_path / 'prequential.pickle')
+    full_state = PrequentialEvaluator(_MeanLabelModel(), show_progress=False).evaluate(X, y)
+
+    monkeypatch.setattr(sys.modules[__name__], '_interrupt_at', 5)
+    evaluator = PrequentialEvaluator(_InterruptedModel(), checkpoint_path=checkpoint_path, checkpoint_interval=2,
+                                     show_progress=False)
+    with pytest.raises(KeyboardInterrupt):
+        evaluator.evaluate(X, y)
+    assert evaluator.load_checkpoint().next_row == 4
+
+    monkeypatch.setattr(sys.modules[__name__], '_interrupt_at', None)
+    resumed_evaluator = PrequentialEvaluator(_MeanLabelModel(), checkpoint_path=checkpoint_path, show_progress=False)
+    resumed_state = resumed_evaluator.evaluate(X, y, resume=True)
+
+    np.testing.assert_allclose(resumed_state.pred_proba[1:], full_state.pred_proba[1:])
+    assert resumed_evaluator.get_model().n_learned == 6
+    counter, full_counter = resumed_state.confusion_matrix, full_state.confusion_matrix
+    assert (counter.tp, counter.fp, counter.tn, counter.fn) == (full_counter.tp, full_counter.fp,
+                                                                full_counter.tn, full_counter.fn)
+
+
+def test_checkpoint_of_other_subset_is_not_resumed(tmp_path):
+    X, y = _make_x_y()
+    checkpoint_path = str(tmp_path / 'prequential.pickle')
+    evaluator = PrequentialEvaluator(_MeanLabelModel(), checkpoint_path=checkpoint_path, show_progress=False)
+    state = evaluator.evaluate(X, y)
+    # unfinished checkpoint of the first subset
+    state.next_row = 3
+    evaluator.save_checkpoint()
+
+    # another subset of the same number of rows, e.g. next date
+    other_X = X.set_index(X.index + 6)
+    resumed_evaluator = PrequentialEvaluator(_MeanLabelModel(), checkpoint_path=checkpoint_path, show_progress=False)
+    other_state = resumed_evaluator.evaluate(other_X, y, resume=True)
+
+    assert other_state.fingerprint != state.fingerprint
+    assert resumed_evaluator.get_model().n_learned == 6
+    assert np.isnan(other_state.pred_proba[0])
+
+
+def test_answers_keep_their_dtype():
+    X, _ = _make_x_y()
+    y = pd.Series(['yes', 'yes', 'no', 'no', 'yes', 'no'])
+    learned_labels = []
+
+    class _RecordingModel(_MeanLabelModel):
+
+        def predict_proba_one(self, x):
+            return {'yes': 0.5, 'no': 0.5}
+
+        def learn_one(self, x, y):
+            learned_labels.append(y)
+
+    state = PrequentialEvaluator(_RecordingModel(), true_class='yes', proba_cut_point=0.6,
+                                 show_progress=False).evaluate(X, y)
+    assert state.y_true.tolist() == y.tolist()
+    assert learned_labels == y.tolist()
+    # probability below cut point is a negative prediction, not an unscored row
+    counter = state.confusion_matrix
+    assert (counter.tp, counter.fp, counter.tn, counter.fn) == (0, 0, 3, 3)
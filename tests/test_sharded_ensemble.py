@@ -0,0 +1,104 @@
+import pickle
+import threading
+
+import pandas as pd
+
+from tools.sharded_ensemble import ShardedBaggingClassifier
+
+
+class MajorityClassModel:
+
+    def __init__(self):
+        self.class_counts = {}
+
+    def learn_one(self, x, y):
+        self.class_counts[y] = self.class_counts.get(y, 0) + 1
+
+    def predict_proba_one(self, x):
+        total = sum(self.class_counts.values())
+        return {label: count / total for label, count in self.class_counts.items()}
+
+
+def _check_ensemble(ensemble):
+    X = pd.DataFrame({'X1': [1.0, 2.0, 3.0, 4.0], 'X2': [0.5, 0.5, 0.5, 0.5]})
+    y = pd.Series([1, 1, 1, 1])
+    for i in range(5):
+        ensemble.learn_many(X, y)
+
+    proba_df = ensemble.predict_proba_many(X)
+    assert proba_df.shape == (4, 1)
+    assert (proba_df[1] > 0.99).all()
+    assert ensemble.predict_one({'X1': 1.0, 'X2': 0.5}) == 1
+    assert len(ensemble.models) == 4
+
+
+def test_sharded_bagging_local_mode():
+    _check_ensemble(ShardedBaggingClassifier(MajorityClassModel(), n_models=4, n_workers=0))
+
+
+def test_sharded_bagging_process_mode():
+    ensemble = ShardedBaggingClassifier(MajorityClassModel(), n_models=4, n_workers=2)
+    try:
+        _check_ensemble(ensemble)
+        snapshot = pickle.loads(pickle.dumps(ensemble))
+        assert len(snapshot.models) == 4
+        assert snapshot.predict_one({'X1': 1.0, 'X2': 0.5}) == 1
+    finally:
+        ensemble.close()
+
+
+def test_sharded_bagging_learn_one_is_buffered():
+    ensemble = ShardedBaggingClassifier(MajorityClassModel(), n_models=4, n_workers=2, learn_one_buffer_size=3)
+    try:
+        for i in range(5):
+            ensemble.learn_one({'X1': float(i), 'X2': 0.5}, 1)
+        # 2 rows are still buffered, they are sent before gathering members
+        assert len(ensemble._pending_rows) == 2
+        n_learned = sum(sum(model.class_counts.values()) for model in ensemble.models)
+        assert len(ensemble._pending_rows) == 0
+        assert n_learned > 0
+    finally:
+        ensemble.close()
+
+
+def test_sharded_bagging_snapshot_while_training():
+    ensemble = ShardedBaggingClassifier(MajorityClassModel(), n_models=4, n_workers=2)
+    X = pd.DataFrame({'X1': [1.0, 2.0, 3.0, 4.0], 'X2': [0.5, 0.5, 0.5, 0.5]})
+    y = pd.Series([1, 1, 1, 1])
+    snapshots = []
+    errors = []
+
+    def take_snapshots():
+        try:
+            for _ in range(20):
+                snapshots.append(pickle.loads(pickle.dumps(ensemble)))
+        except Exception as e:
+            errors.append(e)
+
+    try:
+        persist_thread = threading.Thread(target=take_snapshots)
+        persist_thread.start()
+        for _ in range(50):
+            ensemble.learn_many(X, y)
+            ensemble.predict_proba_many(X)
+        persist_thread.join()
+
+        assert errors == []
+        assert all(len(snapshot.models) == 4 for snapshot in snapshots)
+    finally:
+        ensemble.close()
+
+
+def test_sharded_bagging_does_not_depend_on_sharding():
+    X = pd.DataFrame({'X1': [1.0, 2.0, 3.0, 4.0], 'X2': [0.5, 0.5, 0.5, 0.5]})
+    y = pd.Series([1, 0, 1, 1])
+    class_counts_list = []
+    for n_workers in (0, 2, 3):
+        ensemble = ShardedBaggingClassifier(MajorityClassModel(), n_models=5, n_workers=n_workers)
+        try:
+            for _ in range(3):
+                ensemble.learn_many(X, y)
+            class_counts_list.append([model.class_counts for model in ensemble.models])
+        finally:
+            ensemble.close()
+    assert class_counts_list[0] == class_counts_list[1] == class_counts_list[2]
@@ -0,0 +1,31 @@
+import pandas as pd
+
+from tools.data_loader import TimeSeriesStreamingDataLoader
+
+
+def test_streaming_loader_yields_preprocessed_chunks(tmp_path):
+    path_list = []
+    for month, gantry_list in (('01', ['01F0005S', '01F0017N', '01F0005S']), ('02', ['03F0150S', '01F0005S', None])):
+        path = str(tmp_path / 'traffic_2021_{}.csv'.format(month))
+        pd.DataFrame({
+            'DateTime': ['2021-{}-01 00:10:00'.format(month), '2021-{}-01 00:00:00'.format(month),
+                         '2021-{}-01 00:05:00'.format(month)],
+            'GantryID': gantry_list,
+            'Traffic': [10, 20, 30],
+        }).to_csv(path, index=False)
+        path_list.append(path)
+
+    loader = TimeSeriesStreamingDataLoader(path_list, time_series_column_name='DateTime',
+                                           time_format="%Y-%m-%d %H:%M:%S", chunk_size=2)
+    chunk_list = list(loader.iter_chunks())
+    assert [len(chunk.index) for chunk in chunk_list] == [2, 1, 2, 1]
+
+    rows = list(loader.iter_rows())
+    assert len(rows) == 6
+    # rows are sorted by time inside each chunk
+    assert rows[0]['DateTime'] < rows[1]['DateTime']
+    # first chunk is fitted in sorted order, same gantry keeps the same code across chunks and files,
+    # missing category gets the reserved missing value code instead of the code 0 of a real gantry
+    encoder = loader.get_label_encoder_registry().get_encoder('GantryID')
+    assert encoder.classes_ == ['01F0005S', '01F0017N', '03F0150S']
+    assert [row['GantryID'] for row in rows] == [1, 0, 0, 0, 2, -2]
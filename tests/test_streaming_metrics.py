@@ -0,0 +1,52 @@
+import numpy as np
+
+from tools.streaming_metrics import ConfusionMatrixCounter, SlidingWindowConfusionMatrix, TumblingWindowConfusionMatrix, MetricsHistory
+
+
+def test_confusion_matrix_counter():
+    counter = ConfusionMatrixCounter()
+    counter.update([1, 1, 0, 0], [1, 0, 1, 0])
+    counter.update(np.array([1, 0]), np.array([1, 0]))
+
+    assert (counter.tp, counter.fp, counter.tn, counter.fn) == (2, 1, 2, 1)
+    assert counter.get_accuracy() == 4 / 6
+    assert counter.get_recall() == 2 / 3
+    assert counter.get_precision() == 2 / 3
+    assert counter.get_f1_score() == 2 / 3
+    assert ConfusionMatrixCounter().get_recall() == 0.0
+
+
+def test_unscored_prediction_is_not_counted():
+    counter = ConfusionMatrixCounter()
+    counter.update([1, 0, 1, 0], [1, None, None, 0])
+    counter.update(np.array([1, 0]), np.array([np.nan, 1.0]))
+    counter.update_one(1, None)
+
+    assert (counter.tp, counter.fp, counter.tn, counter.fn) == (1, 1, 1, 0)
+
+    sliding = SlidingWindowConfusionMatrix(window_size=2)
+    sliding.update([1, 0], [None, 0])
+    assert sliding.get_counter().n_sample == 1
+
+
+def test_window_confusion_matrix():
+    sliding = SlidingWindowConfusionMatrix(window_size=2)
+    tumbling = TumblingWindowConfusionMatrix(window_size=2)
+    for y_true, y_pred in [([1], [0]), ([1], [1]), ([0], [0])]:
+        sliding.update(y_true, y_pred)
+        tumbling.update(y_true, y_pred)
+
+    assert sliding.get_metrics()['accuracy'] == 1.0
+    assert tumbling.get_metrics()['accuracy'] == 0.5
+
+
+def test_metrics_history_is_bounded():
+    history = MetricsHistory(['accuracy'], recent_capacity=10, archive_capacity=5, downsample_factor=2)
+    for i in range(1000):
+        history.append(i, accuracy=float(i))
+
+    assert len(history) == 15
+    assert history.get_x_list()[-1] == 999
+    assert history.get_metric_list('accuracy')[-10:] == [float(i) for i in range(990, 1000)]
+    # archived points are averaged every 2 points
+    assert history.get_metric_list('accuracy')[4] == (988 + 989) / 2
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from tools.threshold_analysis import ThresholdSweep
+
+
+def _brute_force_metrics(scores, y_true, threshold):
+    y_pred = (np.asarray(scores) >= threshold).astype(int)
+    y_true = np.asarray(y_true)
+    tp = int(np.sum((y_pred == 1) & (y_true == 1)))
+    fp = int(np.sum((y_pred == 1) & (y_true == 0)))
+    fn = int(np.sum((y_pred == 0) & (y_true == 1)))
+    accuracy = float(np.mean(y_pred == y_true))
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    return accuracy, recall, precision
+
+
+def test_metrics_match_casting_each_threshold():
+    rng = np.random.RandomState(0)
+    scores = np.round(rng.rand(200), 2)
+    y_true = (rng.rand(200) < scores).astype(int)
+    thresholds = np.arange(0.0, 1.05, 0.05)
+
+    metrics = ThresholdSweep(scores, y_true).get_metrics(thresholds)
+    for i, threshold in enumerate(thresholds):
+        accuracy, recall, precision = _brute_force_metrics(scores, y_true, threshold)
+        assert metrics['accuracy'][i] == pytest.approx(accuracy)
+        assert metrics['recall'][i] == pytest.approx(recall)
+        assert metrics['precision'][i] == pytest.approx(precision)
+
+
+def test_roc_and_pr_curve():
+    sweep = ThresholdSweep([0.1, 0.4, 0.35, 0.8, np.nan], [0, 0, 1, 1, 1])
+    assert sweep.n_sample == 4
+
+    fpr, tpr, thresholds = sweep.get_roc_curve()
+    assert thresholds.tolist() == [np.inf, 0.8, 0.4, 0.35, 0.1]
+    assert fpr.tolist() == [0.0, 0.0, 0.5, 0.5, 1.0]
+    assert tpr.tolist() == [0.0, 0.5, 0.5, 1.0, 1.0]
+    assert sweep.get_roc_auc() == pytest.approx(0.75)
+
+    precision, recall, thresholds = sweep.get_pr_curve()
+    assert precision.tolist() == pytest.approx([1.0, 0.5, 2 / 3, 0.5])
+    assert recall.tolist() == [0.5, 0.5, 1.0, 1.0]
@@ -0,0 +1,43 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+from tools.time_partition_index import TimePartitionIndex
+
+
+def _make_time_values():
+    return pd.to_datetime(pd.Series([
+        '2020-12-31 23:55:00',
+        '2021-01-01 00:00:00', '2021-01-01 00:05:00', '2021-01-01 23:55:00',
+        '2021-01-03 08:00:00',
+        '2021-02-01 00:00:00', '2021-02-01 00:00:00',
+        None,
+    ])).to_numpy()
+
+
+def test_date_and_month_slices():
+    index = TimePartitionIndex(_make_time_values())
+
+    assert index.get_date_list() == [
+        datetime.date(2020, 12, 31), datetime.date(2021, 1, 1), datetime.date(2021, 1, 3), datetime.date(2021, 2, 1)
+    ]
+    assert index.get_date_slice(datetime.date(2021, 1, 1)) == slice(1, 4)
+    assert index.get_date_slice("2021-02-01") == slice(5, 7)
+    assert index.get_date_slice("2021-01-02") == slice(0, 0)
+
+    assert index.get_month_year_list() == ['20-12', '21-01', '21-02']
+    assert index.get_month_year_slice('21-01') == slice(1, 5)
+    assert index.get_month_year_slice('2021-02') == slice(5, 7)
+
+
+def test_time_interval_slice_is_inclusive():
+    index = TimePartitionIndex(_make_time_values())
+    assert index.get_time_interval_slice('2021-01-01 00:05:00', '2021-02-01 00:00:00') == slice(2, 7)
+    assert index.get_time_interval_slice('2021-02-01 00:00:00', '2021-02-01 00:00:00') == slice(5, 7)
+    assert index.get_time_interval_slice('2021-03-01', '2021-01-01') == slice(7, 7)
+
+
+def test_unsorted_time_values():
+    with pytest.raises(ValueError):
+        TimePartitionIndex(pd.to_datetime(pd.Series(['2021-01-02', '2021-01-01'])).to_numpy())
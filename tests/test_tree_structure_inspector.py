@@ -0,0 +1,94 @@
+import os
+
+from tools.tree_structure_inspector import IncrementalTreeStructureRenderer, get_tree_fingerprint
+
+
+class _Node:
+
+    def __init__(self, feature=None, threshold=None, children=()):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = list(children)
+
+    def iter_dfs(self):
+        yield self
+        for child in self.children:
+            yield from child.iter_dfs()
+
+
+class _Graph:
+
+    def __init__(self, render_log):
+        self._render_log = render_log
+
+    def render(self, path, format='png'):
+        with open(path, 'w') as f:
+            f.write('digraph {}')
+        with open(path + '.' + format, 'w') as f:
+            f.write('png')
+        self._render_log.append(path)
+
+
+class _Tree:
+
+    def __init__(self, render_log):
+        self._render_log = render_log
+        self._root = _Node()
+        self.n_nodes = 1
+        self.height = 1
+
+    def split(self, feature, threshold):
+        self._root = _Node(feature, threshold, [self._root, _Node()])
+        self.n_nodes += 2
+        self.height += 1
+
+    def draw(self):
+        return _Graph(self._render_log)
+
+
+class _Ensemble:
+
+    def __init__(self, n_models, render_log):
+        self.models = [_Tree(render_log) for _ in range(n_models)]
+
+
+def test_fingerprint_changes_only_on_structure_change():
+    tree = _Tree([])
+    fingerprint = get_tree_fingerprint(tree)
+    assert get_tree_fingerprint(tree) == fingerprint
+    tree.split('x1', 0.5)
+    assert get_tree_fingerprint(tree) != fingerprint
+
+
+def test_render_only_dirty_trees(tmp_path):
+    render_log = []
+    model = _Ensemble(3, render_log)
+    renderer = IncrementalTreeStructureRenderer(str(tmp_path), 'current_tree_structure')
+
+    assert renderer.render_dirty_trees(model) == [0, 1, 2]
+    renderer.wait()
+    assert renderer.render_dirty_trees(model) == []
+
+    model.models[1].split('x2', 1.0)
+    assert renderer.render_dirty_trees(model) == [1]
+    renderer.wait()
+    assert render_log[-1] == str(tmp_path) + '/current_tree_structure_tree_1'
+    assert renderer.rendered_cnt == 4
+
+
+def test_historical_files_are_capped(tmp_path):
+    render_log = []
+    model = _Ensemble(1, render_log)
+    for i in range(4):
+        with open(str(tmp_path) + '/00-00-00-00-00-0{}_tree_structure.png'.format(i), 'w') as f:
+            f.write('png')
+        os.utime(str(tmp_path) + '/00-00-00-00-00-0{}_tree_structure.png'.format(i), (i, i))
+
+    renderer = IncrementalTreeStructureRenderer(str(tmp_path), 'tree_structure', tree_index=0,
+                                                timestamped=True, max_kept_files=2)
+    assert renderer.render_dirty_trees(model) == [0]
+    renderer.wait()
+
+    png_list = sorted(f for f in os.listdir(str(tmp_path)) if f.endswith('.png'))
+    assert len(png_list) == 2
+    assert '00-00-00-00-00-03_tree_structure.png' in png_list